@@ -5,6 +5,7 @@ MarkdownBrowser - Direct browser-based markdown viewer with LaTeX support
 Usage:
     python MarkdownBrowser.py              # Auto-loads SamplePaper.md
     python MarkdownBrowser.py document.md  # Loads specific file
+    python MarkdownBrowser.py document.md --profile  # Profile rendering into data/profiles/
 
 As a module:
     from MarkdownBrowser import DirectMarkdownBrowser, Plugin, create_browser
@@ -13,18 +14,32 @@ As a module:
     browser.run()
 """
 
+import argparse
+import email.utils
+import gzip
+import hashlib
+import re
+import select
+import socket
+import stat
+import struct
 import sys
 import os
 import markdown
 import webbrowser
 import json
+import queue
 from http.server import HTTPServer, BaseHTTPRequestHandler
 import threading
 import time
-from typing import Dict, List, Callable, Optional
+import traceback
+import uuid
+from typing import Dict, List, Callable, Optional, Tuple
 from dataclasses import dataclass
 import urllib.parse
 
+from telemetry import Profiler, get_registry, get_tracer
+
 # Check for pymdown-extensions
 LATEX_SUPPORT = False
 try:
@@ -34,19 +49,396 @@ except ImportError:
     print("Note: Install pymdown-extensions for better LaTeX parsing")
 
 # Export main classes and functions for module usage
-__all__ = ['DirectMarkdownBrowser', 'Plugin', 'PluginSystem', 'create_browser', 'create_formula_index_plugin']
+__all__ = ['DirectMarkdownBrowser', 'Plugin', 'PluginSystem', 'Job', 'JobManager', 'WorkerPool',
+           'PooledHTTPServer', 'StaticFile', 'create_browser', 'create_formula_index_plugin']
+
+# Files served from the document's directory, by extension; anything else is 404
+STATIC_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.svg': 'image/svg+xml',
+    '.webp': 'image/webp',
+    '.avif': 'image/avif',
+    '.ico': 'image/x-icon',
+    '.pdf': 'application/pdf',
+    '.css': 'text/css; charset=utf-8',
+    '.woff': 'font/woff',
+    '.woff2': 'font/woff2',
+    '.ttf': 'font/ttf',
+    '.otf': 'font/otf',
+    '.mp4': 'video/mp4',
+    '.webm': 'video/webm',
+    '.mp3': 'audio/mpeg',
+    '.wav': 'audio/wav',
+}
 
 
 @dataclass
 class Plugin:
-    """Plugin configuration for extending the browser"""
+    """
+    Plugin configuration for extending the browser.
+    
+    The rendered page is cached until the document or the set of plugins
+    changes, so preprocessors and postprocessors must depend only on their
+    input, and a plugin's fields should not be changed after registration.
+    
+    Thread safety: the server handles requests on a pool of worker threads,
+    so api_endpoints and stream_endpoints handlers (and the generators the
+    stream handlers return) may run concurrently with each other and with
+    themselves, and must guard any state they share. Preprocessors and
+    postprocessors run one at a time under the renderer's lock.
+    
+    An API handler with slow work can return a Job instead of its result; the
+    request is then answered at once with 202 and the job's id (see Job).
+    """
     name: str
     html_content: Optional[str] = None  # HTML to inject
     javascript: Optional[str] = None    # JS to inject
     css: Optional[str] = None          # CSS to inject
     markdown_preprocessor: Optional[Callable[[str], str]] = None
     html_postprocessor: Optional[Callable[[str], str]] = None
-    api_endpoints: Optional[Dict[str, Callable]] = None  # API handlers
+    api_endpoints: Optional[Dict[str, Callable]] = None  # API handlers (return a result, or a Job)
+    stream_endpoints: Optional[Dict[str, Callable]] = None  # Server-Sent Events handlers
+
+
+class Job:
+    """
+    Work that a plugin API handler hands back to the server instead of a result.
+    
+    The server answers the request at once with 202 and the job id, runs the
+    job on its job workers and reports it at GET /api/jobs/<id> (polling, or a
+    bounded long-poll with ?wait=<seconds>) and GET /api/jobs/<id>/events
+    (Server-Sent Events: what the work publish()es while it runs, then "done"
+    with the result, "error" or "cancelled"). Neither holds a connection
+    longer than JobManager.max_wait; an event stream that ends before the
+    outcome is resumed with ?after=<last event id>. DELETE /api/jobs/<id>
+    cancels the job: a pending job never runs, and a running one gets
+    on_cancel called, if given, and its result is dropped. The result and
+    published data must be JSON-serialisable, as for plain handlers.
+    
+    Example:
+        def observe(data):
+            job = Job(summarize, data, on_text=lambda text: job.publish("delta", {"text": text}),
+                      on_cancel=stop_summarizing)
+            return job
+    """
+    
+    def __init__(self, func: Callable, *args, on_cancel: Optional[Callable[[], None]] = None, **kwargs):
+        self.id = uuid.uuid4().hex
+        self.status = "pending"  # pending, running, done, error or cancelled
+        self.result = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self._call = (func, args, kwargs)
+        self._on_cancel = on_cancel
+        self._events: List[Dict] = []  # Published while running, served at /events
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._done = threading.Event()
+    
+    def run(self):
+        """Run the work and record its result or error (nothing if already cancelled)"""
+        with self._lock:
+            if self.status != "pending":
+                return
+            self.status = "running"
+        func, args, kwargs = self._call
+        result, error = None, None
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            print(f"[Browser] Job error: {type(e).__name__}: {str(e)}")
+            error = type(e).__name__
+        with self._lock:
+            if self.status == "running":  # Otherwise cancelled meanwhile: drop the result
+                self.result, self.error = result, error
+                self.status = "done" if error is None else "error"
+                self._finish()
+    
+    def cancel(self) -> bool:
+        """Cancel the job unless it has finished; False if it had"""
+        with self._lock:
+            if self._done.is_set():
+                return False
+            running = self.status == "running"
+            self.status = "cancelled"
+            self._finish()
+        if running and self._on_cancel is not None:
+            try:
+                self._on_cancel()
+            except Exception as e:
+                print(f"[Browser] Job cancel error: {type(e).__name__}: {str(e)}")
+        return True
+    
+    def _finish(self):
+        """Mark the job finished (caller holds the lock)"""
+        self.finished = time.time()
+        self._done.set()
+        self._changed.notify_all()
+    
+    def publish(self, event: str, data=None):
+        """Send an event to the job's event stream (dropped once the job has finished)"""
+        with self._lock:
+            if not self._done.is_set():
+                self._events.append({"event": event, "data": data})
+                self._changed.notify_all()
+    
+    def next_events(self, after: int, timeout: float) -> Tuple[List[Dict], bool]:
+        """
+        Events published after the first `after`, waiting up to timeout for
+        one (or for the job to finish), and whether the job has finished
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: len(self._events) > after or self._done.is_set(), timeout)
+            return self._events[after:], self._done.is_set()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job has finished; False on timeout"""
+        return self._done.wait(timeout)
+    
+    def to_dict(self) -> Dict:
+        """Job state as served at GET /api/jobs/<id>"""
+        state = {
+            "job_id": self.id,
+            "status": self.status,
+            "poll": f"/api/jobs/{self.id}",
+            "events": f"/api/jobs/{self.id}/events",
+        }
+        if self.status == "done":
+            state["result"] = self.result
+        elif self.status == "error":
+            state["error"] = self.error
+        return state
+
+
+class WorkerPool:
+    """
+    Fixed set of daemon threads running submitted calls in order.
+    
+    Daemon threads don't hold up interpreter exit, unlike a
+    ThreadPoolExecutor's workers, which matters when a call may be waiting
+    on a kept-alive connection or an LLM request at shutdown.
+    """
+    
+    def __init__(self, max_workers: int, name: str):
+        self.max_workers = max_workers
+        self._calls = queue.Queue()
+        self._workers = [threading.Thread(target=self._work, name=f"{name}-{index}", daemon=True)
+                         for index in range(max_workers)]
+        for worker in self._workers:
+            worker.start()
+    
+    def submit(self, func: Callable, *args):
+        """Queue func(*args) for the next free worker"""
+        self._calls.put((func, args))
+    
+    def close(self):
+        """Let the workers exit once the queued calls are done"""
+        for _ in self._workers:
+            self._calls.put(None)
+    
+    def _work(self):
+        while True:
+            call = self._calls.get()
+            if call is None:
+                return
+            func, args = call
+            try:
+                func(*args)
+            except Exception:
+                traceback.print_exc()
+
+
+class JobManager:
+    """Runs plugin Jobs on a worker pool and keeps finished ones for ttl seconds"""
+    
+    def __init__(self, max_workers: int = 8, ttl: float = 300.0, max_wait: float = 5.0):
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.max_wait = max_wait  # Longest GET /api/jobs/<id>?wait= or /events holds a connection
+        self._pool: Optional[WorkerPool] = None  # Started with the first job
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, job: Job) -> Job:
+        """Start a job"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = WorkerPool(self.max_workers, "BrowserJob")
+            self._expire()
+            self._jobs[job.id] = job
+            self._pool.submit(job.run)
+        return job
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a job; None if there is no such job"""
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+    
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+    
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished is not None and job.finished < cutoff]:
+            del self._jobs[job_id]
+
+
+class RenderedPage:
+    """
+    A rendered page with its validators.
+    
+    The UTF-8 body is kept with a strong ETag (hash of the body) and the time
+    it was rendered. The gzip encoding is made on first request and kept, so
+    compression runs at most once per render.
+    """
+    
+    def __init__(self, key: tuple, html: str):
+        self.key = key
+        self.html = html
+        self.body = html.encode('utf-8')
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+        self.last_modified = email.utils.formatdate(time.time(), usegmt=True)
+        self._gzip_body = None
+        self._gzip_lock = threading.Lock()
+    
+    @property
+    def gzip_body(self) -> bytes:
+        with self._gzip_lock:
+            if self._gzip_body is None:
+                self._gzip_body = gzip.compress(self.body, compresslevel=6, mtime=0)
+            return self._gzip_body
+    
+    def matches(self, if_none_match: str) -> bool:
+        """Whether an If-None-Match header names this page (in either encoding)"""
+        return _etag_matches(if_none_match, self.etag, self.gzip_etag)
+
+
+class StaticFile:
+    """
+    A file served from the document's directory, with its validators.
+    
+    The ETag and Last-Modified come from the file's mtime and size, so they
+    change whenever the file does. The same token is the file's version: the
+    page links images as <src>?v=<version>, and responses to a URL with the
+    current version may be cached for a year.
+    """
+    
+    def __init__(self, path: str, file_stat: os.stat_result):
+        self.path = path
+        self.size = file_stat.st_size
+        self.version = f"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}"
+        self.etag = f'"{self.version}"'
+        self.last_modified = email.utils.formatdate(file_stat.st_mtime, usegmt=True)
+        self.content_type = STATIC_TYPES[os.path.splitext(path)[1].lower()]
+
+
+def _etag_matches(if_none_match: str, *etags: str) -> bool:
+    """Whether an If-None-Match header names one of the given ETags (weak comparison)"""
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == '*' or tag in etags:
+            return True
+    return False
+
+
+def _parse_range(header: str, size: int):
+    """
+    Byte range (start, end), inclusive, of a Range header for a file of the
+    given size. None means send the whole file (no single bytes range, or a
+    malformed one, which is ignored); () means the range is unsatisfiable.
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        # Multiple ranges would need a multipart body; the whole file is also a valid answer
+        return None
+    first, dash, last = spec.strip().partition('-')
+    if not dash:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+            if start < 0 or (last and end < start):
+                return None
+        else:
+            # Suffix range: the last N bytes
+            suffix = int(last)
+            if suffix <= 0:
+                return ()
+            start, end = max(0, size - suffix), size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return ()
+    return start, min(end, size - 1)
+
+
+_IMG_TAG = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+_IMG_ATTR = re.compile(r'\s([\w:-]+)\s*=\s*("[^"]*"|\'[^\']*\'|[^\s"\'>]+)')
+_IMG_SRC = re.compile(r'(\ssrc\s*=\s*)("[^"]*"|\'[^\']*\'|[^\s"\'>]+)', re.IGNORECASE)
+
+
+def _image_size(path: str) -> Optional[tuple]:
+    """(width, height) from a PNG, GIF, JPEG or SVG file's header, or None"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(64 * 1024)
+    except OSError:
+        return None
+    
+    if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+        return struct.unpack('>II', head[16:24])
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return struct.unpack('<HH', head[6:10])
+    if head.startswith(b'\xff\xd8'):
+        # Walk the JPEG segments to the start-of-frame marker
+        offset = 2
+        while offset + 9 <= len(head):
+            if head[offset] != 0xFF:
+                return None
+            marker = head[offset + 1]
+            if marker == 0xFF:
+                offset += 1
+                continue
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack('>HH', head[offset + 5:offset + 9])
+                return width, height
+            offset += 2 + struct.unpack('>H', head[offset + 2:offset + 4])[0]
+        return None
+    
+    svg = re.search(rb'<svg\b[^>]*>', head)
+    if svg:
+        attrs = dict(re.findall(rb'\s([\w:-]+)\s*=\s*["\']([^"\']*)["\']', svg.group(0)))
+        # Unitless or px width/height, else the viewBox size
+        width = re.fullmatch(rb'\s*([\d.]+)\s*(?:px)?\s*', attrs.get(b'width', b''))
+        height = re.fullmatch(rb'\s*([\d.]+)\s*(?:px)?\s*', attrs.get(b'height', b''))
+        if width and height:
+            return round(float(width.group(1))), round(float(height.group(1)))
+        view_box = attrs.get(b'viewBox', b'').replace(b',', b' ').split()
+        if len(view_box) == 4:
+            try:
+                return round(float(view_box[2])), round(float(view_box[3]))
+            except ValueError:
+                return None
+    return None
 
 
 class PluginSystem:
@@ -56,10 +448,12 @@ class PluginSystem:
         self.plugins: Dict[str, Plugin] = {}
         self._preprocessors: List[Callable] = []
         self._postprocessors: List[Callable] = []
+        self.version = 0  # Bumped on every registration; part of the rendered page cache key
         
     def register(self, plugin: Plugin):
         """Register a new plugin"""
         self.plugins[plugin.name] = plugin
+        self.version += 1
         
         if plugin.markdown_preprocessor:
             self._preprocessors.append(plugin.markdown_preprocessor)
@@ -109,10 +503,33 @@ class PluginSystem:
 
 
 class MarkdownRenderer:
-    """Converts markdown to HTML with LaTeX support"""
+    """
+    Converts markdown to HTML with LaTeX support.
+    
+    The document is converted section by section (split at headings outside
+    code fences and display math) and each section's HTML is kept under the
+    hash of its text, so re-rendering after an edit only converts the
+    sections that changed. Documents whose sections refer to each other
+    (reference links, footnotes, abbreviations, markdown inside raw HTML,
+    the [TOC] marker) are converted whole.
+    """
+    
+    # Headings that start a section, and the fences, raw HTML blocks and
+    # comments they must not be inside
+    _SECTION_HEADING = re.compile(r'#{1,6}(?:[ \t]|$)')
+    _FENCE = re.compile(r'(`{3,}|~{3,})')
+    _HTML_BLOCK = re.compile(r' {0,3}<([A-Za-z][\w-]*)')
+    # Constructs that make one section's HTML depend on another section
+    _CROSS_SECTION = re.compile(r'^ {0,3}\*?\[[^\]]+\]:|\[\^[^\]]+\]|\smarkdown=["\']?(?:1|block|span)'
+                                r'|^ {0,3}\[TOC\][ \t]*$', re.M)
+    _HEADER_ID = re.compile(r'<h[1-6][^>]*?\sid="([^"]*)"')
     
     def __init__(self, plugin_system: PluginSystem):
         self.plugin_system = plugin_system
+        # markdown.Markdown keeps per-conversion state and is not re-entrant
+        self._lock = threading.Lock()
+        self._sections: Dict[str, str] = {}  # section text hash -> HTML, for the last render
+        self.last_render_stats = {"sections": 0, "converted": 0}
         
         # Configure extensions
         extensions = ['extra', 'codehilite', 'toc', 'tables', 'fenced_code', 'attr_list']
@@ -146,69 +563,170 @@ class MarkdownRenderer:
             extensions=extensions,
             extension_configs=extension_configs
         )
+        # Tags that open a raw HTML block running to their closing tag
+        self._html_block_tags = set(self.md.block_level_elements) - {'hr'}
     
     def render(self, markdown_text: str) -> tuple:
-        """Convert markdown to HTML with plugin processing"""
-        markdown_text = self.plugin_system.preprocess_markdown(markdown_text)
-        
+        """Convert markdown to HTML with plugin processing (one render at a time)"""
+        with self._lock:
+            markdown_text = self.plugin_system.preprocess_markdown(markdown_text)
+            
+            html_content = self._convert_sections(markdown_text)
+            
+            # Build TOC with proper IDs
+            html_content, toc_html = self._process_headers_and_build_toc(html_content)
+            
+            html_content = self.plugin_system.postprocess_html(html_content)
+            
+            return html_content, toc_html
+    
+    def _convert(self, markdown_text: str) -> str:
         self.md.reset()
-        html_content = self.md.convert(markdown_text)
+        return self.md.convert(markdown_text)
+    
+    def _convert_sections(self, markdown_text: str) -> str:
+        """Convert markdown to HTML, reusing the HTML of sections that did not change"""
+        sections = self._split_sections(markdown_text)
+        if sections is None:
+            self._sections = {}
+            self.last_render_stats = {"sections": 1, "converted": 1}
+            return self._convert(markdown_text)
         
-        # Build TOC with proper IDs
-        html_content, toc_html = self._process_headers_and_build_toc(html_content)
+        previous, rendered, parts = self._sections, {}, []
+        converted = 0
+        for section in sections:
+            key = hashlib.sha256(section.encode('utf-8')).hexdigest()
+            html = rendered.get(key)
+            if html is None:
+                html = previous.get(key)
+            if html is None:
+                html = self._convert(section)
+                converted += 1
+            rendered[key] = html
+            if html:
+                parts.append(html)
+        html_content = '\n'.join(parts)
         
-        html_content = self.plugin_system.postprocess_html(html_content)
+        # Header IDs are only made unique within a section; fall back if they clash
+        header_ids = self._HEADER_ID.findall(html_content)
+        if len(header_ids) != len(set(header_ids)):
+            self._sections = {}
+            self.last_render_stats = {"sections": 1, "converted": 1}
+            return self._convert(markdown_text)
         
-        return html_content, toc_html
+        self._sections = rendered
+        self.last_render_stats = {"sections": len(sections), "converted": converted}
+        return html_content
     
-    def _process_headers_and_build_toc(self, html_content: str) -> tuple:
-        """Add IDs to headers and build TOC"""
-        import re
-        from html import escape
-        
-        header_pattern = r'<h([1-6])([^>]*)>(.+?)</h\1>'
-        headers = list(re.finditer(header_pattern, html_content, re.DOTALL))
+    def _split_sections(self, markdown_text: str) -> Optional[List[str]]:
+        """
+        Split at headings outside fences, $$ blocks, raw HTML blocks and
+        comments; None if sections depend on each other or a raw HTML block
+        is left open.
+        """
+        if self._CROSS_SECTION.search(markdown_text):
+            return None
         
-        if not headers:
-            return html_content, ''
+        sections, current = [], []
+        fence = None
+        in_math = False
+        in_comment = False
+        html_tag, html_depth = None, 0
+        for line in markdown_text.splitlines(keepends=True):
+            stripped = line.strip()
+            if fence:
+                if stripped.startswith(fence) and not stripped[len(fence):].strip(fence[0]).strip():
+                    fence = None
+            elif in_math:
+                if stripped.endswith('$$'):
+                    in_math = False
+            elif in_comment:
+                if '-->' in line:
+                    in_comment = False
+            elif html_tag:
+                html_depth += self._tag_balance(html_tag, line)
+                if html_depth <= 0:
+                    html_tag = None
+            else:
+                if self._SECTION_HEADING.match(line) and current:
+                    sections.append(''.join(current))
+                    current = []
+                fence_match = self._FENCE.match(stripped)
+                html_match = self._HTML_BLOCK.match(line)
+                comment = line.find('<!--')
+                if fence_match:
+                    fence = fence_match.group(1)
+                elif stripped.startswith('$$') and (stripped == '$$' or not stripped[2:].endswith('$$')):
+                    in_math = True
+                elif comment != -1 and '-->' not in line[comment + 4:]:
+                    in_comment = True
+                elif html_match and html_match.group(1).lower() in self._html_block_tags:
+                    html_tag = html_match.group(1).lower()
+                    html_depth = self._tag_balance(html_tag, line)
+                    if html_depth <= 0:
+                        html_tag = None
+            current.append(line)
+        if html_tag:
+            return None
+        if current:
+            sections.append(''.join(current))
+        return sections
+    
+    @staticmethod
+    def _tag_balance(tag: str, line: str) -> int:
+        """Opening minus closing tags named tag in a line"""
+        return (len(re.findall(rf'<{tag}(?=[\s/>]|$)', line, re.I))
+                - len(re.findall(rf'</{tag}\s*>', line, re.I)))
+    
+    # Header ID and TOC pass
+    _HEADER = re.compile(r'<h([1-6])([^>]*)>(.+?)</h\1>', re.DOTALL)
+    _TAG = re.compile(r'<[^>]+>')
+    _WHITESPACE = re.compile(r'\s+')
+    _ATTR_ID = re.compile(r'id="([^"]+)"')
+    _SLUG_DROP = re.compile(r'[^\w\s-]')
+    _SLUG_JOIN = re.compile(r'[-\s]+')
+    
+    def _process_headers_and_build_toc(self, html_content: str) -> tuple:
+        """
+        Add IDs to headers and build TOC.
         
+        One pass over the document: the text between headers is copied into a
+        list of chunks once, so the cost is linear in the document size.
+        """
+        chunks = []
         toc_items = []
-        modified_html = html_content
-        offset = 0
+        last = 0
         
-        for match in headers:
-            level = int(match.group(1))
-            attrs = match.group(2)
-            content = match.group(3)
+        for match in self._HEADER.finditer(html_content):
+            level, attrs, content = match.groups()
             
             # Clean text for ID
-            clean_text = re.sub(r'<[^>]+>', '', content).strip()
-            clean_text = re.sub(r'\s+', ' ', clean_text)
+            clean_text = self._WHITESPACE.sub(' ', self._TAG.sub('', content).strip())
             
             # Get or generate ID
-            id_match = re.search(r'id="([^"]+)"', attrs)
+            id_match = self._ATTR_ID.search(attrs) if 'id="' in attrs else None
             if id_match:
                 header_id = id_match.group(1)
             else:
-                header_id = clean_text.lower()
-                header_id = re.sub(r'[^\w\s-]', '', header_id)
-                header_id = re.sub(r'[-\s]+', '-', header_id).strip('-')
+                header_id = self._SLUG_DROP.sub('', clean_text.lower())
+                header_id = self._SLUG_JOIN.sub('-', header_id).strip('-')
                 
                 # Add ID to header
-                new_header = f'<h{level}{attrs} id="{header_id}">{content}</h{level}>'
-                start = match.start() + offset
-                end = match.end() + offset
-                modified_html = modified_html[:start] + new_header + modified_html[end:]
-                offset += len(new_header) - len(match.group(0))
+                chunks.append(html_content[last:match.start()])
+                chunks.append(f'<h{level}{attrs} id="{header_id}">{content}</h{level}>')
+                last = match.end()
             
             toc_items.append({
-                'level': level,
+                'level': int(level),
                 'id': header_id,
                 'text': clean_text
             })
         
-        toc_html = self._build_toc_html(toc_items)
-        return modified_html, toc_html
+        if not toc_items:
+            return html_content, ''
+        
+        chunks.append(html_content[last:])
+        return ''.join(chunks), self._build_toc_html(toc_items)
     
     def _build_toc_html(self, toc_items: list) -> str:
         """Build hierarchical TOC HTML"""
@@ -264,36 +782,373 @@ class MarkdownRenderer:
         return '<ul>\n' + '\n'.join(html_parts) + '\n</ul>'
 
 
+class PooledHTTPServer(HTTPServer):
+    """
+    HTTPServer that handles connections on a bounded pool of worker threads.
+    
+    A slow plugin call (such as an observation waiting on LLM requests) only
+    occupies one worker, so page loads, feedback and session control keep
+    being served. Connections beyond max_workers wait in a queue instead of
+    each getting a new thread. A kept-alive connection holds its worker until
+    it has been idle for keepalive_timeout seconds.
+    """
+    
+    def __init__(self, server_address, handler_class, max_workers: int = 16, keepalive_timeout: float = 5.0):
+        super().__init__(server_address, handler_class)
+        self.max_workers = max_workers
+        self.keepalive_timeout = keepalive_timeout
+        self._pool = WorkerPool(max_workers, "BrowserWorker")
+    
+    def process_request(self, request, client_address):
+        """Hand the connection to the worker pool"""
+        self._pool.submit(self._process, request, client_address)
+    
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+    
+    def server_close(self):
+        """Close the socket and let idle workers exit"""
+        super().server_close()
+        self._pool.close()
+
+
+# Handler metrics, served at /api/metrics together with the AI pipeline metrics
+_HTTP_SECONDS = get_registry().histogram("browser_http_request_seconds", "Time spent handling each request",
+                                         ("method", "route", "status"))
+
+
 class BrowserHandler(BaseHTTPRequestHandler):
-    """HTTP request handler for the local server"""
+    """
+    HTTP request handler for the local server.
+    
+    Speaks HTTP/1.1 with persistent connections: every response except the
+    Server-Sent Events streams (which close the connection when done)
+    carries a Content-Length, and a connection is closed after being idle for
+    the server's keepalive_timeout.
+    """
+    
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without TCP_NODELAY the body
+    # of a response on a kept-alive connection waits for the client's delayed ACK
+    disable_nagle_algorithm = True
     
     def __init__(self, *args, browser_instance=None, **kwargs):
         self.browser = browser_instance
         super().__init__(*args, **kwargs)
     
+    def setup(self):
+        """Apply the server's idle timeout to the connection"""
+        self.timeout = getattr(self.server, 'keepalive_timeout', None)
+        super().setup()
+    
     def log_message(self, format, *args):
         """Suppress server logs"""
         pass
     
+    def parse_request(self) -> bool:
+        """Parse the request line and headers, noting whether a body is left to read"""
+        self._body_pending = False
+        if not super().parse_request():
+            return False
+        if self.headers.get('Transfer-Encoding'):
+            # Only Content-Length framed bodies are read; don't reuse the connection
+            self.close_connection = True
+        self._body_pending = (self.headers.get('Content-Length') or '0').strip() != '0'
+        return True
+    
+    def _read_body(self) -> str:
+        """Read the request body"""
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8') if length else ''
+        self._body_pending = False
+        return body
+    
+    def send_error(self, code, message=None, explain=None):
+        """
+        Send an error with a JSON body and Content-Length. The connection stays
+        open unless the request was malformed or its body was not read.
+        """
+        if not self.command or code == 400 or getattr(self, '_body_pending', False):
+            self.close_connection = True
+        if message is None:
+            message = self.responses.get(code, ('Error',))[0]
+        body = json.dumps({'error': message}).encode()
+        self.send_response(code, message)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+    
+    def send_response(self, code, message=None):
+        """Remember the status code for the handler metrics"""
+        self._status = code
+        super().send_response(code, message)
+        
+    def _route(self) -> str:
+        """Route label for metrics (known paths only, to keep label values bounded)"""
+        path = urllib.parse.urlsplit(self.path).path
+        if path in ('/', '/api/reload', '/api/metrics'):
+            return path
+        parts = path.split('/')
+        if path.startswith('/api/jobs/') and len(parts) in (4, 5):
+            return '/api/jobs/<id>' + ('/' + parts[4] if len(parts) == 5 else '')
+        if path.startswith('/api/plugin/') and len(parts) >= 4:
+            plugin = self.browser.plugin_system.plugins.get(parts[3])
+            endpoint = '/'.join(parts[4:])
+            if plugin and endpoint in {**(plugin.api_endpoints or {}), **(plugin.stream_endpoints or {})}:
+                return f"/api/plugin/{parts[3]}/{endpoint}"
+        if not path.startswith('/api/') and os.path.splitext(path)[1].lower() in STATIC_TYPES:
+            return '/<static>'
+        return "other"
+    
+    def _timed(self, method: str, handler: Callable[[], None]):
+        """Run a request handler and record its time"""
+        self._status = None
+        route = self._route()
+        start = time.perf_counter()
+        try:
+            with get_tracer().span(f"{method} {route}", cat="http", path=self.path):
+                handler()
+        finally:
+            _HTTP_SECONDS.observe(time.perf_counter() - start, method=method, route=route,
+                                  status=str(self._status or 0))
+    
     def do_GET(self):
         """Handle GET requests"""
-        if self.path == '/':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            self.wfile.write(self.browser.get_html().encode())
+        self._timed('GET', self._handle_get)
+        
+    def do_POST(self):
+        """Handle POST requests for plugin APIs"""
+        self._timed('POST', self._handle_post)
+    
+    def do_DELETE(self):
+        """Handle DELETE requests (job cancellation)"""
+        self._timed('DELETE', self._handle_delete)
+    
+    def _handle_get(self):
+        """Serve the page and the GET API routes"""
+        path, _, query = self.path.partition('?')
+        if path == '/api/metrics':
+            self._send_metrics(urllib.parse.parse_qs(query))
+        elif self.path == '/':
+            self._send_page(self.browser.get_page())
+        elif path.startswith('/api/jobs/'):
+            self._handle_job(path, urllib.parse.parse_qs(query))
         elif self.path == '/api/reload':
             # Reload the document
             self.browser.reload()
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({'status': 'reloaded'}).encode())
+            self._send_json({'status': 'reloaded'})
+        elif not path.startswith('/api/'):
+            self._handle_static(path, urllib.parse.parse_qs(query))
         else:
             self.send_error(404)
     
-    def do_POST(self):
-        """Handle POST requests for plugin APIs"""
+    def _handle_static(self, path: str, query: Dict[str, List[str]]):
+        """Serve a file from the document's directory (figures and other assets)"""
+        file_path = self.browser.find_asset(path)
+        if file_path is None:
+            self.send_error(404, "Not Found")
+            return
+        try:
+            f = open(file_path, 'rb')
+        except OSError:
+            self.send_error(404, "Not Found")
+            return
+        with f:
+            # Validators from the open file, so they describe the bytes sent
+            self._send_static(f, StaticFile(file_path, os.fstat(f.fileno())), query)
+    
+    def _send_static(self, f, asset: StaticFile, query: Dict[str, List[str]]):
+        """
+        Send a static file: 304 when the client's copy is current, 206 for a
+        byte range, 416 for a range beyond the end. The body is copied from
+        the file to the socket by the kernel (sendfile) where available.
+        """
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, asset.etag)
+        else:
+            not_modified = self.headers.get('If-Modified-Since') == asset.last_modified
+        
+        byte_range = None
+        range_header = self.headers.get('Range')
+        # If-Range: only send part of the file if the client's copy is this version
+        if range_header and not not_modified and \
+                self.headers.get('If-Range', asset.etag) in (asset.etag, asset.last_modified):
+            byte_range = _parse_range(range_header, asset.size)
+        
+        if byte_range == ():
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{asset.size}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        
+        self.send_response(304 if not_modified else 206 if byte_range else 200)
+        self.send_header('ETag', asset.etag)
+        self.send_header('Last-Modified', asset.last_modified)
+        if query.get('v', [''])[0] == asset.version:
+            # Versioned URL from the page: these bytes never change under it
+            self.send_header('Cache-Control', 'public, max-age=31536000, immutable')
+        else:
+            self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Accept-Ranges', 'bytes')
+        if not_modified:
+            self.end_headers()
+            return
+        
+        start, end = byte_range or (0, asset.size - 1)
+        count = end - start + 1
+        self.send_header('Content-type', asset.content_type)
+        if byte_range:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{asset.size}')
+        self.send_header('Content-Length', str(count))
+        self.end_headers()
+        if count > 0 and self.connection.sendfile(f, start, count) < count:
+            # The file shrank while being sent; the body is short of Content-Length
+            self.close_connection = True
+    
+    def _handle_job(self, path: str, query: Dict[str, List[str]]):
+        """
+        GET /api/jobs/<id> (state) and /api/jobs/<id>/events (completion as
+        Server-Sent Events). With ?wait=<seconds> the state is sent once the
+        job finishes or the wait (at most JobManager.max_wait) runs out, so a
+        waiting client holds a worker only that long at a time.
+        """
+        parts = path.split('/')
+        job = self.browser.jobs.get(parts[3]) if len(parts) in (4, 5) else None
+        if job is None:
+            self.send_error(404, "Not Found")
+        elif len(parts) == 4:
+            try:
+                wait = float(query.get('wait', ['0'])[0])
+            except ValueError:
+                wait = 0.0
+            if wait > 0:
+                job.wait(min(wait, self.browser.jobs.max_wait))
+            self._send_json(job.to_dict())
+        elif parts[4] == 'events':
+            try:
+                after = int(query.get('after', [self.headers.get('Last-Event-ID') or '0'])[0])
+            except ValueError:
+                after = 0
+            self._send_event_stream(self._job_events(job, max(0, after), self.browser.jobs.max_wait))
+        else:
+            self.send_error(404, "Not Found")
+    
+    @staticmethod
+    def _job_events(job: Job, after: int, max_wait: float):
+        """
+        The job's events past the first `after`, numbered by id, then its
+        outcome once it finishes. Ends after max_wait seconds while the job
+        is still running, so a worker is only held that long; the client
+        reconnects with ?after=<last id>.
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            events, finished = job.next_events(after, max(0.0, deadline - time.monotonic()))
+            for event in events:
+                after += 1
+                yield {"id": after, **event}
+            if finished:
+                break
+            if time.monotonic() >= deadline:
+                return
+        if job.status == "done":
+            yield {"event": "done", "data": job.result}
+        elif job.status == "cancelled":
+            yield {"event": "cancelled", "data": {}}
+        else:
+            yield {"event": "error", "data": {"error": job.error}}
+    
+    def _handle_delete(self):
+        """DELETE /api/jobs/<id>: cancel the job (the client has stopped waiting for it)"""
+        parts = urllib.parse.urlsplit(self.path).path.split('/')
+        job = self.browser.jobs.cancel(parts[3]) if self.path.startswith('/api/jobs/') and len(parts) == 4 else None
+        if job is None:
+            self.send_error(404, "Not Found")
+        else:
+            self._send_json(job.to_dict())
+    
+    def _send_json(self, payload, status: int = 200, headers: Optional[Dict[str, str]] = None):
+        """Send a JSON response"""
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_page(self, page: RenderedPage):
+        """Send the page, or 304 when the client's copy is current; gzip when accepted"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            not_modified = page.matches(if_none_match)
+        else:
+            not_modified = self.headers.get('If-Modified-Since') == page.last_modified
+        use_gzip = self._accepts_gzip()
+        
+        self.send_response(304 if not_modified else 200)
+        self.send_header('ETag', page.gzip_etag if use_gzip else page.etag)
+        self.send_header('Last-Modified', page.last_modified)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if not_modified:
+            self.end_headers()
+            return
+        
+        body = page.gzip_body if use_gzip else page.body
+        self.send_header('Content-type', 'text/html; charset=utf-8')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _accepts_gzip(self) -> bool:
+        """Whether Accept-Encoding allows gzip (and does not give it q=0)"""
+        for coding in (self.headers.get('Accept-Encoding') or '').split(','):
+            name, _, params = coding.partition(';')
+            if name.strip().lower() in ('gzip', 'x-gzip', '*'):
+                quality = params.strip().lower()
+                if quality.startswith('q='):
+                    try:
+                        return float(quality[2:]) > 0
+                    except ValueError:
+                        return False
+                return True
+        return False
+    
+    def _send_metrics(self, query: Dict[str, List[str]]):
+        """Serve the metrics registry as Prometheus text, or JSON with ?format=json"""
+        registry = get_registry()
+        wants_json = (query.get('format', [''])[0] == 'json' or
+                      'application/json' in (self.headers.get('Accept') or ''))
+        if wants_json:
+            body = json.dumps(registry.to_dict()).encode()
+            content_type = 'application/json'
+        else:
+            body = registry.to_prometheus().encode()
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _handle_post(self):
+        """Dispatch POST requests to plugin API and stream endpoints"""
         if self.path.startswith('/api/plugin/'):
             # Extract plugin name and endpoint
             parts = self.path.split('/')
@@ -301,24 +1156,34 @@ class BrowserHandler(BaseHTTPRequestHandler):
                 plugin_name = parts[3]
                 endpoint = '/'.join(parts[4:]) if len(parts) > 4 else ''
                 
+                tracer = get_tracer()
                 try:
                     # Get request data
-                    content_length = int(self.headers['Content-Length'])
-                    post_data = self.rfile.read(content_length).decode('utf-8')
+                    with tracer.span("read_body", cat="http"):
+                        post_data = self._read_body()
                     
                     # Call plugin endpoint
                     plugin = self.browser.plugin_system.plugins.get(plugin_name)
-                    if plugin and plugin.api_endpoints and endpoint in plugin.api_endpoints:
-                        try:
+                    if plugin and plugin.stream_endpoints and endpoint in plugin.stream_endpoints:
+                        with tracer.span("json_decode", cat="http", size=len(post_data)):
                             data = json.loads(post_data) if post_data else {}
-                            result = plugin.api_endpoints[endpoint](data)
+                        self._send_event_stream(plugin.stream_endpoints[endpoint](data))
+                    elif plugin and plugin.api_endpoints and endpoint in plugin.api_endpoints:
+                        try:
+                            with tracer.span("json_decode", cat="http", size=len(post_data)):
+                                data = json.loads(post_data) if post_data else {}
+                            with tracer.span(f"{plugin_name}/{endpoint}", cat="plugin"):
+                                result = plugin.api_endpoints[endpoint](data)
                             
                             # Try to send response
                             try:
-                                self.send_response(200)
-                                self.send_header('Content-type', 'application/json')
-                                self.end_headers()
-                                self.wfile.write(json.dumps(result).encode())
+                                with tracer.span("write_response", cat="http"):
+                                    if isinstance(result, Job):
+                                        # Slow work: answer now, report completion via /api/jobs/<id>
+                                        job = self.browser.jobs.submit(result)
+                                        self._send_json(job.to_dict(), 202, {'Location': f"/api/jobs/{job.id}"})
+                                    else:
+                                        self._send_json(result)
                             except (ConnectionAbortedError, ConnectionResetError, BrokenPipeError) as e:
                                 # Connection was closed by client, log but don't crash
                                 print(f"[Browser] Client disconnected during response: {type(e).__name__}")
@@ -344,19 +1209,69 @@ class BrowserHandler(BaseHTTPRequestHandler):
                         return
         else:
             self.send_error(404, "Not Found")
+    
+    def _send_event_stream(self, events):
+        """Write events from a stream endpoint as Server-Sent Events"""
+        # The stream has no Content-Length; its end is marked by closing the connection
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        
+        try:
+            for event in events:
+                if self._client_gone():
+                    # A write to a closed connection may still succeed; stop the stream now
+                    print("[Browser] Client disconnected during stream")
+                    break
+                name = event.get('event', 'message')
+                payload = json.dumps(event.get('data'))
+                event_id = f"id: {event['id']}\n" if 'id' in event else ""
+                self.wfile.write(f"{event_id}event: {name}\ndata: {payload}\n\n".encode())
+                self.wfile.flush()
+        except (ConnectionAbortedError, ConnectionResetError, BrokenPipeError) as e:
+            # Client went away mid-stream, stop producing events
+            print(f"[Browser] Client disconnected during stream: {type(e).__name__}")
+        except Exception as e:
+            # Headers are already sent, so report the failure as a final event
+            print(f"[Browser] Plugin stream error: {type(e).__name__}: {str(e)}")
+            try:
+                self.wfile.write(f"event: error\ndata: {json.dumps({'error': type(e).__name__})}\n\n".encode())
+            except OSError:
+                pass
+        finally:
+            close = getattr(events, 'close', None)
+            if close:
+                close()
+    
+    def _client_gone(self) -> bool:
+        """Whether the client has closed its end (it sends nothing more during a stream)"""
+        try:
+            readable, _, _ = select.select([self.connection], [], [], 0)
+            return bool(readable) and self.connection.recv(1, socket.MSG_PEEK) == b''
+        except (OSError, ValueError):
+            return True
 
 
 class DirectMarkdownBrowser:
     """Browser-based markdown viewer with plugin support"""
     
-    def __init__(self, port=0):  # port=0 auto-selects
+    def __init__(self, port=0, max_workers=16, keepalive_timeout=5.0, job_workers=8):  # port=0 auto-selects
         self.plugin_system = PluginSystem()
+        self.jobs = JobManager(job_workers)  # Slow plugin work returned as Jobs
         self.renderer = MarkdownRenderer(self.plugin_system)
         self.current_file = None
         self.current_content = ""
         self.server = None
         self.port = port
         self.server_thread = None
+        self.max_workers = max_workers  # Requests served concurrently
+        self.keepalive_timeout = keepalive_timeout  # Idle seconds before a kept-alive connection is closed
+        # Guards the document, the plugin set and the page cache across worker threads
+        self._lock = threading.RLock()
+        self._page_cache: Optional[RenderedPage] = None
         
         self._register_core_plugins()
     
@@ -535,12 +1450,113 @@ document.addEventListener('DOMContentLoaded', function() {
 """
         )
         self.register_plugin(control_plugin)
+        
+        # Figures: lazy loading and intrinsic size, so images don't hold up first paint or shift the layout
+        image_plugin = Plugin(
+            name="images",
+            css="""
+.content-wrapper img {
+    max-width: 100%;
+    height: auto;
+}
+""",
+            html_postprocessor=self._process_images
+        )
+        self.register_plugin(image_plugin)
+    
+    def _process_images(self, html: str) -> str:
+        """
+        Add loading="lazy" to <img> tags, and to images in the document's
+        directory their width/height (read from the file header) and a
+        versioned src so they can be cached for good. Images changed on disk
+        get a new version when the page is next rendered (e.g. on reload).
+        """
+        return _IMG_TAG.sub(self._process_image_tag, html)
+    
+    def _process_image_tag(self, match) -> str:
+        tag = match.group(0)
+        attrs = {name.lower(): value for name, value in _IMG_ATTR.findall(tag)}
+        additions = []
+        if 'loading' not in attrs:
+            additions.append('loading="lazy"')
+        
+        src = attrs.get('src', '')
+        url = urllib.parse.urlsplit(src.strip('"\''))
+        # Resolved as the browser would against the page at '/'
+        file_path = (self.find_asset(urllib.parse.urljoin('/', url.path))
+                     if src and not url.scheme and not url.netloc else None)
+        if file_path:
+            if 'width' not in attrs and 'height' not in attrs:
+                size = _image_size(file_path)
+                if size:
+                    additions.append(f'width="{size[0]}" height="{size[1]}"')
+            if not url.query:
+                version = StaticFile(file_path, os.stat(file_path)).version
+                quote = src[0] if src[0] in '"\'' else '"'
+                versioned = urllib.parse.urlunsplit(url._replace(query=f"v={version}"))
+                tag = _IMG_SRC.sub(lambda m: f"{m.group(1)}{quote}{versioned}{quote}", tag, count=1)
+        
+        if not additions:
+            return tag
+        self_closing = tag.endswith('/>')
+        head = tag[:-2] if self_closing else tag[:-1]
+        return head.rstrip() + ''.join(' ' + addition for addition in additions) + (' />' if self_closing else '>')
+    
+    @property
+    def asset_root(self) -> str:
+        """Directory static files are served from: the document's, or the working directory for loaded content"""
+        current_file = self.current_file
+        return os.path.dirname(os.path.abspath(current_file)) if current_file else os.getcwd()
+    
+    def find_asset(self, url_path: str) -> Optional[str]:
+        """
+        File under asset_root named by a URL path, or None if there is none,
+        it is not one of the STATIC_TYPES, or the path is hidden or leads
+        outside the root ('..', symlinks).
+        """
+        relative = urllib.parse.unquote(url_path).lstrip('/')
+        if not relative or '\x00' in relative or '\\' in relative:
+            return None
+        if any(part.startswith('.') for part in relative.split('/')):
+            return None
+        if os.path.splitext(relative)[1].lower() not in STATIC_TYPES:
+            return None
+        root = os.path.realpath(self.asset_root)
+        file_path = os.path.realpath(os.path.join(root, relative))
+        if os.path.commonpath([root, file_path]) != root:
+            return None
+        try:
+            if not stat.S_ISREG(os.stat(file_path).st_mode):
+                return None
+        except (OSError, ValueError):
+            return None
+        return file_path
     
     def register_plugin(self, plugin: Plugin):
         """Register a new plugin"""
-        self.plugin_system.register(plugin)
+        with self._lock:
+            self.plugin_system.register(plugin)
+            self._page_cache = None
     
     def get_html(self) -> str:
+        """Complete HTML page, rendered again only when the document or plugins changed"""
+        return self.get_page().html
+    
+    def get_html_bytes(self) -> bytes:
+        """Complete HTML page encoded as UTF-8, as served at '/'"""
+        return self.get_page().body
+    
+    def get_page(self) -> RenderedPage:
+        """The rendered page for the current document, from the cache when it is still valid"""
+        with self._lock:
+            key = (hashlib.sha256(self.current_content.encode('utf-8')).hexdigest(),
+                   self.current_file, self.plugin_system.version)
+            page = self._page_cache
+            if page is None or page.key != key:
+                page = self._page_cache = RenderedPage(key, self._render_page())
+            return page
+    
+    def _render_page(self) -> str:
         """Generate complete HTML page"""
         html_content, toc_html = self.renderer.render(self.current_content)
         
@@ -703,7 +1719,8 @@ document.addEventListener('DOMContentLoaded', function() {
     def start_server(self):
         """Start the local HTTP server"""
         handler = lambda *args, **kwargs: BrowserHandler(*args, browser_instance=self, **kwargs)
-        self.server = HTTPServer(('localhost', self.port), handler)
+        self.server = PooledHTTPServer(('localhost', self.port), handler, self.max_workers,
+                                       self.keepalive_timeout)
         self.port = self.server.server_port  # Get actual port if auto-selected
         
         self.server_thread = threading.Thread(target=self.server.serve_forever)
@@ -717,6 +1734,8 @@ document.addEventListener('DOMContentLoaded', function() {
         if self.server:
             self.server.shutdown()
             self.server_thread.join()
+            self.server.server_close()
+            self.jobs.close()
     
     def load_markdown_file(self, file_path: str):
         """Load and display a markdown file"""
@@ -726,9 +1745,12 @@ document.addEventListener('DOMContentLoaded', function() {
         
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                self.current_content = f.read()
+                content = f.read()
             
-            self.current_file = file_path
+            with self._lock:
+                self.current_content = content
+                self.current_file = file_path
+                self._page_cache = None
             return True
         except Exception as e:
             print(f"Error loading file: {e}")
@@ -736,13 +1758,18 @@ document.addEventListener('DOMContentLoaded', function() {
     
     def load_markdown_content(self, content: str):
         """Load markdown content directly"""
-        self.current_content = content
-        self.current_file = None
+        with self._lock:
+            self.current_content = content
+            self.current_file = None
+            self._page_cache = None
     
     def reload(self):
         """Reload the current file"""
-        if self.current_file:
-            self.load_markdown_file(self.current_file)
+        with self._lock:
+            self._page_cache = None
+            current_file = self.current_file
+        if current_file:
+            self.load_markdown_file(current_file)
     
     def open_in_browser(self):
         """Open in default browser"""
@@ -843,16 +1870,34 @@ document.addEventListener('DOMContentLoaded', function() {
 
 def main():
     """Main entry point - can be run directly or with a file argument"""
+    parser = argparse.ArgumentParser(description='View a markdown file in the browser')
+    parser.add_argument('file', nargs='?', help='Markdown file (default: SamplePaper.md)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile page rendering into data/profiles/')
+    args = parser.parse_args()
+    
     browser = DirectMarkdownBrowser()
     
     # Example: Register a custom plugin
     # browser.register_plugin(create_formula_index_plugin())
     
+    profiler = None
+    if args.profile:
+        profiler = Profiler(os.path.join('data/profiles', f"browser_{time.strftime('%Y%m%d_%H%M%S')}"))
+        profiler.wrap(DirectMarkdownBrowser, 'get_page')
+        profiler.start()
+    
+    try:
+        _load_and_run(browser, args.file)
+    finally:
+        if profiler:
+            print(f"Profile saved to: {', '.join(profiler.stop())}")
+
+
+def _load_and_run(browser, file_path=None):
+    """Load the given file, SamplePaper.md or the demo content, and run the browser"""
     # Determine which file to load
-    if len(sys.argv) > 1:
-        # File provided as argument
-        file_path = sys.argv[1]
-    else:
+    if not file_path:
         # Look for default file in current directory
         default_files = ['SamplePaper.md']
         file_path = None
@@ -866,7 +1911,7 @@ def main():
         if not file_path:
             # No default file found, show demo content
             print("No markdown file specified and SamplePaper.md not found.")
-            print("Usage: python MarkdownBrowser.py [file.md]")
+            print("Usage: python MarkdownBrowser.py [file.md] [--profile]")
             print("\nShowing demo content...\n")
             
             demo_content = """# MarkdownBrowser Demo
@@ -14,74 +14,499 @@ Usage:
     response = assistant.process_observation("User reads abstract slowly")
     if response:
         print(f"Assistant: {response}")
+
+Async usage (many sessions on one event loop):
+    from ReaderAI import AsyncResearchAssistant
+    
+    assistant = AsyncResearchAssistant()
+    response = await assistant.process_observation("User reads abstract slowly")
 """
 
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+import httpx
+import asyncio
+import hashlib
+import importlib.util
 import json
+import os
+import sqlite3
+import tempfile
+import threading
 import time
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
 import re
 
+from telemetry import get_registry, get_tracer, traced
+
+# Check for HTTP/2 support (the h2 package)
+HTTP2_SUPPORT = importlib.util.find_spec("h2") is not None
+
 # API Configuration - Can be overridden when importing
 DEFAULT_API_URL = '<your-url>'
 DEFAULT_API_KEY = 'sk-<your-api>'
 
+# Model every agent uses unless a route says otherwise
+DEFAULT_MODEL = "deepseek-ai/DeepSeek-V3"
+
 # Export only the main class and configuration functions
-__all__ = ['ResearchAssistant', 'configure_api', 'ReadingMetrics', 'Memory']
+__all__ = ['ResearchAssistant', 'AsyncResearchAssistant', 'configure_api', 'configure_async_api',
+           'HTTPTransport', 'get_default_transport', 'set_default_transport',
+           'LatencyTracker', 'LatencyBudget', 'HedgingPolicy', 'ModelRoute', 'ModelRouter',
+           'ReadingMetrics', 'Memory', 'RecordLog', 'ResponseCache']
 
 
-def configure_api(api_url: str = None, api_key: str = None) -> OpenAI:
+class HTTPTransport:
+    """
+    Process-wide HTTP transport shared by all agents and sessions.
+    
+    Owns one keep-alive connection pool for sync clients and one for async
+    clients, and hands out OpenAI/AsyncOpenAI clients built on them (one per
+    API URL and key), so sessions reuse warm TLS connections instead of each
+    opening its own.
+    
+    The async pool belongs to the event loop that first uses it; sync
+    ResearchAssistants all run on the same shared loop.
+    """
+    
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, http2: bool = False,
+                 timeout: float = 600.0, connect_timeout: float = 5.0):
+        """
+        Args:
+            max_connections: Upper bound on open connections per pool
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection is kept
+            http2: Negotiate HTTP/2 (requires the h2 package)
+            timeout: Default request timeout in seconds
+            connect_timeout: Connection establishment timeout in seconds
+        """
+        if http2 and not HTTP2_SUPPORT:
+            print("Note: Install h2 (pip install httpx[http2]) for HTTP/2 support, using HTTP/1.1")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2 and HTTP2_SUPPORT
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._http_client = None
+        self._async_http_client = None
+        self._clients = {}
+        self._lock = threading.Lock()
+        
+    @property
+    def http_client(self) -> httpx.Client:
+        """Pooled sync HTTP client"""
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(limits=self.limits, http2=self.http2,
+                                                 timeout=self.timeout, follow_redirects=True)
+            return self._http_client
+    
+    @property
+    def async_http_client(self) -> httpx.AsyncClient:
+        """Pooled async HTTP client"""
+        with self._lock:
+            if self._async_http_client is None:
+                self._async_http_client = httpx.AsyncClient(limits=self.limits, http2=self.http2,
+                                                            timeout=self.timeout, follow_redirects=True)
+            return self._async_http_client
+        
+    def client(self, api_url: str = None, api_key: str = None) -> OpenAI:
+        """Get the shared OpenAI client for an API URL and key"""
+        api_url = str(api_url or DEFAULT_API_URL)
+        api_key = api_key or DEFAULT_API_KEY
+        http_client = self.http_client
+        with self._lock:
+            key = ("sync", api_url, api_key)
+            if key not in self._clients:
+                self._clients[key] = OpenAI(base_url=api_url, api_key=api_key, http_client=http_client)
+            return self._clients[key]
+    
+    def async_client(self, api_url: str = None, api_key: str = None) -> AsyncOpenAI:
+        """Get the shared AsyncOpenAI client for an API URL and key"""
+        api_url = str(api_url or DEFAULT_API_URL)
+        api_key = api_key or DEFAULT_API_KEY
+        http_client = self.async_http_client
+        with self._lock:
+            key = ("async", api_url, api_key)
+            if key not in self._clients:
+                self._clients[key] = AsyncOpenAI(base_url=api_url, api_key=api_key, http_client=http_client)
+            return self._clients[key]
+        
+    def close(self):
+        """Close the sync pool (the async pool is closed with its event loop)"""
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+            self._clients = {key: client for key, client in self._clients.items() if key[0] == "async"}
+
+
+_DEFAULT_TRANSPORT = None
+_DEFAULT_TRANSPORT_LOCK = threading.Lock()
+
+
+def get_default_transport() -> HTTPTransport:
+    """Get the process-wide transport, creating it with default limits on first use"""
+    global _DEFAULT_TRANSPORT
+    with _DEFAULT_TRANSPORT_LOCK:
+        if _DEFAULT_TRANSPORT is None:
+            _DEFAULT_TRANSPORT = HTTPTransport()
+        return _DEFAULT_TRANSPORT
+
+
+def set_default_transport(transport: HTTPTransport):
+    """Replace the process-wide transport (e.g. with tuned pool limits)"""
+    global _DEFAULT_TRANSPORT
+    with _DEFAULT_TRANSPORT_LOCK:
+        _DEFAULT_TRANSPORT = transport
+
+
+def configure_api(api_url: str = None, api_key: str = None, transport: HTTPTransport = None) -> OpenAI:
     """
     Configure and return an OpenAI client with custom settings.
     
     Args:
         api_url: Custom API base URL (defaults to SiliconFlow)
         api_key: API key for authentication
+        transport: HTTPTransport whose connection pool the client uses
+            (defaults to the process-wide transport)
         
     Returns:
         Configured OpenAI client
     """
-    return OpenAI(
-        base_url=api_url or DEFAULT_API_URL,
-        api_key=api_key or DEFAULT_API_KEY
-    )
+    return (transport or get_default_transport()).client(api_url, api_key)
+
+
+def configure_async_api(api_url: str = None, api_key: str = None,
+                        transport: HTTPTransport = None) -> AsyncOpenAI:
+    """
+    Configure and return an AsyncOpenAI client with custom settings.
+    
+    Args:
+        api_url: Custom API base URL (defaults to SiliconFlow)
+        api_key: API key for authentication
+        transport: HTTPTransport whose connection pool the client uses
+            (defaults to the process-wide transport)
+        
+    Returns:
+        Configured AsyncOpenAI client
+    """
+    return (transport or get_default_transport()).async_client(api_url, api_key)
+
+
+class _EventLoopThread:
+    """
+    Background event loop shared by every synchronous ResearchAssistant.
+    
+    Running all sessions on one loop lets their agent calls overlap instead of
+    each pinning the calling thread for the whole pipeline.
+    """
+    
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Return the shared loop, starting its thread on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever,
+                                                name="ReaderAI-loop", daemon=True)
+                self._thread.start()
+        return self._loop
+        
+    def run(self, coro: Awaitable):
+        """Run a coroutine on the shared loop and block until it finishes"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Synchronous ResearchAssistant calls cannot be made from the "
+                               "ReaderAI event loop; use AsyncResearchAssistant instead")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+
+_LOOP_THREAD = _EventLoopThread()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for chat completion replies.
+    
+    Replies are keyed by a hash of the (model, messages, response format)
+    request. A bounded in-memory LRU tier sits in front of a SQLite file that
+    persists across sessions and runs. Entries expire after `ttl` seconds and
+    the least recently used ones are evicted once a tier is full. SQLite runs
+    on the cache's own thread: agents await lookups with aget and writes are
+    queued, so a commit never stalls the shared event loop.
+    
+    Attributes:
+        memory_hits: Lookups answered from the in-memory tier
+        disk_hits: Lookups answered from the SQLite tier
+        misses: Lookups that had to go to the API
+    """
+    
+    def __init__(self, path: Optional[str] = None, max_memory_entries: int = 256,
+                 max_disk_entries: int = 10000, ttl: Optional[float] = None):
+        """
+        Args:
+            path: SQLite file for the persistent tier (None keeps the cache in memory only)
+            max_memory_entries: Capacity of the in-memory LRU tier
+            max_disk_entries: Capacity of the SQLite tier
+            ttl: Seconds before an entry expires (None never expires)
+        """
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (created, value)
+        self._lock = threading.Lock()
+        self._db = None
+        self._disk_count = 0
+        # All SQLite work runs on this one thread, so queries and commits never block an event loop
+        self._disk: Optional[ThreadPoolExecutor] = None
+        
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+            self._db.commit()
+            self._disk_count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            self._disk = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ResponseCache")
+            
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], response_format: Optional[Dict] = None) -> str:
+        """Hash a request into a cache key"""
+        payload = json.dumps({"model": model, "messages": messages, "response_format": response_format},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached reply for a key, or None on a miss (waits for the SQLite tier)"""
+        found, value = self._memory_get(key)
+        if found or self._disk is None:
+            return value
+        return self._disk.submit(self._disk_get, key).result()
+    
+    async def aget(self, key: str) -> Optional[str]:
+        """Like get, but awaits the SQLite tier instead of blocking the event loop"""
+        found, value = self._memory_get(key)
+        if found or self._disk is None:
+            return value
+        return await asyncio.wrap_future(self._disk.submit(self._disk_get, key))
+        
+    def put(self, key: str, value: str):
+        """Store a reply in both tiers; the SQLite write is queued and does not wait"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+        if self._disk is not None:
+            self._disk.submit(self._disk_put, key, value, now)
+            
+    def _memory_get(self, key: str) -> Tuple[bool, Optional[str]]:
+        """(True, reply) on an in-memory hit; a miss is counted here when there is no SQLite tier"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return True, entry[1]
+                del self._entries[key]
+            if self._disk is None:
+                self.misses += 1
+        return False, None
+    
+    def _disk_get(self, key: str) -> Optional[str]:
+        """SQLite lookup (on the cache's thread); a failed lookup counts as a miss"""
+        now = time.time()
+        value = None
+        try:
+            row = self._db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                if not self._expired(row[1], now):
+                    self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                    value, created = row
+                else:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._disk_count -= 1
+                self._db.commit()
+        except sqlite3.Error as e:
+            # A locked or damaged cache file must not fail the call: go to the API instead
+            print(f"[Cache] Could not read reply: {type(e).__name__}: {e}")
+            
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self._remember(key, created, value)
+                self.disk_hits += 1
+        return value
+    
+    def _disk_put(self, key: str, value: str, now: float):
+        """SQLite insert and eviction (on the cache's thread)"""
+        try:
+            existed = self._db.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO responses (key, value, created, last_access) "
+                             "VALUES (?, ?, ?, ?)", (key, value, now, now))
+            if not existed:
+                self._disk_count += 1
+            if self._disk_count > self.max_disk_entries:
+                overflow = self._disk_count - self.max_disk_entries
+                self._db.execute("DELETE FROM responses WHERE key IN "
+                                 "(SELECT key FROM responses ORDER BY last_access LIMIT ?)", (overflow,))
+                self._disk_count -= overflow
+            self._db.commit()
+        except sqlite3.Error as e:
+            # Nobody waits on the write, so report it here; the reply stays in the memory tier
+            print(f"[Cache] Could not store reply: {type(e).__name__}: {e}")
+                
+    def _remember(self, key: str, created: float, value: str):
+        """Insert into the in-memory LRU tier, evicting the oldest entries when full"""
+        self._entries[key] = (created, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_memory_entries:
+            self._entries.popitem(last=False)
+            
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+        if self._disk is not None:
+            self._disk.submit(self._disk_clear).result()
+            
+    def _disk_clear(self):
+        self._db.execute("DELETE FROM responses")
+        self._db.commit()
+        self._disk_count = 0
+                
+    def get_stats(self) -> Dict:
+        """Get hit/miss counters and tier sizes"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._entries),
+                "disk_entries": self._disk_count
+            }
+        
+    def close(self):
+        """Finish the queued writes and close the SQLite connection"""
+        disk, self._disk = self._disk, None
+        if disk is not None:
+            disk.shutdown(wait=True)
+            self._db.close()
+            self._db = None
 
 
 class ReadingMetrics:
     """
     Tracks reading behavior metrics and intervention effectiveness.
     
+    Aggregates are maintained incrementally, so every update is O(1) and
+    get_reading_summary returns a cached snapshot that is only rebuilt after
+    something changed. Updates come from browser worker threads as well as
+    the pipeline's event loop, so they all run under one lock.
+    
     Attributes:
         sections_completed: List of completed section names
         current_section: Currently active section
         time_per_section: Time spent on each section in seconds
         concepts_struggled_with: List of concepts user struggled with
         intervention_effectiveness: List of intervention outcomes
+        reading_speed_by_section: Exponentially weighted moving average of
+            reading speed (px/s) per section
     """
     
-    def __init__(self):
+    def __init__(self, speed_smoothing: float = 0.3):
+        """
+        Args:
+            speed_smoothing: EWMA weight of the newest reading speed sample
+        """
         self.sections_completed = []
         self.current_section = None
         self.section_start_times = {}
         self.time_per_section = {}
         self.intervention_effectiveness = []
-        self.concepts_struggled_with = []
-        self.reading_speed_history = []
+        self.reading_speed_by_section = {}
+        self.speed_smoothing = speed_smoothing
+        self._concepts = {}  # insertion-ordered set
+        # Welford running aggregates over time_per_section values
+        self._section_count = 0
+        self._total_time = 0.0
+        self._mean_time = 0.0
+        self._m2_time = 0.0
+        self._summary = None
+        self._lock = threading.RLock()
+        
+    @property
+    def concepts_struggled_with(self) -> List[str]:
+        return list(self._concepts)
         
     def start_section(self, section_name: str):
         """Mark the start of a new section"""
-        if self.current_section:
-            self.complete_section(self.current_section)
-        self.current_section = section_name
-        self.section_start_times[section_name] = time.time()
+        with self._lock:
+            if self.current_section:
+                self.complete_section(self.current_section)
+            self.current_section = section_name
+            self.section_start_times[section_name] = time.time()
+            self._summary = None
         
     def complete_section(self, section_name: str):
         """Mark the completion of a section"""
-        if section_name in self.section_start_times:
-            duration = time.time() - self.section_start_times[section_name]
-            self.time_per_section[section_name] = duration
-            self.sections_completed.append(section_name)
+        with self._lock:
+            if section_name in self.section_start_times:
+                duration = time.time() - self.section_start_times[section_name]
+                previous = self.time_per_section.get(section_name)
+                if previous is not None:
+                    self._remove_section_time(previous)
+                self.time_per_section[section_name] = duration
+                self._add_section_time(duration)
+                self.sections_completed.append(section_name)
+                self._summary = None
+            
+    def _add_section_time(self, duration: float):
+        self._section_count += 1
+        self._total_time += duration
+        delta = duration - self._mean_time
+        self._mean_time += delta / self._section_count
+        self._m2_time += delta * (duration - self._mean_time)
+        
+    def _remove_section_time(self, duration: float):
+        self._section_count -= 1
+        self._total_time -= duration
+        if self._section_count == 0:
+            self._mean_time = 0.0
+            self._m2_time = 0.0
+            return
+        delta = duration - self._mean_time
+        self._mean_time -= delta / self._section_count
+        self._m2_time = max(0.0, self._m2_time - delta * (duration - self._mean_time))
             
     def record_intervention_outcome(self, intervention_type: str, 
                                    accepted: bool, 
@@ -97,36 +522,199 @@ class ReadingMetrics:
             "engagement_delta": user_state_after.get("engagement_level", 0) - 
                                user_state_before.get("engagement_level", 0)
         }
-        self.intervention_effectiveness.append(effectiveness)
+        with self._lock:
+            self.intervention_effectiveness.append(effectiveness)
         
     def add_struggled_concept(self, concept: str):
         """Record concepts the user struggled with"""
-        if concept not in self.concepts_struggled_with:
-            self.concepts_struggled_with.append(concept)
+        with self._lock:
+            if concept not in self._concepts:
+                self._concepts[concept] = None
+                self._summary = None
+            
+    def record_reading_speed(self, speed: float, section_name: str = None):
+        """Fold a reading speed sample (px/s) into the section's moving average"""
+        with self._lock:
+            section_name = section_name or self.current_section
+            if section_name is None:
+                return
+            previous = self.reading_speed_by_section.get(section_name)
+            if previous is None:
+                self.reading_speed_by_section[section_name] = speed
+            else:
+                self.reading_speed_by_section[section_name] = (
+                    self.speed_smoothing * speed + (1 - self.speed_smoothing) * previous)
+            
+    def get_section_time_stats(self) -> Dict:
+        """Get count, total, mean and variance of the time spent per section"""
+        with self._lock:
+            return {
+                "count": self._section_count,
+                "total": self._total_time,
+                "mean": self._mean_time,
+                "variance": self._m2_time / self._section_count if self._section_count else 0.0
+            }
             
     def get_reading_summary(self) -> Dict:
-        """Get a summary of reading metrics"""
-        total_time = sum(self.time_per_section.values()) if self.time_per_section else 0
-        avg_time_per_section = total_time / len(self.time_per_section) if self.time_per_section else 0
+        """Get a summary of reading metrics (a cached snapshot; treat as read-only)"""
+        with self._lock:
+            if self._summary is None:
+                self._summary = {
+                    "sections_completed": len(self.sections_completed),
+                    "total_reading_time": self._total_time,
+                    "average_time_per_section": self._mean_time,
+                    "concepts_struggled": list(self._concepts),
+                    "current_section": self.current_section
+                }
+            return self._summary
+
+
+class MemoryRecord:
+    """A timestamped memory entry (observation or intervention)"""
+    
+    __slots__ = ('timestamp', 'content')
+    
+    def __init__(self, timestamp: float, content):
+        self.timestamp = timestamp
+        self.content = content
         
+    def to_dict(self, field: str) -> Dict:
+        """Export in the session format: ISO timestamp plus the content under `field`"""
         return {
-            "sections_completed": len(self.sections_completed),
-            "total_reading_time": total_time,
-            "average_time_per_section": avg_time_per_section,
-            "concepts_struggled": self.concepts_struggled_with,
-            "current_section": self.current_section
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat(),
+            field: self.content
         }
 
 
+class RecordLog:
+    """
+    Fixed-capacity ring buffer of MemoryRecords that spills to disk.
+    
+    The newest `capacity` records stay in memory. Older ones are appended to
+    a JSON-lines spill file in small batches, so the full history can still
+    be exported while the in-memory footprint stays flat. Unless a spill_path
+    is given, the file is only created on the first spill and deleted by
+    close().
+    """
+    
+    def __init__(self, field: str, capacity: int = 64, spill_path: Optional[str] = None,
+                 spill_batch: int = 16, spill_dir: Optional[str] = None):
+        """
+        Args:
+            field: Key used for the content when records are exported
+            capacity: Number of records kept in memory
+            spill_path: Append-only file for evicted records, kept after
+                close (if None, a file of this log's own is created on first spill)
+            spill_batch: Evicted records buffered before each write
+            spill_dir: Directory for the log's own spill file (the system's
+                temporary directory if None)
+        """
+        self.field = field
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self.spill_dir = spill_dir
+        self.spill_batch = spill_batch
+        self.spilled = 0
+        self._records = deque(maxlen=capacity)
+        self._pending = []
+        self._remove_spill_file = None  # Set once this log creates a temporary spill file
+        self._lock = threading.Lock()
+        
+    def append(self, content, timestamp: float = None):
+        """Add a record, spilling the oldest one when the buffer is full"""
+        record = MemoryRecord(time.time() if timestamp is None else timestamp, content)
+        with self._lock:
+            if len(self._records) == self.capacity:
+                self._pending.append(self._records.popleft())
+                if len(self._pending) >= self.spill_batch:
+                    self._flush()
+            self._records.append(record)
+            
+    def recent(self, n: int) -> List[MemoryRecord]:
+        """Get the n most recent records, oldest first"""
+        with self._lock:
+            count = min(n, len(self._records))
+            return [self._records[i] for i in range(len(self._records) - count, len(self._records))]
+        
+    def last(self) -> Optional[MemoryRecord]:
+        """Get the most recent record"""
+        with self._lock:
+            return self._records[-1] if self._records else None
+        
+    def __len__(self) -> int:
+        with self._lock:
+            return self.spilled + len(self._pending) + len(self._records)
+    
+    def to_list(self) -> List[Dict]:
+        """Export the full history, spilled records included, oldest first"""
+        with self._lock:
+            self._flush()
+            history = []
+            if self.spilled:
+                with open(self.spill_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        timestamp, content = json.loads(line)
+                        history.append(MemoryRecord(timestamp, content).to_dict(self.field))
+            history.extend(record.to_dict(self.field) for record in self._records)
+            return history
+        
+    def _flush(self):
+        """Append pending evicted records to the spill file"""
+        if not self._pending:
+            return
+        if self.spill_path is None:
+            if self.spill_dir:
+                os.makedirs(self.spill_dir, exist_ok=True)
+            fd, self.spill_path = tempfile.mkstemp(prefix=f"readerai-{self.field}-", suffix=".jsonl",
+                                                   dir=self.spill_dir)
+            os.close(fd)
+            # Removed by close(), or when the log is garbage collected or the interpreter exits
+            self._remove_spill_file = weakref.finalize(self, _remove_file, self.spill_path)
+        with open(self.spill_path, 'a', encoding='utf-8') as f:
+            for record in self._pending:
+                f.write(json.dumps([record.timestamp, record.content]) + "\n")
+        self.spilled += len(self._pending)
+        self._pending = []
+        
+    def close(self):
+        """Release the spill file if this log created it, dropping the spilled records"""
+        with self._lock:
+            self._pending = []
+            if self._remove_spill_file is not None:
+                self._remove_spill_file()
+                self._remove_spill_file = None
+                self.spill_path = None
+                self.spilled = 0
+
+
+def _remove_file(path: str):
+    """Delete a file if it still exists"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
 class Memory:
     """
     Manages the system's memory and state.
     
     Tracks observations, user state, intervention history, and paper context.
+    Observations and interventions are kept in bounded RecordLogs, so memory
+    use per session stays flat however long the session runs.
     """
     
-    def __init__(self):
-        self.observations = []
+    def __init__(self, observation_capacity: int = 64, intervention_capacity: int = 32,
+                 spill_dir: Optional[str] = None):
+        """
+        Args:
+            observation_capacity: Observations kept in memory
+            intervention_capacity: Interventions kept in memory
+            spill_dir: Directory for the spill files of older entries (the
+                system's temporary directory if None); files are only
+                created once something spills and are deleted by close()
+        """
+        self.observations = RecordLog("content", observation_capacity, spill_dir=spill_dir)
         self.user_state = {
             "mood": "neutral",
             "confusion_level": 0.0,
@@ -135,7 +723,7 @@ class Memory:
             "interests": [],
             "current_topic": None
         }
-        self.intervention_history = []
+        self.intervention_history = RecordLog("intervention", intervention_capacity, spill_dir=spill_dir)
         self.last_intervention_time = None
         self.reading_metrics = ReadingMetrics()
         self.paper_context = {
@@ -146,22 +734,16 @@ class Memory:
         
     def add_observation(self, observation: str):
         """Add a new observation with timestamp"""
-        self.observations.append({
-            "timestamp": datetime.now().isoformat(),
-            "content": observation
-        })
+        self.observations.append(observation)
         
     def add_intervention(self, intervention: Dict):
         """Record an intervention that was made"""
-        self.intervention_history.append({
-            "timestamp": datetime.now().isoformat(),
-            "intervention": intervention
-        })
-        self.last_intervention_time = time.time()
+        self.intervention_history.append(intervention)
+        self.last_intervention_time = self.intervention_history.last().timestamp
         
     def get_recent_observations(self, n: int = 5) -> List[Dict]:
         """Get the n most recent observations"""
-        return self.observations[-n:]
+        return [record.to_dict("content") for record in self.observations.recent(n)]
         
     def time_since_last_intervention(self) -> float:
         """Calculate seconds since last intervention"""
@@ -178,34 +760,123 @@ class Memory:
             if section not in self.paper_context["sections_seen"]:
                 self.paper_context["sections_seen"].append(section)
                 self.reading_metrics.start_section(section)
+                
+    def close(self):
+        """Release temporary spill files"""
+        self.observations.close()
+        self.intervention_history.close()
 
 
-def extract_section_info(observation: str) -> Tuple[Optional[str], Optional[str]]:
+# Observation parsing patterns, compiled once at import.
+# Section patterns are listed in priority order: the first one that matches wins.
+_TITLE_PATTERN = re.compile(r'--TITLE--\s*(.+?)(?:\.|,|$)')
+_SECTION_MARKER_PATTERN = re.compile(r'--(\w+(?:\s+\w+)*?)--')
+_SECTION_MOVE_PATTERN = re.compile(r'moves? on to (?:the )?(?:next )?section[^\w\n]*(\w+)', re.IGNORECASE)
+_SECTION_READ_PATTERN = re.compile(r'(?:reads?|reading) (?:the )?(\w+) section', re.IGNORECASE)
+_SECTION_AT_PATTERN = re.compile(r'(?:in|at) (?:the )?(\w+) section', re.IGNORECASE)
+_PAUSED_WORD_PATTERN = re.compile(r"pauses at the word '(\w+)'")
+_REREAD_TARGET_PATTERN = re.compile(r'(?:sentence|paragraph) (?:about|containing|with) (\w+)')
+_QUESTION_PATTERN = re.compile(r'(?:writes?|types?) (?:down )?["\']?(.+?)["\']?(?:\?|!)')
+_QUESTION_TERM_PATTERN = re.compile(r'\b(?:what is|what are|why|how does?)\s+(\w+)', re.IGNORECASE)
+
+
+class ObservationFeatures(NamedTuple):
+    """Everything the local parser extracts from one observation string"""
+    title: Optional[str]
+    section: Optional[str]
+    paused_word: Optional[str]
+    reread_target: Optional[str]
+    question_terms: Tuple[str, ...]
+    
+    @property
+    def struggle_concepts(self) -> List[str]:
+        """Concepts the user appears to be struggling with, in detection order"""
+        concepts = []
+        if self.paused_word:
+            concepts.append(self.paused_word)
+        if self.reread_target:
+            concepts.append(self.reread_target)
+        concepts.extend(self.question_terms)
+        return concepts
+
+
+@lru_cache(maxsize=4096)
+def parse_observation(observation: str) -> ObservationFeatures:
     """
-    Extract paper title and section information from observation text.
+    Extract title, section and struggle cues from an observation in one call.
+    
+    Cheap substring checks decide which of the precompiled patterns can match
+    at all, so a typical observation runs only one or two regex scans.
+    Results are memoized because templated observations repeat often.
     
     Args:
         observation: Raw observation string
         
     Returns:
-        Tuple of (paper_title, section_name) - either can be None
+        ObservationFeatures for the observation
     """
-    title_match = re.search(r'--TITLE--\s*(.+?)(?:\.|,|$)', observation)
-    section_matches = [
-        re.search(r'--(\w+(?:\s+\w+)*?)--', observation),
-        re.search(r'moves? on to (?:the )?(?:next )?section.*?(?:--)?(\w+(?:\s+\w+)*?)(?:--)?', observation, re.IGNORECASE),
-        re.search(r'(?:reads?|reading) (?:the )?(\w+) section', observation, re.IGNORECASE),
-        re.search(r'(?:in|at) (?:the )?(\w+) section', observation, re.IGNORECASE)
-    ]
+    # Case-insensitive patterns are gated on lowercase literals. "ect" and
+    # "move" have no exotic case-folding equivalents, unlike "s" and "i".
+    lowered = observation.lower()
+    has_marker = '--' in observation
+    
+    title = None
+    if has_marker and '--TITLE--' in observation:
+        match = _TITLE_PATTERN.search(observation)
+        if match:
+            title = match.group(1).strip()
     
-    title = title_match.group(1).strip() if title_match else None
     section = None
-    for match in section_matches:
+    candidates = []
+    if has_marker:
+        candidates.append(_SECTION_MARKER_PATTERN)
+    if 'ect' in lowered:
+        if 'move' in lowered:
+            candidates.append(_SECTION_MOVE_PATTERN)
+        candidates.append(_SECTION_READ_PATTERN)
+        candidates.append(_SECTION_AT_PATTERN)
+    for pattern in candidates:
+        match = pattern.search(observation)
         if match:
             section = match.group(1).strip()
             break
-            
-    return title, section
+    
+    # Look for explicit struggle indicators
+    paused_word = None
+    if "pauses at the word" in observation:
+        match = _PAUSED_WORD_PATTERN.search(observation)
+        if match:
+            paused_word = match.group(1)
+    
+    # Look for re-reading patterns
+    reread_target = None
+    if "re-read" in observation:
+        match = _REREAD_TARGET_PATTERN.search(observation)
+        if match:
+            reread_target = match.group(1)
+    
+    # Look for written questions
+    question_terms = ()
+    if ('write' in observation or 'type' in observation) and ('?' in observation or '!' in observation):
+        match = _QUESTION_PATTERN.search(observation)
+        if match:
+            question_terms = tuple(_QUESTION_TERM_PATTERN.findall(match.group(1)))
+    
+    return ObservationFeatures(title, section, paused_word, reread_target, question_terms)
+
+
+def extract_section_info(observation: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Extract paper title and section information from observation text.
+    
+    Args:
+        observation: Raw observation string
+        
+    Returns:
+        Tuple of (paper_title, section_name) - either can be None
+    """
+    features = parse_observation(observation)
+    return features.title, features.section
 
 
 def detect_struggle_concepts(observation: str) -> List[str]:
@@ -218,41 +889,498 @@ def detect_struggle_concepts(observation: str) -> List[str]:
     Returns:
         List of concept names the user appears to be struggling with
     """
-    concepts = []
+    return parse_observation(observation).struggle_concepts
+
+
+class JSONFieldStreamReader:
+    """
+    Incrementally extracts the value of one string field from streamed JSON.
     
-    # Look for explicit struggle indicators
-    if "pauses at the word" in observation:
-        match = re.search(r"pauses at the word '(\w+)'", observation)
-        if match:
-            concepts.append(match.group(1))
-            
-    # Look for re-reading patterns
-    if "re-reads" in observation or "re-read" in observation:
-        # Try to extract what they're re-reading
-        sentence_match = re.search(r'(?:sentence|paragraph) (?:about|containing|with) (\w+)', observation)
-        if sentence_match:
-            concepts.append(sentence_match.group(1))
+    Fed the raw chunks of a JSON object as they arrive, it returns the newly
+    decoded characters of the first `"<field>": "..."` string value, so the
+    text can be shown before the object is complete.
+    """
+    
+    _ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+    
+    def __init__(self, field: str):
+        self.field = field
+        self.done = False
+        self._in_string = False
+        self._capturing = False
+        self._escape = None       # pending escape sequence (without the backslash)
+        self._token = []          # characters of the current non-captured string
+        self._last_string = None  # last completed string, a candidate key
+        self._armed = False       # saw "<field>": and wait for the value
+        
+    def feed(self, chunk: str) -> str:
+        """Consume a chunk and return newly decoded characters of the field value"""
+        out = []
+        for char in chunk:
+            if self.done:
+                break
+            if self._in_string:
+                if self._escape is not None:
+                    self._escape += char
+                    if self._escape[0] == 'u':
+                        if len(self._escape) < 5:
+                            continue
+                        decoded = chr(int(self._escape[1:], 16))
+                    else:
+                        decoded = self._ESCAPES.get(self._escape, self._escape)
+                    self._escape = None
+                    (out if self._capturing else self._token).append(decoded)
+                elif char == '\\':
+                    self._escape = ''
+                elif char == '"':
+                    self._in_string = False
+                    if self._capturing:
+                        self.done = True
+                    else:
+                        self._last_string = ''.join(self._token)
+                        self._token = []
+                else:
+                    (out if self._capturing else self._token).append(char)
+            elif char.isspace():
+                continue
+            elif char == ':':
+                self._armed = self._last_string == self.field
+                self._last_string = None
+            elif char == '"':
+                self._in_string = True
+                self._capturing = self._armed
+                self._armed = False
+            else:
+                self._armed = False
+                self._last_string = None
+        return ''.join(out)
+
+
+class LatencyTracker:
+    """
+    Moving window of recent call latencies with percentile lookups.
+    """
+    
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        
+    def record(self, seconds: float):
+        """Record one observed latency"""
+        self._samples.append(seconds)
+        
+    def __len__(self) -> int:
+        return len(self._samples)
+    
+    def percentile(self, p: float) -> Optional[float]:
+        """Latency at the p-th percentile of the window, or None without samples"""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class HedgingPolicy:
+    """
+    Decides when an agent sends a duplicate (hedged) request.
+    
+    Once the first attempt has been outstanding longer than the agent's
+    p-th percentile latency, a second identical request is fired; whichever
+    answers first is used and the other is cancelled.
+    """
+    
+    def __init__(self, percentile: float = 90.0, min_samples: int = 20, min_delay: float = 0.25):
+        """
+        Args:
+            percentile: Latency percentile after which to hedge
+            min_samples: Observed calls needed before hedging starts
+            min_delay: Lower bound on the hedge delay in seconds
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        
+    def delay(self, tracker: LatencyTracker) -> Optional[float]:
+        """Seconds to wait before hedging, or None when there is too little history"""
+        if len(tracker) < self.min_samples:
+            return None
+        return max(self.min_delay, tracker.percentile(self.percentile))
+
+
+class LatencyBudget:
+    """
+    End-to-end latency budget for one observation, split across stages.
+    
+    Each stage may use its weighted share of the time still left, so time a
+    fast stage does not use carries over to the stages after it. The default
+    stays under the 60s after which study_plugin.js aborts its request.
+    """
+    
+    DEFAULT_WEIGHTS = {"analyze": 1.0, "infer": 1.0, "plan": 1.0, "generate": 2.0, "fused": 1.0}
+    
+    def __init__(self, total: float = 45.0, weights: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            total: Seconds allowed for the whole pipeline
+            weights: Relative share of each stage (see DEFAULT_WEIGHTS)
+        """
+        self.total = total
+        self.weights = dict(self.DEFAULT_WEIGHTS)
+        if weights:
+            self.weights.update(weights)
             
-    # Look for written questions
-    question_match = re.search(r'(?:writes?|types?) (?:down )?["\']?(.+?)["\']?(?:\?|!)', observation)
-    if question_match:
-        question_text = question_match.group(1)
-        # Extract key terms from the question
-        key_terms = re.findall(r'\b(?:what is|what are|why|how does?)\s+(\w+)', question_text, re.IGNORECASE)
-        concepts.extend(key_terms)
+    def stage_timeout(self, stage: str, elapsed: float, remaining_stages: Iterable[str]) -> float:
+        """
+        Deadline in seconds for a stage.
+        
+        Args:
+            stage: Stage about to run
+            elapsed: Seconds of the budget already spent
+            remaining_stages: This stage and every stage still to come
+        """
+        remaining = max(0.0, self.total - elapsed)
+        total_weight = sum(self.weights.get(name, 1.0) for name in remaining_stages)
+        if total_weight <= 0:
+            return remaining
+        return remaining * self.weights.get(stage, 1.0) / total_weight
+
+
+class ModelRoute(NamedTuple):
+    """Primary model of an agent and the fallbacks tried when it is too slow"""
+    primary: str
+    fallbacks: Tuple[str, ...] = ()
+
+
+# Every agent on the default model with no fallbacks, so an unconfigured
+# router behaves like no routing at all; smaller models are opt-in via set_route
+DEFAULT_MODEL_ROUTES = {
+    "analyzer": ModelRoute(DEFAULT_MODEL),
+    "inferencer": ModelRoute(DEFAULT_MODEL),
+    "planner": ModelRoute(DEFAULT_MODEL),
+    "generator": ModelRoute(DEFAULT_MODEL),
+    "fused": ModelRoute(DEFAULT_MODEL),
+}
+
+
+class ModelRouter:
+    """
+    Routing table from agent name to a primary model and fallback models.
+    
+    Tracks each model's observed latency with a moving percentile. When the
+    primary's percentile latency would exceed the stage deadline, the first
+    fallback expected to fit is used instead (or the fastest one if none fits).
+    Every `probe_interval`-th call still goes to the primary so its latency
+    estimate recovers once it speeds up again.
+    """
+    
+    def __init__(self, routes: Optional[Dict[str, ModelRoute]] = None, percentile: float = 90.0,
+                 min_samples: int = 5, window: int = 200, probe_interval: int = 20):
+        """
+        Args:
+            routes: Routes by agent name, merged over DEFAULT_MODEL_ROUTES
+            percentile: Latency percentile compared against the stage deadline
+            min_samples: Observed calls needed before a model's latency is trusted
+            window: Number of recent calls per model kept for the percentile
+            probe_interval: Send every n-th call of a rerouted agent to its primary
+        """
+        self.routes: Dict[str, ModelRoute] = dict(DEFAULT_MODEL_ROUTES)
+        for agent_name, route in (routes or {}).items():
+            self.set_route(agent_name, *route)
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = window
+        self.probe_interval = probe_interval
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._reroutes: Dict[str, int] = {}
+        
+    def set_route(self, agent_name: str, primary: str, fallbacks: Iterable[str] = ()):
+        """Route an agent to a primary model with optional fallbacks"""
+        self.routes[agent_name] = ModelRoute(primary, tuple(fallbacks))
+        
+    def latency(self, model: str) -> LatencyTracker:
+        """Latency window of one model"""
+        tracker = self._latency.get(model)
+        if tracker is None:
+            tracker = self._latency[model] = LatencyTracker(self.window)
+        return tracker
+    
+    def record(self, model: str, seconds: float):
+        """Record one observed call latency for a model"""
+        self.latency(model).record(seconds)
+        
+    def expected_latency(self, model: str) -> Optional[float]:
+        """Percentile latency of a model, or None while it has too few samples"""
+        tracker = self.latency(model)
+        if len(tracker) < self.min_samples:
+            return None
+        return tracker.percentile(self.percentile)
+    
+    def select(self, agent_name: str, deadline: Optional[float] = None, default: str = DEFAULT_MODEL) -> str:
+        """
+        Pick the model for an agent call.
+        
+        Args:
+            agent_name: Agent making the call
+            deadline: Seconds the stage may take (None means no limit)
+            default: Model used when the agent has no route
+        """
+        route = self.routes.get(agent_name)
+        if route is None:
+            return default
+        expected = self.expected_latency(route.primary)
+        if deadline is None or not route.fallbacks or expected is None or expected <= deadline:
+            return route.primary
+        
+        count = self._reroutes.get(agent_name, 0) + 1
+        self._reroutes[agent_name] = count
+        if self.probe_interval and count % self.probe_interval == 0:
+            return route.primary
+        
+        best, best_latency = route.primary, expected
+        for model in route.fallbacks:
+            latency = self.expected_latency(model)
+            if latency is None or latency <= deadline:
+                return model
+            if latency < best_latency:
+                best, best_latency = model, latency
+        return best
+    
+    def get_stats(self) -> Dict[str, Dict]:
+        """Call count and percentile latency of every model seen so far"""
+        return {
+            model: {"calls": len(tracker), f"p{self.percentile:g}": tracker.percentile(self.percentile)}
+            for model, tracker in self._latency.items()
+        }
+
+
+# Agent and pipeline metrics, served by the browser at /api/metrics
+_METRICS = get_registry()
+_AGENT_SECONDS = _METRICS.histogram("readerai_agent_request_seconds",
+                                    "Time of agent chat completion calls, hedges included", ("agent", "model"))
+_AGENT_TOKENS = _METRICS.counter("readerai_agent_tokens_total",
+                                 "Tokens reported in response.usage", ("agent", "model", "kind"))
+_AGENT_ERRORS = _METRICS.counter("readerai_agent_errors_total", "Failed agent calls", ("agent", "model"))
+_AGENT_HEDGES = _METRICS.counter("readerai_agent_hedged_requests_total", "Duplicate requests sent by hedging",
+                                 ("agent",))
+_CACHE_LOOKUPS = _METRICS.counter("readerai_cache_lookups_total", "Response cache lookups", ("agent", "result"))
+_STAGE_SECONDS = _METRICS.histogram("readerai_stage_seconds", "Time of each pipeline stage", ("stage",))
+_STAGE_TIMEOUTS = _METRICS.counter("readerai_stage_timeouts_total", "Stages that missed their deadline",
+                                   ("stage",))
+_PIPELINE_RUNS = _METRICS.counter("readerai_pipeline_runs_total", "Pipeline runs by outcome", ("outcome",))
+
+
+class Agent:
+    """
+    Base class for the pipeline agents.
+    
+    Holds the async client and system prompt and performs the JSON chat
+    completion call that every agent makes. When a ResponseCache is attached
+    and `cache_enabled` is set, identical requests are answered from the cache.
+    With a HedgingPolicy set, slow requests are hedged with a duplicate, and
+    with a ModelRouter set the model is chosen per call against `deadline`.
+    """
+    
+    name = "agent"
+    model = DEFAULT_MODEL
+    system_prompt = ""
+    
+    def __init__(self, client: AsyncOpenAI, cache: ResponseCache = None):
+        self.client = client
+        self.cache = cache
+        self.cache_enabled = cache is not None
+        self.hedging: Optional[HedgingPolicy] = None
+        self.latency = LatencyTracker()
+        self.hedged_requests = 0
+        self.router: Optional[ModelRouter] = None
+        # Seconds the current stage may take, set by the orchestrator
+        self.deadline: Optional[float] = None
+        # Model used by the most recent call
+        self.last_model: Optional[str] = None
+        
+    def _select_model(self) -> str:
+        """Model for the next call, from the router when one is set"""
+        if self.router is None:
+            model = self.model
+        else:
+            model = self.router.select(self.name, self.deadline, self.model)
+        self.last_model = model
+        return model
+    
+    def _record_latency(self, model: str, seconds: float):
+        """Feed one call latency to the agent's and the model's windows"""
+        self.latency.record(seconds)
+        if self.router is not None:
+            self.router.record(model, seconds)
+        
+    async def _create(self, **kwargs):
+        """Send one chat completion request, hedged when the policy allows"""
+        if kwargs.get("stream"):
+            return await self.client.chat.completions.create(**kwargs)
+        
+        delay = None
+        if self.hedging is not None:
+            tracker = self.latency if self.router is None else self.router.latency(kwargs["model"])
+            delay = self.hedging.delay(tracker)
+        if delay is None:
+            return await self._attempt(kwargs)
+        return await self._hedged(lambda: self._attempt(kwargs), delay)
+    
+    async def _attempt(self, kwargs: Dict):
+        """
+        One request attempt. Only a completed attempt records its latency: a
+        cancelled one (hedging loser, superseded pipeline) was cut short, and
+        its time would pull the percentiles down.
+        """
+        start = time.perf_counter()
+        with get_tracer().span("llm_request", cat="llm", agent=self.name, model=kwargs["model"]):
+            response = await self.client.chat.completions.create(**kwargs)
+        self._record_latency(kwargs["model"], time.perf_counter() - start)
+        return response
+    
+    async def _hedged(self, make_request: Callable[[], Awaitable], delay: float):
+        """Run make_request, firing a duplicate after delay seconds; first success wins"""
+        attempts = [asyncio.ensure_future(make_request())]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done:
+                self.hedged_requests += 1
+                _AGENT_HEDGES.inc(agent=self.name)
+                attempts.append(asyncio.ensure_future(make_request()))
+                
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    
+            # Every attempt failed: surface the first error
+            return attempts[0].result()
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+        
+    async def _lookup_cache(self, cache_key: str) -> Optional[str]:
+        """Cached reply for a request, counted as a hit or miss"""
+        content = await self.cache.aget(cache_key)
+        _CACHE_LOOKUPS.inc(agent=self.name, result="miss" if content is None else "hit")
+        return content
+    
+    def _record_usage(self, model: str, usage):
+        """Count the tokens reported in a reply's usage block"""
+        if usage is None:
+            return
+        for kind in ("prompt", "completion"):
+            tokens = getattr(usage, f"{kind}_tokens", None)
+            if tokens:
+                _AGENT_TOKENS.inc(tokens, agent=self.name, model=model, kind=kind)
+        
+    async def _complete(self, user_prompt: str) -> Dict:
+        """Send the system and user prompt and decode the JSON reply"""
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        response_format = {'type': 'json_object'}
+        model = self._select_model()
+        
+        cache_key = None
+        if self.cache is not None and self.cache_enabled:
+            cache_key = ResponseCache.make_key(model, messages, response_format)
+            content = await self._lookup_cache(cache_key)
+            if content is not None:
+                return json.loads(content)
+        
+        start = time.perf_counter()
+        try:
+            response = await self._create(
+                model=model,
+                messages=messages,
+                response_format=response_format
+            )
+        except Exception:
+            _AGENT_ERRORS.inc(agent=self.name, model=model)
+            raise
+        _AGENT_SECONDS.observe(time.perf_counter() - start, agent=self.name, model=model)
+        self._record_usage(model, getattr(response, "usage", None))
+        
+        content = response.choices[0].message.content
+        result = json.loads(content)
+        if cache_key is not None:
+            self.cache.put(cache_key, content)
+        return result
+    
+    async def _stream_complete(self, user_prompt: str, field: str, on_delta: Callable[[str], None]) -> Dict:
+        """
+        Like _complete, but streams the reply and reports the text of one
+        string field through on_delta as soon as it is generated.
+        """
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        response_format = {'type': 'json_object'}
+        reader = JSONFieldStreamReader(field)
+        model = self._select_model()
         
-    return concepts
+        cache_key = None
+        if self.cache is not None and self.cache_enabled:
+            cache_key = ResponseCache.make_key(model, messages, response_format)
+            content = await self._lookup_cache(cache_key)
+            if content is not None:
+                text = reader.feed(content)
+                if text:
+                    on_delta(text)
+                return json.loads(content)
+        
+        start = time.perf_counter()
+        parts = []
+        try:
+            stream = await self._create(
+                model=model,
+                messages=messages,
+                response_format=response_format,
+                stream=True,
+                # Ask for a final usage chunk (passed through for older client versions)
+                extra_body={"stream_options": {"include_usage": True}}
+            )
+            
+            async for chunk in stream:
+                self._record_usage(model, getattr(chunk, "usage", None))
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content
+                if piece:
+                    parts.append(piece)
+                    text = reader.feed(piece)
+                    if text:
+                        on_delta(text)
+        except Exception:
+            _AGENT_ERRORS.inc(agent=self.name, model=model)
+            raise
+        elapsed = time.perf_counter() - start
+        self._record_latency(model, elapsed)
+        _AGENT_SECONDS.observe(elapsed, agent=self.name, model=model)
+                    
+        content = ''.join(parts)
+        result = json.loads(content)
+        if cache_key is not None:
+            self.cache.put(cache_key, content)
+        return result
 
 
-class ObservationAnalyzer:
+class ObservationAnalyzer(Agent):
     """
     Agent 1: Analyzes raw observations and extracts meaningful patterns.
     
     Identifies current content, reading patterns, user actions, and struggle concepts.
     """
     
-    def __init__(self, client: OpenAI):
-        self.client = client
+    name = "analyzer"
+    
+    def __init__(self, client: AsyncOpenAI, cache: ResponseCache = None):
+        super().__init__(client, cache)
         self.system_prompt = """You are an observation analyzer for a research paper reading assistant.
 Your job is to analyze user behavior observations and extract meaningful patterns.
 
@@ -284,22 +1412,12 @@ Output a SINGLE JSON object (not a list) with these fields:
 
 Focus on the MOST RECENT observation for current state, but use previous observations for context."""
 
-    def analyze(self, observations: List[str]) -> Dict:
+    @traced(cat="agent")
+    async def analyze(self, observations: List[str]) -> Dict:
         """Analyze observations and return structured data"""
         user_prompt = f"Analyze these observations (most recent is last):\n" + "\n".join(observations)
         
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
-        
-        response = self.client.chat.completions.create(
-            model="deepseek-ai/DeepSeek-V3",
-            messages=messages,
-            response_format={'type': 'json_object'}
-        )
-        
-        result = json.loads(response.choices[0].message.content)
+        result = await self._complete(user_prompt)
         
         # Safety check: if somehow we still get a list, take the last element
         if isinstance(result, list):
@@ -308,15 +1426,17 @@ Focus on the MOST RECENT observation for current state, but use previous observa
         return result
 
 
-class UserStateInferencer:
+class UserStateInferencer(Agent):
     """
     Agent 2: Infers user's cognitive and emotional state.
     
     Determines mood, confusion level, engagement, and cognitive load.
     """
     
-    def __init__(self, client: OpenAI):
-        self.client = client
+    name = "inferencer"
+    
+    def __init__(self, client: AsyncOpenAI, cache: ResponseCache = None):
+        super().__init__(client, cache)
         self.system_prompt = """You are a user state inference expert for a research assistant.
 Your job is to infer the user's current cognitive and emotional state based on their reading behavior.
 
@@ -342,25 +1462,15 @@ Output a SINGLE JSON object (not a list) with these fields:
     "at_natural_break": true/false
 }"""
 
-    def infer(self, analyzed_observations: Dict, previous_state: Dict) -> Dict:
+    @traced(cat="agent")
+    async def infer(self, analyzed_observations: Dict, previous_state: Dict) -> Dict:
         """Infer user state from observations"""
         user_prompt = f"""Current observations: {json.dumps(analyzed_observations)}
 Previous user state: {json.dumps(previous_state)}
 
 Infer the user's current state."""
         
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
-        
-        response = self.client.chat.completions.create(
-            model="deepseek-ai/DeepSeek-V3",
-            messages=messages,
-            response_format={'type': 'json_object'}
-        )
-        
-        result = json.loads(response.choices[0].message.content)
+        result = await self._complete(user_prompt)
         
         # Safety check
         if isinstance(result, list):
@@ -369,15 +1479,17 @@ Infer the user's current state."""
         return result
 
 
-class InterventionPlanner:
+class InterventionPlanner(Agent):
     """
     Agent 3: Decides whether and how to intervene.
     
     Considers user state, timing, and context to plan appropriate interventions.
     """
     
-    def __init__(self, client: OpenAI):
-        self.client = client
+    name = "planner"
+    
+    def __init__(self, client: AsyncOpenAI, cache: ResponseCache = None):
+        super().__init__(client, cache)
         self.system_prompt = """You are an intervention planning expert for a research assistant.
 Your job is to decide whether to intervene and what type of help to offer.
 
@@ -409,7 +1521,8 @@ Output a SINGLE JSON object (not a list) with these fields:
     "respect_reading_flow": true/false
 }"""
 
-    def plan(self, user_state: Dict, analyzed_obs: Dict, time_since_last: float, reading_metrics: Dict) -> Dict:
+    @traced(cat="agent")
+    async def plan(self, user_state: Dict, analyzed_obs: Dict, time_since_last: float, reading_metrics: Dict) -> Dict:
         """Plan intervention based on current state"""
         user_prompt = f"""User state: {json.dumps(user_state)}
 Current observations: {json.dumps(analyzed_obs)}
@@ -418,18 +1531,7 @@ Reading metrics: {json.dumps(reading_metrics)}
 
 Decide on intervention."""
         
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
-        
-        response = self.client.chat.completions.create(
-            model="deepseek-ai/DeepSeek-V3",
-            messages=messages,
-            response_format={'type': 'json_object'}
-        )
-        
-        result = json.loads(response.choices[0].message.content)
+        result = await self._complete(user_prompt)
         
         # Safety check
         if isinstance(result, list):
@@ -438,15 +1540,17 @@ Decide on intervention."""
         return result
 
 
-class ResponseGenerator:
+class ResponseGenerator(Agent):
     """
     Agent 4: Generates the actual response to the user.
     
     Creates contextual, helpful responses based on intervention plans.
     """
     
-    def __init__(self, client: OpenAI):
-        self.client = client
+    name = "generator"
+    
+    def __init__(self, client: AsyncOpenAI, cache: ResponseCache = None):
+        super().__init__(client, cache)
         self.system_prompt = """You are a helpful research assistant that generates responses for students.
 Your responses should be:
 - Concise and clear
@@ -465,8 +1569,15 @@ Output a SINGLE JSON object (not a list) with these fields:
     "display_type": "popup/sidebar/inline"
 }"""
 
-    def generate(self, intervention_plan: Dict, user_state: Dict, context: Dict) -> Dict:
-        """Generate response based on intervention plan"""
+    @traced(cat="agent")
+    async def generate(self, intervention_plan: Dict, user_state: Dict, context: Dict,
+                       on_delta: Callable[[str], None] = None) -> Dict:
+        """
+        Generate response based on intervention plan.
+        
+        If on_delta is given, the reply is streamed and each new piece of the
+        response text is passed to it as it arrives.
+        """
         if not intervention_plan.get("should_intervene", False):
             return {"response": None, "display_type": None}
             
@@ -476,18 +1587,10 @@ Context: {json.dumps(context)}
 
 Generate an appropriate response."""
         
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
-        
-        response = self.client.chat.completions.create(
-            model="deepseek-ai/DeepSeek-V3",
-            messages=messages,
-            response_format={'type': 'json_object'}
-        )
-        
-        result = json.loads(response.choices[0].message.content)
+        if on_delta is not None:
+            result = await self._stream_complete(user_prompt, "response", on_delta)
+        else:
+            result = await self._complete(user_prompt)
         
         # Safety check: if somehow we still get a list, handle it
         if isinstance(result, list):
@@ -499,92 +1602,414 @@ Generate an appropriate response."""
         return result
 
 
-class ResearchAssistant:
+class FusedPipelineAgent(Agent):
+    """
+    Single-call agent that performs all four pipeline stages at once.
+    
+    Produces the observation analysis, user state, intervention plan and
+    response in one structured JSON reply instead of four round trips.
     """
-    Main orchestrator that coordinates all agents to provide intelligent reading assistance.
+    
+    name = "fused"
+    
+    def __init__(self, client: AsyncOpenAI, cache: ResponseCache = None):
+        super().__init__(client, cache)
+        self.system_prompt = """You are a research paper reading assistant that observes a student's reading behavior.
+In a single step you must analyze the observations, infer the user's state, decide whether to intervene,
+and write the response to the user.
+
+1. Analysis - focus on the MOST RECENT observation, using previous ones for context:
+   current content, section name, paper title, reading patterns (pausing, re-reading, speed,
+   confusion indicators, section transitions), explicit user actions and struggle concepts.
+2. User state - mood, confusion level (0.0 to 1.0), engagement level (0.0 to 1.0), cognitive load,
+   likely knowledge gaps and whether the user is at a natural break point.
+   Natural pauses at section boundaries are different from confusion pauses.
+3. Intervention plan - one of: concept_explanation, section_summary, encouragement, break_suggestion,
+   related_resources, section_transition, none. Avoid being annoying when the last intervention was
+   recent and prefer intervening at natural break points like section transitions.
+4. Response - only when intervening: concise, supportive, academically accurate, sensitive to the
+   user's mood and under 3 sentences unless explaining a complex concept. Reference the specific
+   paper/section when applicable.
+
+Output a SINGLE JSON object (not a list) with these fields:
+{
+    "analysis": {
+        "current_content": "what user is currently reading",
+        "section_name": "current section name if identifiable",
+        "paper_title": "paper title if mentioned",
+        "reading_patterns": {
+            "is_pausing": true/false,
+            "is_rereading": true/false,
+            "reading_speed": "fast/normal/slow",
+            "confusion_indicators": ["list of indicators"],
+            "section_transition": true/false
+        },
+        "user_actions": ["any explicit actions"],
+        "time_on_section": "estimated time",
+        "struggle_concepts": ["concepts user seems confused about"]
+    },
+    "user_state": {
+        "mood": "emotional state",
+        "confusion_level": 0.0-1.0,
+        "engagement_level": 0.0-1.0,
+        "cognitive_load": "low/medium/high",
+        "potential_knowledge_gaps": ["concepts user might not understand"],
+        "needs_help_probability": 0.0-1.0,
+        "at_natural_break": true/false
+    },
+    "intervention_plan": {
+        "should_intervene": true/false,
+        "intervention_type": "type or none",
+        "urgency": "low/medium/high",
+        "specific_target": "what concept/section to address",
+        "reasoning": "why this decision",
+        "respect_reading_flow": true/false
+    },
+    "response": {
+        "response": "your message to the user, or null when not intervening",
+        "display_type": "popup/sidebar/inline"
+    }
+}"""
+
+    @traced(cat="agent")
+    async def run(self, observations: List[str], previous_state: Dict, time_since_last: float,
+                  reading_metrics: Dict, paper_context: Dict, on_delta: Callable[[str], None] = None) -> Dict:
+        """
+        Run all four stages in one call and return their outputs keyed by stage.
+        
+        If on_delta is given, the reply is streamed and the response text is
+        passed to it as it arrives.
+        """
+        user_prompt = "Observations (most recent is last):\n" + "\n".join(observations) + f"""
+
+Previous user state: {json.dumps(previous_state)}
+Time since last intervention: {time_since_last:.1f} seconds
+Reading metrics: {json.dumps(reading_metrics)}
+Paper context: {json.dumps(paper_context)}
+
+Analyze, infer the user's state, plan and respond."""
+        
+        if on_delta is not None:
+            result = await self._stream_complete(user_prompt, "response", on_delta)
+        else:
+            result = await self._complete(user_prompt)
+        
+        # Safety check: if somehow we still get a list, take the last element
+        if isinstance(result, list):
+            result = result[-1] if result else {}
+            
+        stages = {}
+        for key in ("analysis", "user_state", "intervention_plan", "response"):
+            value = result.get(key) if isinstance(result, dict) else None
+            stages[key] = value if isinstance(value, dict) else {}
+            
+        # Mirror ResponseGenerator: no response unless the plan intervenes
+        if not stages["intervention_plan"].get("should_intervene", False):
+            stages["response"] = {"response": None, "display_type": None}
+            
+        return stages
+
+
+class AsyncResearchAssistant:
+    """
+    Asyncio-native orchestrator that coordinates all agents.
+    
+    Every agent call is awaited, so a single event loop can host many reading
+    sessions at once and local parsing overlaps the network waits.
     
     Usage:
-        assistant = ResearchAssistant()
-        response = assistant.process_observation("User reads abstract slowly")
+        assistant = AsyncResearchAssistant()
+        response = await assistant.process_observation("User reads abstract slowly")
         if response:
             print(f"Assistant: {response}")
     """
     
-    def __init__(self, client: OpenAI = None, verbose: bool = True):
+    PIPELINE_MODES = ("staged", "fused")
+    # Stages of each pipeline mode, in order
+    STAGES = {"staged": ("analyze", "infer", "plan", "generate"), "fused": ("fused",)}
+    # Agent that runs each stage
+    STAGE_AGENTS = {"analyze": "analyzer", "infer": "inferencer", "plan": "planner",
+                    "generate": "generator", "fused": "fused"}
+    
+    # Plan used when the planner misses its deadline
+    NO_INTERVENTION = {
+        "should_intervene": False,
+        "intervention_type": "none",
+        "urgency": "low",
+        "specific_target": "",
+        "reasoning": "stage deadline exceeded",
+        "respect_reading_flow": True
+    }
+    
+    def __init__(self, client: AsyncOpenAI = None, verbose: bool = True, pipeline_mode: str = "staged",
+                 cache: ResponseCache = None, cached_agents: Optional[Iterable[str]] = None,
+                 transport: HTTPTransport = None, latency_budget: Optional[LatencyBudget] = None,
+                 hedging: Optional[HedgingPolicy] = None, router: Optional[ModelRouter] = None,
+                 observation_capacity: int = 64, intervention_capacity: int = 32,
+                 spill_dir: Optional[str] = None):
         """
         Initialize the research assistant.
         
         Args:
-            client: OpenAI client (if None, uses default configuration)
+            client: AsyncOpenAI client (if None, uses default configuration
+                on the given or process-wide transport)
             verbose: Whether to print agent outputs (default: True)
+            pipeline_mode: "staged" runs the four agents one after another,
+                "fused" asks for all four outputs in a single call
+            cache: ResponseCache shared by the agents (None disables caching)
+            cached_agents: Names of the agents that use the cache
+                (analyzer, inferencer, planner, generator, fused); defaults to all
+            transport: HTTPTransport used when no client is given
+            latency_budget: End-to-end deadline per observation, split across
+                the stages (defaults to LatencyBudget())
+            hedging: HedgingPolicy for the agent calls (None disables hedging)
+            router: ModelRouter choosing each agent's model (defaults to
+                DEFAULT_MODEL_ROUTES); share one across assistants to pool
+                the latency observations
+            observation_capacity: Observations the memory keeps in RAM
+            intervention_capacity: Interventions the memory keeps in RAM
+            spill_dir: Directory for the memory's spill files of older
+                entries (the system's temporary directory if None)
         """
-        self.client = client or configure_api()
+        if pipeline_mode not in self.PIPELINE_MODES:
+            raise ValueError(f"Unknown pipeline_mode '{pipeline_mode}', expected one of {self.PIPELINE_MODES}")
+        self.client = client or configure_async_api(transport=transport)
         self.verbose = verbose
-        self.memory = Memory()
-        self.observation_analyzer = ObservationAnalyzer(self.client)
-        self.state_inferencer = UserStateInferencer(self.client)
-        self.intervention_planner = InterventionPlanner(self.client)
-        self.response_generator = ResponseGenerator(self.client)
+        self.pipeline_mode = pipeline_mode
+        self.cache = cache
+        self._memory_args = (observation_capacity, intervention_capacity, spill_dir)
+        self.memory = Memory(*self._memory_args)
+        self.observation_analyzer = ObservationAnalyzer(self.client, cache)
+        self.state_inferencer = UserStateInferencer(self.client, cache)
+        self.intervention_planner = InterventionPlanner(self.client, cache)
+        self.response_generator = ResponseGenerator(self.client, cache)
+        self.fused_agent = FusedPipelineAgent(self.client, cache)
+        self.latency_budget = latency_budget or LatencyBudget()
+        self.router = router or ModelRouter()
+        # Seconds spent in each stage of the most recent observation
+        self.stage_timings: Dict[str, float] = {}
+        # Model that served each stage of the most recent observation
+        self.stage_models: Dict[str, str] = {}
+        # Stages of the most recent observation that missed their deadline
+        self.timed_out_stages: List[str] = []
+        self._pipeline_start = time.perf_counter()
+        # Pipelines cancelled because a newer observation superseded them (or by cancel_pipeline)
+        self.cancelled_pipelines = 0
+        self._inflight: Optional[Tuple[asyncio.Task, int, List[str]]] = None  # (task, priority, observations)
+        self._superseded = set()
         
-    def process_observation(self, observation: str) -> Optional[str]:
+        for agent in self.agents.values():
+            agent.hedging = hedging
+            agent.router = self.router
+        
+        if cached_agents is not None:
+            cached_agents = set(cached_agents)
+            for agent in self.agents.values():
+                agent.cache_enabled = cache is not None and agent.name in cached_agents
+        
+    @property
+    def agents(self) -> Dict[str, Agent]:
+        """All agents keyed by name"""
+        return {agent.name: agent for agent in (self.observation_analyzer, self.state_inferencer,
+                                                self.intervention_planner, self.response_generator,
+                                                self.fused_agent)}
+    
+    def set_cache_enabled(self, agent_name: str, enabled: bool):
+        """Switch response caching on or off for one agent"""
+        self.agents[agent_name].cache_enabled = enabled and self.cache is not None
+        
+    def set_model_route(self, agent_name: str, primary: str, fallbacks: Iterable[str] = ()):
+        """Route one agent to a primary model with optional faster fallbacks"""
+        self.router.set_route(agent_name, primary, fallbacks)
+        
+    async def process_observation(self, observation: str,
+                                  on_delta: Callable[[str], None] = None) -> Optional[str]:
         """
         Process a single observation and potentially generate a response.
         
         Args:
             observation: Description of user behavior (e.g., "User pauses at equation")
+            on_delta: Optional callback that receives the response text in
+                pieces while it is being generated
             
         Returns:
             Assistant response string if intervention triggered, None otherwise
         """
+        return await self.process_observation_batch([observation], on_delta)
+    
+    async def process_observation_batch(self, observations: List[str],
+                                        on_delta: Callable[[str], None] = None,
+                                        priority: int = 0) -> Optional[str]:
+        """
+        Process a burst of observations with a single pipeline run.
         
-        # Step 1: Store observation
-        self.memory.add_observation(observation)
+        All observations are stored and parsed, then the agents run once with
+        the batch as the most recent observations.
         
-        # Extract section and title information
-        title, section = extract_section_info(observation)
-        if title or section:
-            self.memory.update_paper_context(title, section)
+        Only the latest pipeline is worth finishing: a call whose priority is
+        at least that of the pipeline in flight cancels it (aborting its
+        agent requests, and the cancelled call returns None). A call with
+        lower priority only stores its observations and returns None, leaving
+        the more important pipeline to answer.
         
-        # Detect struggled concepts
-        struggled_concepts = detect_struggle_concepts(observation)
-        for concept in struggled_concepts:
-            self.memory.reading_metrics.add_struggled_concept(concept)
+        Args:
+            observations: Observations in the order they happened (newest last)
+            on_delta: Optional callback that receives the response text in
+                pieces while it is being generated
+            priority: Importance of this batch relative to the one in flight
+            
+        Returns:
+            Assistant response string if intervention triggered, None otherwise
+        """
+        if not observations:
+            return None
         
-        # Step 2: Analyze recent observations
-        recent_obs = [obs["content"] for obs in self.memory.get_recent_observations()]
-        analyzed = self.observation_analyzer.analyze(recent_obs)
+        task = asyncio.current_task()
+        inflight = self._inflight
+        if inflight is not None and not inflight[0].done():
+            inflight_task, inflight_priority, _ = inflight
+            if priority < inflight_priority:
+                _PIPELINE_RUNS.inc(outcome="deferred")
+                for text in observations:
+                    self.memory.add_observation(text)
+                    self._apply_local_parsing(text)
+                if self.verbose:
+                    print(f"\n[Pipeline]: deferred {len(observations)} observation(s) to the pipeline in flight")
+                return None
+            self._superseded.add(inflight_task)
+            inflight_task.cancel()
+            self.cancelled_pipelines += 1
+            _PIPELINE_RUNS.inc(outcome="cancelled")
+            if self.verbose:
+                print("\n[Pipeline]: cancelled the pipeline in flight for a newer observation")
+                
+        self._inflight = (task, priority, observations)
+        try:
+            response = await self._run_pipeline(observations, on_delta)
+            _PIPELINE_RUNS.inc(outcome="completed")
+            return response
+        except asyncio.CancelledError:
+            if task not in self._superseded:
+                raise
+            if hasattr(task, "uncancel"):  # Python 3.11+
+                task.uncancel()
+            return None
+        finally:
+            self._superseded.discard(task)
+            if self._inflight is not None and self._inflight[0] is task:
+                self._inflight = None
+    
+    async def cancel_pipeline(self, observations: List[str]) -> bool:
+        """
+        Cancel the pipeline in flight if it is running this batch (the list
+        given to process_observation_batch); that call returns None. False if
+        the batch is not in flight, e.g. it finished or was superseded.
+        """
+        inflight = self._inflight
+        if inflight is None or inflight[2] is not observations or inflight[0].done():
+            return False
+        self._superseded.add(inflight[0])
+        inflight[0].cancel()
+        self.cancelled_pipelines += 1
+        _PIPELINE_RUNS.inc(outcome="cancelled")
         if self.verbose:
-            print(f"\n[Agent 1 - Observation Analysis]: {json.dumps(analyzed, indent=2)}")
-        
-        # Update paper context from analysis
-        if analyzed.get("paper_title"):
-            self.memory.update_paper_context(title=analyzed["paper_title"])
-        if analyzed.get("section_name"):
-            self.memory.update_paper_context(section=analyzed["section_name"])
+            print("\n[Pipeline]: cancelled the pipeline in flight on request")
+        return True
+                
+    @traced(cat="pipeline")
+    async def _run_pipeline(self, observations: List[str], on_delta: Callable[[str], None] = None) -> Optional[str]:
+        """Run the agents once for a batch of observations"""
+        pipeline_start = self._pipeline_start = time.perf_counter()
+        self.stage_timings = {}
+        self.stage_models = {}
+        self.timed_out_stages = []
+        observation = observations[-1]
         
-        # Step 3: Infer user state
+        # Step 1: Store observations
+        for text in observations:
+            self.memory.add_observation(text)
+        recent_obs = [obs["content"] for obs in self.memory.get_recent_observations(max(5, len(observations)))]
         previous_state = self.memory.user_state.copy()
-        new_state = self.state_inferencer.infer(analyzed, self.memory.user_state)
-        self.memory.user_state.update(new_state)
-        if self.verbose:
-            print(f"\n[Agent 2 - User State]: {json.dumps(new_state, indent=2)}")
-        
-        # Step 4: Plan intervention
-        time_gap = self.memory.time_since_last_intervention()
-        reading_summary = self.memory.reading_metrics.get_reading_summary()
-        intervention = self.intervention_planner.plan(new_state, analyzed, time_gap, reading_summary)
-        if self.verbose:
-            print(f"\n[Agent 3 - Intervention Plan]: {json.dumps(intervention, indent=2)}")
         
-        # Step 5: Generate response if needed
-        context = {
-            "current_content": analyzed.get("current_content", ""),
-            "paper_context": self.memory.paper_context,
-            "reading_metrics": reading_summary
-        }
-        response_data = self.response_generator.generate(intervention, new_state, context)
-        if self.verbose:
-            print(f"\n[Agent 4 - Response]: {json.dumps(response_data, indent=2)}")
+        if self.pipeline_mode == "fused":
+            for text in observations:
+                self._apply_local_parsing(text)
+            
+            # Steps 2-5 in a single call
+            time_gap = self.memory.time_since_last_intervention()
+            reading_summary = self.memory.reading_metrics.get_reading_summary()
+            stages = await self._timed("fused", self.fused_agent.run(
+                recent_obs, previous_state, time_gap, reading_summary, self.memory.paper_context, on_delta),
+                lambda: {
+                    "analysis": self._local_analysis(observation),
+                    "user_state": previous_state,
+                    "intervention_plan": dict(self.NO_INTERVENTION),
+                    "response": {"response": None, "display_type": None}
+                })
+            analyzed = stages["analysis"]
+            new_state = stages["user_state"]
+            intervention = stages["intervention_plan"]
+            response_data = stages["response"]
+            
+            self._apply_analysis(analyzed)
+            self.memory.user_state.update(new_state)
+            context = {
+                "current_content": analyzed.get("current_content", ""),
+                "paper_context": self.memory.paper_context,
+                "reading_metrics": reading_summary
+            }
+            
+            if self.verbose:
+                print(f"\n[Fused Pipeline - Observation Analysis]: {json.dumps(analyzed, indent=2)}")
+                print(f"\n[Fused Pipeline - User State]: {json.dumps(new_state, indent=2)}")
+                print(f"\n[Fused Pipeline - Intervention Plan]: {json.dumps(intervention, indent=2)}")
+                print(f"\n[Fused Pipeline - Response]: {json.dumps(response_data, indent=2)}")
+        else:
+            # Step 2: Start analyzing recent observations
+            analysis_task = asyncio.ensure_future(
+                self._timed("analyze", self.observation_analyzer.analyze(recent_obs),
+                            lambda: self._local_analysis(observation)))
+            try:
+                # Let the analyzer send its request before doing the local parsing below
+                await asyncio.sleep(0)
+                
+                for text in observations:
+                    self._apply_local_parsing(text)
+            except BaseException:
+                analysis_task.cancel()
+                raise
+            
+            analyzed = await analysis_task
+            if self.verbose:
+                print(f"\n[Agent 1 - Observation Analysis]: {json.dumps(analyzed, indent=2)}")
+            
+            self._apply_analysis(analyzed)
+            
+            # Step 3: Infer user state
+            new_state = await self._timed("infer", self.state_inferencer.infer(analyzed, self.memory.user_state),
+                                          lambda: dict(previous_state))
+            self.memory.user_state.update(new_state)
+            if self.verbose:
+                print(f"\n[Agent 2 - User State]: {json.dumps(new_state, indent=2)}")
+            
+            # Step 4: Plan intervention
+            time_gap = self.memory.time_since_last_intervention()
+            reading_summary = self.memory.reading_metrics.get_reading_summary()
+            intervention = await self._timed("plan", self.intervention_planner.plan(
+                new_state, analyzed, time_gap, reading_summary), lambda: dict(self.NO_INTERVENTION))
+            if self.verbose:
+                print(f"\n[Agent 3 - Intervention Plan]: {json.dumps(intervention, indent=2)}")
+            
+            # Step 5: Generate response if needed
+            context = {
+                "current_content": analyzed.get("current_content", ""),
+                "paper_context": self.memory.paper_context,
+                "reading_metrics": reading_summary
+            }
+            response_data = await self._timed("generate", self.response_generator.generate(
+                intervention, new_state, context, on_delta), lambda: {"response": None, "display_type": None})
+            if self.verbose:
+                print(f"\n[Agent 4 - Response]: {json.dumps(response_data, indent=2)}")
         
         # Step 6: Record intervention if made
         if response_data.get("response"):
@@ -597,21 +2022,257 @@ class ResearchAssistant:
                 new_state
             )
             
+        self.stage_timings["total"] = time.perf_counter() - pipeline_start
+        _STAGE_SECONDS.observe(self.stage_timings["total"], stage="total")
+            
         # Print reading metrics summary
         if self.verbose:
             print(f"\n[Reading Metrics Summary]: {json.dumps(reading_summary, indent=2)}")
+            print(f"\n[Stage Timings ({self.pipeline_mode})]: "
+                  + ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in self.stage_timings.items()))
+            print(f"\n[Stage Models]: {json.dumps(self.stage_models)}")
             
         return response_data.get("response")
     
+    async def _timed(self, stage: str, awaitable: Awaitable, fallback: Callable[[], Dict] = None):
+        """
+        Await a pipeline stage under its share of the latency budget and
+        record how long it took. If the deadline passes, the stage is
+        cancelled and fallback() supplies its result.
+        """
+        start = time.perf_counter()
+        # A superseding pipeline replaces these, keep writing to this run's own
+        stage_timings, stage_models = self.stage_timings, self.stage_models
+        stages = self.STAGES[self.pipeline_mode]
+        timeout = self.latency_budget.stage_timeout(stage, start - self._pipeline_start,
+                                                    stages[stages.index(stage):])
+        agent = self.agents[self.STAGE_AGENTS[stage]]
+        agent.deadline = timeout
+        agent.last_model = None
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            if fallback is None:
+                raise
+            self.timed_out_stages.append(stage)
+            _STAGE_TIMEOUTS.inc(stage=stage)
+            if self.verbose:
+                print(f"\n[Deadline]: {stage} stage exceeded {timeout:.1f}s, using fallback")
+            return fallback()
+        finally:
+            stage_timings[stage] = time.perf_counter() - start
+            _STAGE_SECONDS.observe(stage_timings[stage], stage=stage)
+            if agent.last_model:
+                stage_models[stage] = agent.last_model
+            
+    def _local_analysis(self, observation: str) -> Dict:
+        """Observation analysis built from local parsing only (analyzer fallback)"""
+        features = parse_observation(observation)
+        return {
+            "current_content": observation,
+            "section_name": features.section,
+            "paper_title": features.title,
+            "reading_patterns": {
+                "is_pausing": features.paused_word is not None,
+                "is_rereading": features.reread_target is not None,
+                "reading_speed": "normal",
+                "confusion_indicators": [],
+                "section_transition": features.section is not None
+            },
+            "user_actions": [],
+            "time_on_section": "unknown",
+            "struggle_concepts": features.struggle_concepts
+        }
+    
+    @traced(cat="parse")
+    def _apply_local_parsing(self, observation: str):
+        """Update paper context and struggled concepts from the raw observation text"""
+        features = parse_observation(observation)
+        
+        # Section and title information
+        if features.title or features.section:
+            self.memory.update_paper_context(features.title, features.section)
+        
+        # Struggled concepts
+        for concept in features.struggle_concepts:
+            self.memory.reading_metrics.add_struggled_concept(concept)
+    
+    def _apply_analysis(self, analyzed: Dict):
+        """Update paper context from the observation analysis"""
+        if analyzed.get("paper_title"):
+            self.memory.update_paper_context(title=analyzed["paper_title"])
+        if analyzed.get("section_name"):
+            self.memory.update_paper_context(section=analyzed["section_name"])
+    
     def get_memory_state(self) -> Dict:
         """Get current memory state for analysis"""
         return {
             "user_state": self.memory.user_state,
             "paper_context": self.memory.paper_context,
             "reading_metrics": self.memory.reading_metrics.get_reading_summary(),
-            "intervention_history": self.memory.intervention_history
+            "intervention_history": self.memory.intervention_history.to_list()
         }
     
     def reset(self):
         """Reset the assistant to initial state"""
-        self.memory = Memory()
\ No newline at end of file
+        self.memory.close()
+        self.memory = Memory(*self._memory_args)
+        
+    def close(self):
+        """Release the memory's temporary spill files (call when the session ends)"""
+        self.memory.close()
+
+
+class ResearchAssistant:
+    """
+    Main orchestrator that coordinates all agents to provide intelligent reading assistance.
+    
+    Synchronous wrapper around AsyncResearchAssistant: each call runs the async
+    pipeline on a background event loop shared by all instances.
+    
+    Usage:
+        assistant = ResearchAssistant()
+        response = assistant.process_observation("User reads abstract slowly")
+        if response:
+            print(f"Assistant: {response}")
+    """
+    
+    def __init__(self, client: Union[OpenAI, AsyncOpenAI] = None, verbose: bool = True,
+                 async_client: AsyncOpenAI = None,
+                 pipeline_mode: str = "staged", cache: ResponseCache = None,
+                 cached_agents: Optional[Iterable[str]] = None, transport: HTTPTransport = None,
+                 latency_budget: Optional[LatencyBudget] = None, hedging: Optional[HedgingPolicy] = None,
+                 router: Optional[ModelRouter] = None, observation_capacity: int = 64,
+                 intervention_capacity: int = 32, spill_dir: Optional[str] = None):
+        """
+        Initialize the research assistant.
+        
+        Args:
+            client: AsyncOpenAI client to use as is, or an OpenAI client of
+                which only the base URL and key are reused, on the shared
+                transport (its timeout, headers and http_client are not; pass
+                an AsyncOpenAI to keep them). If None, uses default configuration
+            verbose: Whether to print agent outputs (default: True)
+            async_client: AsyncOpenAI client to use directly (overrides client)
+            pipeline_mode: "staged" (four agent calls) or "fused" (one call)
+            cache: ResponseCache shared by the agents (None disables caching)
+            cached_agents: Names of the agents that use the cache (defaults to all)
+            transport: HTTPTransport whose connection pool the agents share
+                (defaults to the process-wide transport)
+            latency_budget: End-to-end deadline per observation (defaults to LatencyBudget())
+            hedging: HedgingPolicy for the agent calls (None disables hedging)
+            router: ModelRouter choosing each agent's model (defaults to DEFAULT_MODEL_ROUTES)
+            observation_capacity: Observations the memory keeps in RAM
+            intervention_capacity: Interventions the memory keeps in RAM
+            spill_dir: Directory for the memory's spill files (the system's
+                temporary directory if None)
+        """
+        if async_client is None and isinstance(client, AsyncOpenAI):
+            async_client = client
+        elif async_client is None and client is not None:
+            async_client = configure_async_api(client.base_url, client.api_key, transport)
+        self._assistant = AsyncResearchAssistant(async_client, verbose, pipeline_mode, cache, cached_agents,
+                                                 transport, latency_budget, hedging, router,
+                                                 observation_capacity, intervention_capacity, spill_dir)
+        self.client = self._assistant.client
+        
+    @property
+    def verbose(self) -> bool:
+        return self._assistant.verbose
+    
+    @verbose.setter
+    def verbose(self, value: bool):
+        self._assistant.verbose = value
+        
+    @property
+    def memory(self) -> Memory:
+        return self._assistant.memory
+    
+    @property
+    def pipeline_mode(self) -> str:
+        return self._assistant.pipeline_mode
+    
+    @property
+    def stage_timings(self) -> Dict[str, float]:
+        """Seconds spent in each stage of the most recent observation"""
+        return self._assistant.stage_timings
+    
+    @property
+    def router(self) -> ModelRouter:
+        return self._assistant.router
+    
+    @property
+    def stage_models(self) -> Dict[str, str]:
+        """Model that served each stage of the most recent observation"""
+        return self._assistant.stage_models
+    
+    @property
+    def cancelled_pipelines(self) -> int:
+        """Pipelines cancelled because a newer observation superseded them"""
+        return self._assistant.cancelled_pipelines
+    
+    @property
+    def timed_out_stages(self) -> List[str]:
+        """Stages of the most recent observation that missed their deadline"""
+        return self._assistant.timed_out_stages
+    
+    @property
+    def cache(self) -> Optional[ResponseCache]:
+        return self._assistant.cache
+    
+    def set_cache_enabled(self, agent_name: str, enabled: bool):
+        """Switch response caching on or off for one agent"""
+        self._assistant.set_cache_enabled(agent_name, enabled)
+        
+    def set_model_route(self, agent_name: str, primary: str, fallbacks: Iterable[str] = ()):
+        """Route one agent to a primary model with optional faster fallbacks"""
+        self._assistant.set_model_route(agent_name, primary, fallbacks)
+        
+    def process_observation(self, observation: str, on_delta: Callable[[str], None] = None) -> Optional[str]:
+        """
+        Process a single observation and potentially generate a response.
+        
+        Args:
+            observation: Description of user behavior (e.g., "User pauses at equation")
+            on_delta: Optional callback that receives the response text in
+                pieces while it is being generated
+            
+        Returns:
+            Assistant response string if intervention triggered, None otherwise
+        """
+        return _LOOP_THREAD.run(self._assistant.process_observation(observation, on_delta))
+    
+    def process_observation_batch(self, observations: List[str], on_delta: Callable[[str], None] = None,
+                                  priority: int = 0) -> Optional[str]:
+        """
+        Process a burst of observations with a single pipeline run.
+        
+        A call from another thread with at least the same priority cancels
+        this one while it is in flight (see AsyncResearchAssistant).
+        
+        Args:
+            observations: Observations in the order they happened (newest last)
+            on_delta: Optional callback that receives the response text in
+                pieces while it is being generated
+            priority: Importance of this batch relative to the one in flight
+            
+        Returns:
+            Assistant response string if intervention triggered, None otherwise
+        """
+        return _LOOP_THREAD.run(self._assistant.process_observation_batch(observations, on_delta, priority))
+    
+    def cancel_pipeline(self, observations: List[str]) -> bool:
+        """Cancel the pipeline in flight if it is running this batch (see AsyncResearchAssistant)"""
+        return _LOOP_THREAD.run(self._assistant.cancel_pipeline(observations))
+    
+    def get_memory_state(self) -> Dict:
+        """Get current memory state for analysis"""
+        return self._assistant.get_memory_state()
+    
+    def reset(self):
+        """Reset the assistant to initial state"""
+        self._assistant.reset()
+        
+    def close(self):
+        """Release the memory's temporary spill files (call when the session ends)"""
+        self._assistant.close()
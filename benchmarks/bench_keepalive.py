@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Requests per second on the study observe endpoint with and without keep-alive
+
+Starts DirectMarkdownBrowser with the study plugin (AI disabled, so only the
+HTTP and bridge path is measured) and posts observations to
+/api/plugin/reading-study/observe, as study_plugin.js does, either over one
+persistent connection per client or over a new connection per request.
+
+Usage:
+    python benchmarks/bench_keepalive.py
+    python benchmarks/bench_keepalive.py --requests 5000 --clients 1,4,8
+"""
+
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_pipeline import percentiles
+from empirical_study import StudyBridge, StudySession, create_study_plugin
+from MarkdownBrowser import DirectMarkdownBrowser
+from ReaderAI import ResearchAssistant, configure_api
+
+PATH = "/api/plugin/reading-study/observe"
+
+
+def start_browser(max_workers):
+    """Browser serving the study plugin with the AI pipeline switched off"""
+    with open(os.path.join(ROOT, 'study_config.json'), 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    # Never called: AI is disabled, the bridge only logs observations
+    assistant = ResearchAssistant(client=configure_api(api_url="http://127.0.0.1:9/v1", api_key="unused"),
+                                  verbose=False)
+    session = StudySession("testing", "bench_keepalive", assistant=assistant)
+    bridge = StudyBridge(session, {"ai_enabled": False})
+    browser = DirectMarkdownBrowser(max_workers=max_workers)
+    browser.load_markdown_content("# Benchmark\n\nKeep-alive benchmark page.")
+    browser.register_plugin(create_study_plugin(bridge, config))
+    browser.start_server()
+    return browser
+
+
+def run_client(port, requests, keepalive, latencies, errors):
+    """Post observations, reusing one connection or opening one per request"""
+    body = json.dumps({"observation": "The user pauses on the reward function for 4 seconds.",
+                       "type": "pause", "context": {"readingSpeed": 2.0}}).encode()
+    headers = {"Content-Type": "application/json"}
+    if not keepalive:
+        headers["Connection"] = "close"
+    connection = None
+    for _ in range(requests):
+        start = time.perf_counter()
+        try:
+            if connection is None:
+                connection = http.client.HTTPConnection("localhost", port, timeout=10)
+            connection.request("POST", PATH, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            # 202: the observe endpoint answers with a job id
+            if response.status not in (200, 202):
+                errors.append(response.status)
+            if not keepalive or response.will_close:
+                connection.close()
+                connection = None
+            latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            if connection is not None:
+                connection.close()
+                connection = None
+    if connection is not None:
+        connection.close()
+
+
+def measure(port, clients, requests, keepalive):
+    latencies, errors = [], []
+    per_client = requests // clients
+    threads = [threading.Thread(target=run_client, args=(port, per_client, keepalive, latencies, errors))
+               for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "clients": clients,
+        "keepalive": keepalive,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_sec": len(latencies) / elapsed if elapsed else None,
+        "latency": percentiles(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the observe endpoint with and without keep-alive')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per run (split across clients)')
+    parser.add_argument('--clients', default='1,4', help='Comma-separated concurrent client counts')
+    parser.add_argument('--max-workers', type=int, default=16, help='Browser worker threads')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    with contextlib.redirect_stdout(io.StringIO()):
+        browser = start_browser(args.max_workers)
+
+    runs = []
+    try:
+        print(f"{'clients':>8}{'mode':>12}{'req/s':>10}{'p50':>9}{'p99':>9}{'errors':>8}")
+        for clients in [int(n) for n in args.clients.split(',') if n]:
+            for keepalive in (False, True):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    run = measure(browser.port, clients, args.requests, keepalive)
+                runs.append(run)
+                latency = run["latency"] or {"p50": 0, "p99": 0}
+                print(f"{clients:>8}{'keep-alive' if keepalive else 'close':>12}{run['requests_per_sec']:>10.0f}"
+                      f"{latency['p50'] * 1000:>7.2f}ms{latency['p99'] * 1000:>7.2f}ms{run['errors']:>8}")
+    finally:
+        browser.stop_server()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"max_workers": args.max_workers, "runs": runs}, f, indent=2)
+
+    return 1 if any(run["errors"] for run in runs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the observation parsing engine in ReaderAI.py
+
+Builds a corpus from the observation_templates in study_config.json (plus the
+free-form observations used in Example Usage.txt), checks that
+parse_observation agrees with the original per-call re.search implementation,
+and reports throughput for both.
+
+Usage:
+    python benchmarks/bench_observation_parsing.py
+    python benchmarks/bench_observation_parsing.py --size 200000 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ReaderAI import detect_struggle_concepts, extract_section_info, parse_observation
+
+FILLERS = {
+    "section": ["Introduction", "2 RELATED WORK", "5.2 User Agent", "METHODS", "Conclusion",
+                "A CURRICULUM LEARNING", "7.3 User Study"],
+    "duration": ["3", "12", "45", "130"],
+    "content": ["The interface agent selects the menu layout", "$Q(s, a) = r + \\gamma \\max Q(s', a')$",
+                "regularization", "Figure 3 shows the learned policy"],
+    "topic": ["the reward function", "POMDP belief states", "curriculum learning"],
+    "term": ["MARL", "policy gradient", "POMDP", "hierarchical menu"],
+    "text": ["multi-agent reinforcement learning", "the user agent's cognitive model",
+             "What is the interface agent optimizing?"],
+}
+
+FREE_FORM = [
+    "The user opens a PDF of a research paper about Linear Regression.",
+    "The user reads the title and abstract slowly, taking about 2 minutes.",
+    "The user pauses at the word 'regularization' and re-reads the sentence three times.",
+    "The user writes down: 'What is regularization? Why do we need it?'",
+    "The user moves on to the INTRODUCTION section.",
+    "The user completes the introduction and moves to the METHODS section.",
+    "User types in margin: 'HELP ME UNDERSTAND THIS!!!!' with multiple exclamation marks.",
+    "The user re-reads the paragraph about gradients.",
+    "--TITLE-- MARLUI: Multi-Agent Reinforcement Learning. The user starts --Introduction--",
+    "The user moves on to the next section: Related Work",
+    "The user is in the evaluation section, reading at normal speed.",
+]
+
+
+def legacy_extract_section_info(observation):
+    """The original implementation, kept here as the reference"""
+    title_match = re.search(r'--TITLE--\s*(.+?)(?:\.|,|$)', observation)
+    section_matches = [
+        re.search(r'--(\w+(?:\s+\w+)*?)--', observation),
+        re.search(r'moves? on to (?:the )?(?:next )?section.*?(?:--)?(\w+(?:\s+\w+)*?)(?:--)?', observation, re.IGNORECASE),
+        re.search(r'(?:reads?|reading) (?:the )?(\w+) section', observation, re.IGNORECASE),
+        re.search(r'(?:in|at) (?:the )?(\w+) section', observation, re.IGNORECASE)
+    ]
+    
+    title = title_match.group(1).strip() if title_match else None
+    section = None
+    for match in section_matches:
+        if match:
+            section = match.group(1).strip()
+            break
+            
+    return title, section
+
+
+def legacy_detect_struggle_concepts(observation):
+    """The original implementation, kept here as the reference"""
+    concepts = []
+    
+    if "pauses at the word" in observation:
+        match = re.search(r"pauses at the word '(\w+)'", observation)
+        if match:
+            concepts.append(match.group(1))
+            
+    if "re-reads" in observation or "re-read" in observation:
+        sentence_match = re.search(r'(?:sentence|paragraph) (?:about|containing|with) (\w+)', observation)
+        if sentence_match:
+            concepts.append(sentence_match.group(1))
+            
+    question_match = re.search(r'(?:writes?|types?) (?:down )?["\']?(.+?)["\']?(?:\?|!)', observation)
+    if question_match:
+        question_text = question_match.group(1)
+        key_terms = re.findall(r'\b(?:what is|what are|why|how does?)\s+(\w+)', question_text, re.IGNORECASE)
+        concepts.extend(key_terms)
+        
+    return concepts
+
+
+def fill_template(template, rng):
+    """Replace every {{placeholder}} with a random filler value"""
+    return re.sub(r'\{\{(\w+)\}\}', lambda m: rng.choice(FILLERS.get(m.group(1), ["x"])), template)
+
+
+def build_corpus(size, seed=0):
+    """Build a corpus of synthetic observations"""
+    with open(os.path.join(ROOT, 'study_config.json'), 'r', encoding='utf-8') as f:
+        templates = list(json.load(f)['observation_templates'].values())
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        if rng.random() < 0.15:
+            corpus.append(rng.choice(FREE_FORM))
+        else:
+            corpus.append(fill_template(rng.choice(templates), rng))
+    return corpus
+
+
+def run_legacy(corpus):
+    for observation in corpus:
+        legacy_extract_section_info(observation)
+        legacy_detect_struggle_concepts(observation)
+
+
+def run_engine(corpus):
+    parse = parse_observation.__wrapped__  # bypass the memo to measure raw parsing
+    for observation in corpus:
+        parse(observation)
+
+
+def run_engine_cached(corpus):
+    parse_observation.cache_clear()
+    for observation in corpus:
+        parse_observation(observation)
+
+
+def measure(func, corpus, repeat):
+    """Return the best observations/second over `repeat` runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(corpus)
+        best = min(best, time.perf_counter() - start)
+    return len(corpus) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark observation parsing')
+    parser.add_argument('--size', type=int, default=100000, help='Number of observations in the corpus')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per implementation (best is reported)')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this file')
+    args = parser.parse_args()
+    
+    corpus = build_corpus(args.size)
+    
+    # The engine must agree with the original implementation on every observation
+    mismatches = 0
+    for observation in set(corpus):
+        if (extract_section_info(observation) != legacy_extract_section_info(observation) or
+                detect_struggle_concepts(observation) != legacy_detect_struggle_concepts(observation)):
+            mismatches += 1
+            print(f"Mismatch: {observation!r}")
+    
+    results = {
+        "corpus_size": len(corpus),
+        "distinct_observations": len(set(corpus)),
+        "mismatches": mismatches,
+        "legacy_obs_per_sec": measure(run_legacy, corpus, args.repeat),
+        "engine_obs_per_sec": measure(run_engine, corpus, args.repeat),
+        "engine_cached_obs_per_sec": measure(run_engine_cached, corpus, args.repeat),
+    }
+    results["speedup"] = results["engine_obs_per_sec"] / results["legacy_obs_per_sec"]
+    
+    print(f"Corpus: {results['corpus_size']} observations ({results['distinct_observations']} distinct)")
+    print(f"Legacy re.search:      {results['legacy_obs_per_sec']:>12,.0f} obs/s")
+    print(f"parse_observation:     {results['engine_obs_per_sec']:>12,.0f} obs/s ({results['speedup']:.1f}x)")
+    print(f"parse_observation+memo:{results['engine_cached_obs_per_sec']:>12,.0f} obs/s")
+    print(f"Mismatches: {mismatches}")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency benchmark for the observation pipeline
+
+Drives ResearchAssistant.process_observation and StudyBridge.handle_observation
+with synthetic observation streams built from the observation_templates in
+study_config.json, against the local fake backend (fake_llm_server.py) or any
+OpenAI-compatible API, and reports:
+
+- p50/p95/p99 latency of every agent stage
+- observations per second at 1, 10 and 100 concurrent sessions
+- end-to-end request latency through StudyBridge (pipeline starts are not
+  spaced out unless --min-gap is given, so this measures the pipeline itself)
+- peak RSS over all runs
+
+Usage:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --sessions 1,10,100 --observations 20 --latency 0.3
+    python benchmarks/bench_pipeline.py --pipeline-mode fused --output pipeline.json
+    python benchmarks/bench_pipeline.py --api-url http://localhost:8765/v1 --api-key fake
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from bench_observation_parsing import fill_template
+from empirical_study import StudyBridge, StudySession
+from fake_llm_server import FakeLLMConfig, start_fake_llm_server
+from ReaderAI import ResearchAssistant, configure_api
+
+STAGES = ("analyze", "infer", "plan", "generate", "fused", "total")
+
+
+def build_streams(sessions, length, seed=0):
+    """One synthetic stream of (type, observation) per session"""
+    with open(os.path.join(ROOT, 'study_config.json'), 'r', encoding='utf-8') as f:
+        templates = json.load(f)['observation_templates']
+    types = list(templates)
+    streams = []
+    for session in range(sessions):
+        rng = random.Random(seed * 100003 + session)
+        stream = []
+        for _ in range(length):
+            observation_type = rng.choice(types)
+            stream.append((observation_type, fill_template(templates[observation_type], rng)))
+        streams.append(stream)
+    return streams
+
+
+def percentiles(samples):
+    """p50/p95/p99 (nearest rank) and mean of a list of seconds"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": rank(50),
+        "p95": rank(95),
+        "p99": rank(99),
+    }
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB (None where unavailable).
+    This is the peak over the whole process lifetime, so it is reported once
+    for all runs rather than per run.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def make_assistant(args):
+    client = configure_api(api_url=args.api_url, api_key=args.api_key)
+    return ResearchAssistant(client=client, verbose=False, pipeline_mode=args.pipeline_mode)
+
+
+def run_assistant_sessions(args, sessions):
+    """Each session feeds its stream through its own ResearchAssistant, sessions run concurrently"""
+    streams = build_streams(sessions, args.observations, args.seed)
+    assistants = [make_assistant(args) for _ in range(sessions)]
+
+    def run_session(index):
+        assistant = assistants[index]
+        timings, errors = [], 0
+        for _, observation in streams[index]:
+            try:
+                assistant.process_observation(observation)
+                # Stages that made no model call were skipped (e.g. generate when not
+                # intervening); their near-zero times would drag the percentiles down
+                timings.append({stage: seconds for stage, seconds in assistant.stage_timings.items()
+                                if stage == "total" or stage in assistant.stage_models})
+            except Exception:
+                errors += 1
+        return timings, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        results = list(pool.map(run_session, range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    stage_samples = {stage: [] for stage in STAGES}
+    errors = 0
+    for timings, session_errors in results:
+        errors += session_errors
+        for timing in timings:
+            for stage, seconds in timing.items():
+                stage_samples.setdefault(stage, []).append(seconds)
+
+    for assistant in assistants:
+        assistant.close()
+
+    completed = len(stage_samples["total"])
+    return {
+        "sessions": sessions,
+        "observations": sessions * args.observations,
+        "completed": completed,
+        "errors": errors,
+        "wall_time": elapsed,
+        "obs_per_sec": completed / elapsed if elapsed else None,
+        "stages": {stage: percentiles(samples) for stage, samples in stage_samples.items() if samples},
+    }
+
+
+def run_bridge_sessions(args, sessions):
+    """Each session posts its stream through StudyBridge.handle_observation, as the browser does"""
+    streams = build_streams(sessions, args.observations, args.seed + 1)
+    bridges = []
+    for index in range(sessions):
+        session = StudySession("testing", f"bench_{index}", assistant=make_assistant(args))
+        bridges.append(StudyBridge(session, {"ai_enabled": True}, batch_window=args.batch_window,
+                                   min_pipeline_gap=args.min_gap))
+
+    def run_session(index):
+        latencies, errors = [], 0
+        for observation_type, observation in streams[index]:
+            start = time.perf_counter()
+            try:
+                bridges[index].handle_observation({"observation": observation, "type": observation_type,
+                                                   "context": {"readingSpeed": 2.0}})
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        results = list(pool.map(run_session, range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    for bridge in bridges:
+        bridge.session.close()
+    
+    latencies = [latency for session_latencies, _ in results for latency in session_latencies]
+    return {
+        "sessions": sessions,
+        "observations": sessions * args.observations,
+        "completed": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "wall_time": elapsed,
+        "obs_per_sec": len(latencies) / elapsed if elapsed else None,
+        "request_latency": percentiles(latencies),
+    }
+
+
+def git_revision():
+    """Commit of the code under test, to line results up between versions"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def format_stage_table(stages):
+    lines = [f"    {'stage':<10}{'p50':>9}{'p95':>9}{'p99':>9}"]
+    for stage in STAGES:
+        stats = stages.get(stage)
+        if stats:
+            lines.append(f"    {stage:<10}{stats['p50']:>8.3f}s{stats['p95']:>8.3f}s{stats['p99']:>8.3f}s")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the observation pipeline end to end')
+    parser.add_argument('--sessions', default='1,10,100', help='Comma-separated concurrent session counts')
+    parser.add_argument('--bridge-sessions', default='1,10', help='Session counts for the StudyBridge run')
+    parser.add_argument('--observations', type=int, default=10, help='Observations per session')
+    parser.add_argument('--pipeline-mode', choices=['staged', 'fused'], default='staged')
+    parser.add_argument('--batch-window', type=float, default=0.25, help='StudyBridge micro-batch window')
+    parser.add_argument('--min-gap', type=float, default=0.0,
+                        help='StudyBridge seconds between pipeline starts (the study uses 2; 0 measures the pipeline)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for streams and the fake backend')
+    parser.add_argument('--api-url', help='OpenAI-compatible API to benchmark (default: local fake backend)')
+    parser.add_argument('--api-key', default='fake', help='API key for --api-url')
+    parser.add_argument('--latency', type=float, default=0.2, help='Fake backend mean latency')
+    parser.add_argument('--jitter', type=float, default=0.05, help='Fake backend latency spread')
+    parser.add_argument('--distribution', default='lognormal', help='Fake backend latency distribution')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fake backend error rate')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    server = None
+    backend = {"api_url": args.api_url}
+    if not args.api_url:
+        config = FakeLLMConfig(latency=args.latency, jitter=args.jitter, distribution=args.distribution,
+                               error_rate=args.error_rate, seed=args.seed)
+        server = start_fake_llm_server(config)
+        args.api_url = server.url
+        backend = {"fake": True, "latency": args.latency, "jitter": args.jitter,
+                   "distribution": args.distribution, "error_rate": args.error_rate}
+
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pipeline_mode": args.pipeline_mode,
+        "observations_per_session": args.observations,
+        "backend": backend,
+        "assistant": [],
+        "bridge": [],
+    }
+
+    try:
+        for sessions in [int(n) for n in args.sessions.split(',') if n]:
+            print(f"ResearchAssistant, {sessions} concurrent session(s)...")
+            with contextlib.redirect_stdout(io.StringIO()):
+                run = run_assistant_sessions(args, sessions)
+            results["assistant"].append(run)
+            print(f"  {run['obs_per_sec']:.2f} obs/s, {run['errors']} errors")
+            print(format_stage_table(run["stages"]))
+
+        for sessions in [int(n) for n in args.bridge_sessions.split(',') if n]:
+            print(f"StudyBridge.handle_observation, {sessions} concurrent session(s)...")
+            with contextlib.redirect_stdout(io.StringIO()):
+                run = run_bridge_sessions(args, sessions)
+            results["bridge"].append(run)
+            latency = run["request_latency"]
+            print(f"  {run['obs_per_sec']:.2f} obs/s, p50 {latency['p50']:.3f}s, p95 {latency['p95']:.3f}s, "
+                  f"p99 {latency['p99']:.3f}s, {run['errors']} errors")
+    finally:
+        if server is not None:
+            results["backend"]["served"] = server.get_stats()
+            server.stop()
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    if results["peak_rss_mb"] is not None:
+        print(f"Peak RSS: {results['peak_rss_mb']:.1f} MB")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
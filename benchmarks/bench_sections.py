@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Section-level rendering in MarkdownBrowser.py: correctness and re-render time
+
+Checks that MarkdownRenderer._convert_sections produces the same HTML as
+converting the whole document, for the sample paper, the README and a set
+of edge cases (headings inside fences, $$ blocks, raw HTML blocks and
+comments, [TOC], reference links), both on a fresh render and after editing
+one paragraph. Blank lines between blocks are ignored in the comparison.
+Then reports how long a re-render after a one-paragraph edit takes compared
+with converting the whole document.
+
+Usage:
+    python benchmarks/bench_sections.py
+    python benchmarks/bench_sections.py --file SamplePaper.md --repeat 10
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from MarkdownBrowser import MarkdownRenderer, PluginSystem
+
+EDGE_CASES = {
+    "heading in raw html": "<div>\n# inside\n\npara\n</div>\n\n# After\n\ntext\n",
+    "heading in nested raw html": "# A\n\n<div><div>\n# x\n</div>\n# still inside\n</div>\n\n# B\n\ntext\n",
+    "heading in comment": "<!--\n# hidden\n-->\n\n# Shown\n\nx\n",
+    "heading after inline comment": "# A\n\ntext <!-- note --> more\n\n# B\n\ny\n",
+    "unclosed raw html": "# A\n\n<div>\n# not a heading\n",
+    "toc marker": "[TOC]\n\n# A\n\n## B\n\nx\n",
+    "heading in fence": "# A\n\n```\n# comment\n```\n\n# B\n\ny\n",
+    "heading in math": "# A\n\n$$\n# x\n$$\n\n# B\n\ny\n",
+    "reference link": "# A\n\nSee [the paper][p].\n\n# B\n\n[p]: https://example.org\n",
+    "horizontal rule": "# A\n\n<hr>\n\n# B\n\ny\n",
+}
+
+
+def normalize(html):
+    """HTML without the blank lines between blocks"""
+    return "\n".join(line for line in html.split("\n") if line.strip())
+
+
+def edit_one_paragraph(text):
+    """The document with a word appended to the paragraph line nearest the middle"""
+    lines = text.split("\n")
+    middle = len(lines) // 2
+    for offset in range(len(lines)):
+        for index in (middle + offset, middle - offset):
+            if 0 <= index < len(lines) and lines[index][:1].isalpha():
+                lines[index] += " edited"
+                return "\n".join(lines)
+    return text + "\n\nedited\n"
+
+
+def check(renderer, text):
+    """Whether sectioned output matches whole-document output, fresh and after an edit"""
+    renderer._sections = {}
+    fresh = normalize(renderer._convert_sections(text)) == normalize(renderer._convert(text))
+    edited_text = edit_one_paragraph(text)
+    edited = normalize(renderer._convert_sections(edited_text)) == normalize(renderer._convert(edited_text))
+    return fresh and edited
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check and time section-level markdown rendering')
+    parser.add_argument('--file', action='append', help='Markdown file to check (default: SamplePaper.md, README.md)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per timing (best is reported)')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    renderer = MarkdownRenderer(PluginSystem())
+    documents = {}
+    for path in args.file or ['SamplePaper.md', 'README.md']:
+        with open(os.path.join(ROOT, path), 'r', encoding='utf-8') as f:
+            documents[path] = f.read()
+    documents.update(EDGE_CASES)
+
+    mismatches = []
+    for name, text in documents.items():
+        if not check(renderer, text):
+            mismatches.append(name)
+            print(f"Mismatch: {name}")
+    print(f"Checked {len(documents)} documents, {len(mismatches)} mismatches")
+
+    timings = []
+    print(f"{'document':<20}{'sections':>9}{'whole':>10}{'edit':>10}{'speedup':>9}")
+    for path in args.file or ['SamplePaper.md', 'README.md']:
+        text = documents[path]
+        edited_text = edit_one_paragraph(text)
+        whole = best_of(lambda: renderer._convert(text), args.repeat)
+
+        def rerender():
+            renderer._sections = {}
+            renderer._convert_sections(text)
+            start = time.perf_counter()
+            renderer._convert_sections(edited_text)
+            return time.perf_counter() - start
+
+        edit = min(rerender() for _ in range(args.repeat))
+        sections = renderer.last_render_stats["sections"]
+        timings.append({"document": path, "sections": sections, "whole_seconds": whole, "edit_seconds": edit})
+        print(f"{path:<20}{sections:>9}{whole * 1000:>8.1f}ms{edit * 1000:>8.1f}ms{whole / edit:>8.1f}x")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"mismatches": mismatches, "timings": timings}, f, indent=2)
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
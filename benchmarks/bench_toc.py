@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for the header ID and TOC pass in MarkdownBrowser.py
+
+Generates synthetic rendered documents with thousands of headings (mixed
+levels, inline markup, some with IDs already set), checks that
+MarkdownRenderer._process_headers_and_build_toc produces the same HTML and
+TOC as the original splice-per-header implementation, and reports how the
+time of both grows with the number of headings.
+
+Usage:
+    python benchmarks/bench_toc.py
+    python benchmarks/bench_toc.py --headings 1000,4000,8000 --paragraph-words 80
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from MarkdownBrowser import MarkdownRenderer, PluginSystem
+
+WORDS = ["agent", "policy", "reward", "menu", "interface", "user", "learning", "belief", "state",
+         "action", "hierarchical", "adaptive", "model", "$Q(s, a)$", "evaluation", "layout"]
+
+
+def legacy_process_headers_and_build_toc(renderer, html_content):
+    """The original implementation, kept here as the reference"""
+    header_pattern = r'<h([1-6])([^>]*)>(.+?)</h\1>'
+    headers = list(re.finditer(header_pattern, html_content, re.DOTALL))
+
+    if not headers:
+        return html_content, ''
+
+    toc_items = []
+    modified_html = html_content
+    offset = 0
+
+    for match in headers:
+        level = int(match.group(1))
+        attrs = match.group(2)
+        content = match.group(3)
+
+        clean_text = re.sub(r'<[^>]+>', '', content).strip()
+        clean_text = re.sub(r'\s+', ' ', clean_text)
+
+        id_match = re.search(r'id="([^"]+)"', attrs)
+        if id_match:
+            header_id = id_match.group(1)
+        else:
+            header_id = clean_text.lower()
+            header_id = re.sub(r'[^\w\s-]', '', header_id)
+            header_id = re.sub(r'[-\s]+', '-', header_id).strip('-')
+
+            new_header = f'<h{level}{attrs} id="{header_id}">{content}</h{level}>'
+            start = match.start() + offset
+            end = match.end() + offset
+            modified_html = modified_html[:start] + new_header + modified_html[end:]
+            offset += len(new_header) - len(match.group(0))
+
+        toc_items.append({
+            'level': level,
+            'id': header_id,
+            'text': clean_text
+        })
+
+    return modified_html, renderer._build_toc_html(toc_items)
+
+
+def build_document(headings, paragraph_words, seed=0):
+    """Rendered HTML with the given number of headings, each followed by a paragraph"""
+    rng = random.Random(seed)
+    parts = []
+    level = 1
+    for index in range(headings):
+        level = max(1, min(6, level + rng.choice((-1, 0, 0, 1))))
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6)))
+        if rng.random() < 0.2:
+            title = f"<em>{title}</em> &amp; <code>{rng.choice(WORDS)}</code>"
+        attrs = f' id="h-{index}"' if rng.random() < 0.3 else (' class="numbered"' if rng.random() < 0.2 else '')
+        parts.append(f"<h{level}{attrs}>{index} {title}</h{level}>")
+        parts.append("<p>" + " ".join(rng.choice(WORDS) for _ in range(paragraph_words)) + "</p>")
+    return "\n".join(parts)
+
+
+def measure(func, renderer, document, repeat):
+    """Best time of repeat runs, in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(renderer, document)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the header ID and TOC pass')
+    parser.add_argument('--headings', default='500,1000,2000,4000,8000', help='Comma-separated heading counts')
+    parser.add_argument('--paragraph-words', type=int, default=40, help='Words in the paragraph after each heading')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per implementation (best is reported)')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    renderer = MarkdownRenderer(PluginSystem())
+
+    def linear(renderer, document):
+        return renderer._process_headers_and_build_toc(document)
+
+    results = []
+    mismatches = 0
+    print(f"{'headings':>9}{'size':>10}{'legacy':>11}{'single-pass':>13}{'speedup':>9}{'us/heading':>12}")
+    for headings in [int(n) for n in args.headings.split(',') if n]:
+        document = build_document(headings, args.paragraph_words)
+
+        # Both passes must produce the same HTML and TOC
+        if linear(renderer, document) != legacy_process_headers_and_build_toc(renderer, document):
+            mismatches += 1
+            print(f"Mismatch at {headings} headings")
+
+        legacy_time = measure(legacy_process_headers_and_build_toc, renderer, document, args.repeat)
+        linear_time = measure(linear, renderer, document, args.repeat)
+        results.append({
+            "headings": headings,
+            "document_bytes": len(document),
+            "legacy_seconds": legacy_time,
+            "single_pass_seconds": linear_time,
+            "speedup": legacy_time / linear_time,
+        })
+        print(f"{headings:>9}{len(document) / 1024:>8.0f}KB{legacy_time * 1000:>9.1f}ms"
+              f"{linear_time * 1000:>11.1f}ms{legacy_time / linear_time:>8.1f}x"
+              f"{linear_time / headings * 1e6:>12.2f}")
+
+    print(f"Mismatches: {mismatches}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"paragraph_words": args.paragraph_words, "runs": results, "mismatches": mismatches},
+                      f, indent=2)
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,32 +5,56 @@ Empirical Study System for Research Paper Reading Assistant
 Usage:
     python empirical_study.py --mode testing
     python empirical_study.py --mode evaluation --participant-id P001
+    python empirical_study.py --mode testing --trace   # write data/traces/<session_id>.json
+    python empirical_study.py --mode testing --profile # write data/profiles/<session_id>/
 """
 
 import argparse
 import json
 import os
+import threading
 import time
 import uuid
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
 import webbrowser
 from http.server import BaseHTTPRequestHandler
 import urllib.parse
 
 # Import existing modules
-from MarkdownBrowser import DirectMarkdownBrowser, Plugin
-from ReaderAI import ResearchAssistant
+from MarkdownBrowser import DirectMarkdownBrowser, Job, Plugin
+from telemetry import Profiler, get_registry, get_tracer, traced
+from ReaderAI import (AsyncResearchAssistant, ResearchAssistant, ResponseCache, HTTPTransport, set_default_transport,
+                      LatencyBudget, HedgingPolicy, ModelRouter)
+
+
+# Bridge metrics, served by the browser at /api/metrics
+_METRICS = get_registry()
+_OBSERVATIONS = _METRICS.counter("study_observations_total", "Observations received from the browser",
+                                 ("type", "result"))
+_BATCH_SIZE = _METRICS.histogram("study_batch_observations", "Observations per AI pipeline run", (),
+                                 buckets=(1, 2, 3, 4, 6, 8, 12, 16))
+_AI_SECONDS = _METRICS.histogram("study_ai_processing_seconds", "Time of each AI pipeline run in the bridge")
 
 
 class StudySession:
-    """Manages a single study session"""
+    """
+    Manages a single study session.
+    
+    The browser calls in from several worker threads, so the interaction log
+    and metrics are only changed under the session lock.
+    """
     
-    def __init__(self, mode: str, participant_id: str = None):
+    def __init__(self, mode: str, participant_id: str = None, pipeline_mode: str = "staged",
+                 cache: ResponseCache = None, cached_agents: list = None,
+                 latency_budget: LatencyBudget = None, hedging: HedgingPolicy = None,
+                 router: ModelRouter = None, assistant: ResearchAssistant = None,
+                 observation_capacity: int = 64, intervention_capacity: int = 32, spill_dir: str = None):
         self.mode = mode
         self.participant_id = participant_id or f"test_{uuid.uuid4().hex[:8]}"
         self.session_id = f"{self.participant_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         self.start_time = datetime.now()
+        self._lock = threading.RLock()
         self.interactions = []
         self.metrics = {
             "total_reading_time": 0,
@@ -39,49 +63,82 @@ class StudySession:
             "interventions_accepted": 0,
             "interventions_rejected": 0,
             "pauses_detected": 0,
-            "rereading_detected": 0
+            "rereading_detected": 0,
+            "cancelled_pipelines": 0
         }
         
-        # Initialize AI assistant
-        self.assistant = ResearchAssistant(verbose=False)
+        # Initialize AI assistant (unless one is given, e.g. on a local backend)
+        self.assistant = assistant or ResearchAssistant(verbose=False, pipeline_mode=pipeline_mode,
+                                                        cache=cache, cached_agents=cached_agents,
+                                                        latency_budget=latency_budget, hedging=hedging,
+                                                        router=router,
+                                                        observation_capacity=observation_capacity,
+                                                        intervention_capacity=intervention_capacity,
+                                                        spill_dir=spill_dir)
         
         # Create data directory
         os.makedirs("data/sessions", exist_ok=True)
         
     def log_interaction(self, interaction_type: str, data: Dict):
         """Log an interaction with timestamp"""
-        self.interactions.append({
-            "timestamp": datetime.now().isoformat(),
-            "type": interaction_type,
-            "data": data
-        })
+        with self._lock:
+            self.interactions.append({
+                "timestamp": datetime.now().isoformat(),
+                "type": interaction_type,
+                "data": data
+            })
         
-    def process_observation(self, observation: str) -> Optional[Dict]:
+    def increment_metric(self, name: str, amount: int = 1):
+        """Add to a session metric"""
+        with self._lock:
+            self.metrics[name] += amount
+        
+    def process_observation(self, observation: str, on_delta: Callable[[str], None] = None) -> Optional[Dict]:
         """Process observation through AI and return response"""
-        response = self.assistant.process_observation(observation)
+        return self.process_observation_batch([observation], on_delta)
+    
+    def process_observation_batch(self, observations: List[str], on_delta: Callable[[str], None] = None,
+                                  priority: int = 0) -> Optional[Dict]:
+        """
+        Process a burst of observations through AI in one run and return response.
+        
+        A newer batch with at least this priority cancels this one while it
+        is in flight; the cancelled run returns None.
+        """
+        response = self.assistant.process_observation_batch(observations, on_delta, priority)
+        with self._lock:
+            self.metrics["cancelled_pipelines"] = self.assistant.cancelled_pipelines
         
         if response:
-            self.metrics["ai_interventions"] += 1
-            self.log_interaction("ai_response", {
-                "observation": observation,
+            self.increment_metric("ai_interventions")
+            interaction = {
+                "observation": observations[-1],
                 "response": response
-            })
+            }
+            if len(observations) > 1:
+                interaction["batch"] = observations
+            self.log_interaction("ai_response", interaction)
             return {"response": response, "type": "suggestion"}
         
         return None
+    
+    def cancel_observation_batch(self, observations: List[str]) -> bool:
+        """Cancel the AI run of this batch if it is in flight; its process_observation_batch returns None"""
+        return self.assistant.cancel_pipeline(observations)
         
     def record_feedback(self, helpful: bool):
         """Record user feedback on intervention"""
-        if helpful:
-            self.metrics["interventions_accepted"] += 1
-        else:
-            self.metrics["interventions_rejected"] += 1
+        self.increment_metric("interventions_accepted" if helpful else "interventions_rejected")
             
         self.log_interaction("user_feedback", {"helpful": helpful})
         
+    @traced(cat="session")
     def save_session(self):
         """Save session data to file"""
-        self.metrics["total_reading_time"] = (datetime.now() - self.start_time).total_seconds()
+        with self._lock:
+            self.metrics["total_reading_time"] = (datetime.now() - self.start_time).total_seconds()
+            metrics = dict(self.metrics)
+            interactions = list(self.interactions)
         
         session_data = {
             "session_id": self.session_id,
@@ -89,8 +146,8 @@ class StudySession:
             "mode": self.mode,
             "start_time": self.start_time.isoformat(),
             "end_time": datetime.now().isoformat(),
-            "metrics": self.metrics,
-            "interactions": self.interactions,
+            "metrics": metrics,
+            "interactions": interactions,
             "ai_memory": self.assistant.get_memory_state()
         }
         
@@ -100,6 +157,10 @@ class StudySession:
             
         print(f"Session saved to: {filename}")
         return filename
+    
+    def close(self):
+        """Release the assistant's temporary files once the session has been saved for the last time"""
+        self.assistant.close()
         
     def generate_report(self):
         """Generate analysis report for evaluation mode"""
@@ -118,6 +179,7 @@ class StudySession:
 - **Sections Completed**: {self.metrics['sections_completed']}
 - **Pauses Detected**: {self.metrics['pauses_detected']}
 - **Re-reading Instances**: {self.metrics['rereading_detected']}
+- **Cancelled (Superseded) AI Runs**: {self.metrics['cancelled_pipelines']}
 
 ## AI Assistant Performance
 - **Total Interventions**: {self.metrics['ai_interventions']}
@@ -141,16 +203,229 @@ class StudySession:
         print("Report generated: study_report.md")
 
 
+class _Batch:
+    """Observations collected into one pipeline run"""
+    
+    def __init__(self):
+        self.created = time.monotonic()
+        self.observations: List[str] = []
+        self.owners: List[int] = []
+        self.priority = 0
+        self.on_delta: Optional[Callable[[str], None]] = None
+        self.cancelled: Optional[threading.Event] = None
+        self.done = False
+        self.result: Optional[Dict] = None
+        self.error: Optional[BaseException] = None
+
+
+class ObservationBatcher:
+    """
+    Micro-batcher that turns bursts of observations into single pipeline runs.
+    
+    A batch starts as soon as nothing is being processed, so a lone
+    observation goes straight through. While an earlier batch is still being
+    processed, the first request of the next batch waits `window` seconds to
+    collect more observations (no more than `max_size`); that batch then
+    supersedes the running one unless it is less important. Batch starts are
+    at least `min_gap` seconds apart, so a stream of events does not trigger
+    back-to-back pipeline runs. Each batch is processed with the highest
+    priority among its observations. The response goes to the request that
+    submitted the newest observation; the other requests of the batch get
+    None. So that request alone can cancel the batch (see cancel).
+    """
+    
+    def __init__(self, process_batch: Callable[[List[str], Optional[Callable[[str], None]], int], Optional[Dict]],
+                 window: float = 0.25, max_size: int = 8,
+                 cancel_batch: Optional[Callable[[List[str]], bool]] = None, min_gap: float = 2.0):
+        self.process_batch = process_batch
+        self.cancel_batch = cancel_batch  # Stops a process_batch call in flight, given its observations
+        self.window = window
+        self.max_size = max_size
+        self.min_gap = min_gap
+        self._cond = threading.Condition()
+        self._pending: Optional[_Batch] = None
+        self._running: List[_Batch] = []
+        self._last_start: Optional[float] = None
+        self._next_owner = 0
+        
+    def submit(self, observations: List[str], on_delta: Callable[[str], None] = None,
+               priority: int = 0, cancelled: Optional[threading.Event] = None) -> Optional[Dict]:
+        """
+        Add one request's observations and block until their batch is processed.
+        
+        `cancelled` is set once the request has been abandoned; passed to
+        cancel as well, it stops the batch if this request owns its newest
+        observation.
+        """
+        with self._cond:
+            batch = self._pending
+            leader = batch is None
+            if leader:
+                batch = self._pending = _Batch()
+            owner = self._next_owner
+            self._next_owner += 1
+            batch.observations.extend(observations)
+            batch.owners.extend([owner] * len(observations))
+            batch.priority = max(batch.priority, priority)
+            batch.on_delta = on_delta
+            batch.cancelled = cancelled
+            if len(batch.observations) >= self.max_size:
+                self._seal(batch)
+                
+            if not leader:
+                while not batch.done:
+                    self._cond.wait()
+                return self._result_for(batch, owner)
+            
+            # Woken when a batch finishes, so a batch waiting on a running one starts once it is done
+            while True:
+                remaining = self._start_time(batch) - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            self._seal(batch)
+            self._running.append(batch)
+            self._last_start = time.monotonic()
+            
+        try:
+            # Sealed, so on_delta and cancelled are those of the request owning the newest observation
+            if batch.cancelled is None or not batch.cancelled.is_set():
+                batch.result = self.process_batch(batch.observations, batch.on_delta, batch.priority)
+        except BaseException as e:
+            batch.error = e
+        finally:
+            with self._cond:
+                self._running.remove(batch)
+                batch.done = True
+                self._cond.notify_all()
+                
+
+        return self._result_for(batch, owner)
+    
+    def cancel(self, cancelled: threading.Event) -> bool:
+        """
+        Stop the batch in flight whose newest observation came from the
+        request with this `cancelled` event (set it first, so a batch still
+        being collected is skipped instead). False if there is none.
+        """
+        with self._cond:
+            batches = [batch for batch in self._running if batch.cancelled is cancelled]
+        if not batches or self.cancel_batch is None:
+            return False
+        return self.cancel_batch(batches[0].observations)
+    
+    def _start_time(self, batch: _Batch) -> float:
+        """When a batch may start (caller holds the condition)"""
+        start = batch.created
+        if self._running and self._pending is batch:
+            # Collect more observations while the running batch is processed, unless already full
+            start += self.window
+        if self._last_start is not None:
+            start = max(start, self._last_start + self.min_gap)
+        return start
+    
+    def _seal(self, batch: _Batch):
+        """Stop adding to a batch (caller holds the condition)"""
+        if self._pending is batch:
+            self._pending = None
+        self._cond.notify_all()
+        
+    def _result_for(self, batch: _Batch, owner: int) -> Optional[Dict]:
+        """The batch's response for the request that owns its newest observation"""
+        if batch.owners[-1] != owner:
+            return None
+        if batch.error is not None:
+            raise batch.error
+        return batch.result
+
+
 class StudyBridge:
     """Bridge between browser and AI assistant"""
     
-    def __init__(self, session: StudySession, config: Dict):
+    # How strongly each observation type calls for a fresh answer. A newer
+    # batch cancels the AI run in flight unless that run is more important.
+    DEFAULT_PRIORITIES = {
+        "section_start": 3,
+        "selection": 3,
+        "section_complete": 2,
+        "reread": 2,
+        "pause": 2,
+        "slow_reading": 2,
+        "hover": 1,
+        "focus_return": 1,
+        "general": 1,
+        "rapid_scroll": 0,
+        "focus_lost": 0
+    }
+    
+    def __init__(self, session: StudySession, config: Dict, batch_window: float = 0.25,
+                 max_batch_size: int = 8, priorities: Optional[Dict[str, int]] = None,
+                 min_pipeline_gap: float = 2.0):
         self.session = session
         self.config = config
-        self.last_observation_time = time.time()
-        
-    def handle_observation(self, data: Dict) -> Dict:
-        """Handle observation from browser"""
+        self.priorities = dict(self.DEFAULT_PRIORITIES)
+        if priorities:
+            self.priorities.update(priorities)
+        self.batcher = ObservationBatcher(self._run_batch, batch_window, max_batch_size,
+                                          cancel_batch=session.cancel_observation_batch,
+                                          min_gap=min_pipeline_gap)
+        
+    @traced(cat="bridge")
+    def handle_observation(self, data: Dict, cancelled: Optional[threading.Event] = None,
+                           on_delta: Callable[[str], None] = None) -> Dict:
+        """
+        Handle observation (or a batch under "observations") from browser.
+        
+        on_delta receives pieces of the response text as they are generated,
+        if this request's observation is the newest of its batch.
+        """
+        observation_texts = self._accept_observations(data)
+        
+        if observation_texts:
+            ai_response = self._process_through_ai(observation_texts, on_delta, priority=self._priority_of(data),
+                                                   cancelled=cancelled)
+            if ai_response:
+                return ai_response
+                
+        return {"response": None}
+    
+    def observation_job(self, data: Dict, stream: bool = False) -> Job:
+        """
+        handle_observation as a browser Job; cancelling the job cancels its AI
+        run. With stream, the response text is published as "delta" events on
+        the job's event stream while it is generated.
+        """
+        cancelled = threading.Event()
+        on_delta = (lambda text: job.publish("delta", {"text": text})) if stream else None
+        job = Job(self.handle_observation, data, cancelled, on_delta,
+                  on_cancel=lambda: self.cancel_observation(cancelled))
+        return job
+    
+    def cancel_observation(self, cancelled: threading.Event):
+        """Abandon the request with this event: skip its batch, or stop the AI run it owns"""
+        cancelled.set()
+        if self.batcher.cancel(cancelled):
+            print("[Bridge] Cancelled the AI run of an abandoned request")
+    
+    @traced(cat="bridge")
+    def _accept_observations(self, data: Dict) -> List[str]:
+        """Log a request's observations and return the texts that should go through the AI"""
+        items = data.get('observations')
+        if not isinstance(items, list):
+            items = [data]
+        texts = [self._accept_observation(item) for item in items if isinstance(item, dict)]
+        return [text for text in texts if text is not None]
+        
+    def _priority_of(self, data: Dict) -> int:
+        """Highest priority among a request's observations"""
+        items = data.get('observations')
+        if not isinstance(items, list):
+            items = [data]
+        return max((self.priorities.get(item.get('type', 'general'), 1)
+                    for item in items if isinstance(item, dict)), default=1)
+        
+    def _accept_observation(self, data: Dict) -> Optional[str]:
+        """Log an observation and return its text if it should go through the AI"""
         observation_text = data.get('observation', '')
         observation_type = data.get('type', 'general')
         
@@ -162,34 +437,49 @@ class StudyBridge:
         
         # Update metrics based on observation type
         if observation_type == 'pause':
-            self.session.metrics['pauses_detected'] += 1
+            self.session.increment_metric('pauses_detected')
         elif observation_type == 'reread':
-            self.session.metrics['rereading_detected'] += 1
+            self.session.increment_metric('rereading_detected')
         elif observation_type == 'section_complete':
-            self.session.metrics['sections_completed'] += 1
+            self.session.increment_metric('sections_completed')
             
-        # Check if enough time has passed since last observation
-        current_time = time.time()
-        time_gap = current_time - self.last_observation_time
-        
-        # Process through AI if appropriate
-        if self.config.get('ai_enabled', True) and time_gap > 2.0:  # 2 second minimum gap
-            self.last_observation_time = current_time
-            
-            print(f"[Bridge] Processing through AI (time gap: {time_gap:.1f}s)")
-            start_time = time.time()
-            
-            ai_response = self.session.process_observation(observation_text)
-            
-            processing_time = time.time() - start_time
-            print(f"[Bridge] AI processing took {processing_time:.1f}s")
+        # Feed the browser's scroll speed into the per-section reading speed average
+        reading_speed = (data.get('context') or {}).get('readingSpeed')
+        if isinstance(reading_speed, (int, float)) and reading_speed > 0:
+            self.session.assistant.memory.reading_metrics.record_reading_speed(reading_speed)
             
-            if ai_response:
-                return ai_response
-        else:
-            print(f"[Bridge] Skipping AI (time gap: {time_gap:.1f}s, AI enabled: {self.config.get('ai_enabled', True)})")
-                
-        return {"response": None}
+        # Process through AI if appropriate
+        type_label = observation_type if observation_type in self.priorities else "other"
+        if self.config.get('ai_enabled', True):
+            _OBSERVATIONS.inc(type=type_label, result="accepted")
+            return observation_text
+        
+        _OBSERVATIONS.inc(type=type_label, result="skipped")
+        print("[Bridge] Skipping AI (AI disabled)")
+        return None
+    
+    def _process_through_ai(self, observation_texts: List[str], on_delta: Callable[[str], None] = None,
+                            priority: int = 1, cancelled: Optional[threading.Event] = None) -> Optional[Dict]:
+        """Queue accepted observations for the next batch and wait for its response"""
+        return self.batcher.submit(observation_texts, on_delta, priority, cancelled)
+    
+    @traced(cat="bridge")
+    def _run_batch(self, observation_texts: List[str], on_delta: Callable[[str], None] = None,
+                   priority: int = 1) -> Optional[Dict]:
+        """Run one batch of observations through the AI and report timings"""
+        print(f"[Bridge] Processing {len(observation_texts)} observation(s) through AI (priority {priority})")
+        start_time = time.time()
+        
+        ai_response = self.session.process_observation_batch(observation_texts, on_delta, priority)
+        
+        processing_time = time.time() - start_time
+        _AI_SECONDS.observe(processing_time)
+        _BATCH_SIZE.observe(len(observation_texts))
+        stage_times = ", ".join(f"{stage}={seconds:.1f}s"
+                                for stage, seconds in self.session.assistant.stage_timings.items())
+        print(f"[Bridge] AI processing took {processing_time:.1f}s ({stage_times})")
+        
+        return ai_response
         
     def handle_feedback(self, data: Dict) -> Dict:
         """Handle user feedback on AI response"""
@@ -246,7 +536,8 @@ def create_study_plugin(bridge: StudyBridge, config: Dict) -> Plugin:
     
     # API endpoints
     def observation_endpoint(data):
-        return bridge.handle_observation(data)
+        # Runs for as long as the AI pipeline; answered with a job id instead of holding the request
+        return bridge.observation_job(data)
         
     def feedback_endpoint(data):
         return bridge.handle_feedback(data)
@@ -254,6 +545,10 @@ def create_study_plugin(bridge: StudyBridge, config: Dict) -> Plugin:
     def control_endpoint(data):
         return bridge.handle_session_control(data)
     
+    def observation_stream_endpoint(data):
+        # Same job, with the response text published on its event stream as it is generated
+        return bridge.observation_job(data, stream=True)
+    
     return Plugin(
         name="reading-study",
         html_content=widget_html,
@@ -262,7 +557,8 @@ def create_study_plugin(bridge: StudyBridge, config: Dict) -> Plugin:
         api_endpoints={
             'observe': observation_endpoint,
             'feedback': feedback_endpoint,
-            'control': control_endpoint
+            'control': control_endpoint,
+            'observe_stream': observation_stream_endpoint
         }
     )
 
@@ -326,6 +622,10 @@ def main():
                        help='Study mode: testing or evaluation')
     parser.add_argument('--participant-id', type=str, 
                        help='Participant ID (required for evaluation mode)')
+    parser.add_argument('--trace', action='store_true',
+                       help='Record a Chrome trace of the session (see "tracing" in study_config.json)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Profile observation processing and page rendering into data/profiles/')
     
     args = parser.parse_args()
     
@@ -343,12 +643,77 @@ def main():
     if mode_config.get('show_intro', False):
         show_intro_page(args.mode)
         
-    # Create session
-    session = StudySession(args.mode, args.participant_id)
-    bridge = StudyBridge(session, mode_config)
+    # Shared connection pool for all LLM calls
+    transport_config = config.get('http_transport')
+    if transport_config:
+        set_default_transport(HTTPTransport(**transport_config))
+        
+    # Shared LLM response cache
+    cache_config = config.get('llm_cache', {})
+    cache = None
+    if cache_config.get('enabled', False):
+        cache = ResponseCache(
+            path=cache_config.get('path'),
+            max_memory_entries=cache_config.get('max_memory_entries', 256),
+            max_disk_entries=cache_config.get('max_disk_entries', 10000),
+            ttl=cache_config.get('ttl')
+        )
+        
+    # Per-observation deadline and request hedging
+    latency_config = config.get('latency', {})
+    latency_budget = LatencyBudget(latency_config.get('budget_seconds', 45.0),
+                                   latency_config.get('stage_weights'))
+    hedging = None
+    hedging_config = latency_config.get('hedging', {})
+    if hedging_config.get('enabled', False):
+        hedging = HedgingPolicy(
+            percentile=hedging_config.get('percentile', 90.0),
+            min_samples=hedging_config.get('min_samples', 20)
+        )
+        
+    # Per-agent model routing
+    routing_config = config.get('model_routing', {})
+    router = ModelRouter(percentile=routing_config.get('percentile', 90.0))
+    for agent_name, route in routing_config.get('routes', {}).items():
+        router.set_route(agent_name, route['primary'], route.get('fallbacks', []))
+        
+    # Create session (older memory entries spill to disk beyond these capacities)
+    memory_config = config.get('memory', {})
+    session = StudySession(args.mode, args.participant_id,
+                           pipeline_mode=config['ai_behavior'].get('pipeline_mode', 'staged'),
+                           cache=cache, cached_agents=cache_config.get('agents'),
+                           latency_budget=latency_budget, hedging=hedging, router=router,
+                           observation_capacity=memory_config.get('observation_capacity', 64),
+                           intervention_capacity=memory_config.get('intervention_capacity', 32),
+                           spill_dir=memory_config.get('spill_dir'))
+    bridge = StudyBridge(session, mode_config,
+                         batch_window=config['ai_behavior'].get('batch_window', 0.25),
+                         max_batch_size=config['ai_behavior'].get('max_batch_size', 8),
+                         min_pipeline_gap=config['ai_behavior'].get('min_pipeline_gap', 2.0),
+                         priorities=config['ai_behavior'].get('observation_priorities'))
+    
+    # Per-session span trace (opens in chrome://tracing or ui.perfetto.dev)
+    tracing_config = config.get('tracing', {})
+    tracer = get_tracer()
+    if args.trace or tracing_config.get('enabled', False):
+        trace_dir = tracing_config.get('directory', 'data/traces')
+        tracer.start(os.path.join(trace_dir, f"{session.session_id}.json"))
+    
+    # CPU profile of observation processing and page rendering
+    profiler = None
+    if args.profile:
+        profiler = Profiler(os.path.join('data/profiles', session.session_id))
+        # The pipeline coroutine, profiled on the ReaderAI loop thread where its work runs
+        # (ResearchAssistant's sync methods would only show the calling thread waiting)
+        profiler.wrap(AsyncResearchAssistant, '_run_pipeline')
+        profiler.wrap(DirectMarkdownBrowser, 'get_page')
+        profiler.start()
     
     # Create and configure browser
-    browser = DirectMarkdownBrowser()
+    browser_config = config.get('browser', {})
+    browser = DirectMarkdownBrowser(max_workers=browser_config.get('max_workers', 16),
+                                    keepalive_timeout=browser_config.get('keepalive_timeout', 5.0),
+                                    job_workers=browser_config.get('job_workers', 8))
     browser.load_markdown_file('SamplePaper.md')
     
     # Register study plugin
@@ -367,6 +732,7 @@ def main():
     finally:
         # Save session data
         filename = session.save_session()
+        session.close()
         
         # Generate report and show feedback for evaluation mode
         if args.mode == 'evaluation':
@@ -374,6 +740,17 @@ def main():
             if mode_config.get('show_feedback', False):
                 show_feedback_page(session.session_id)
                 
+        if cache:
+            print(f"💾 LLM cache: {cache.get_stats()}")
+            cache.close()
+            
+        trace_file = tracer.stop()
+        if trace_file:
+            print(f"🔍 Trace saved to: {trace_file}")
+            
+        if profiler:
+            print(f"⏱️  Profile saved to: {', '.join(profiler.stop())}")
+                
         print(f"\n✅ Study session completed")
         print(f"📁 Data saved to: {filename}")
 
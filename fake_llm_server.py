@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+fake_llm_server.py - Local OpenAI-compatible stand-in for benchmarking
+
+Serves /v1/chat/completions with schema-valid JSON replies for each of the
+ReaderAI agents (observation analyzer, user state inferencer, intervention
+planner, response generator and the fused pipeline agent), with configurable
+latency distribution, streaming token rate, error rate and usage counts.
+Replies are seeded, so benchmark runs are reproducible and need no API key.
+
+Usage:
+    python fake_llm_server.py --port 8765 --latency 0.8 --jitter 0.3
+    python fake_llm_server.py --distribution lognormal --error-rate 0.02
+
+As a module:
+    from fake_llm_server import FakeLLMConfig, start_fake_llm_server
+    from ReaderAI import ResearchAssistant, configure_api
+
+    server = start_fake_llm_server(FakeLLMConfig(latency=0.2))
+    assistant = ResearchAssistant(client=configure_api(api_url=server.url, api_key="fake"))
+    ...
+    server.stop()
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field, asdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional
+
+__all__ = ['FakeLLMConfig', 'FakeLLMServer', 'start_fake_llm_server']
+
+
+@dataclass
+class FakeLLMConfig:
+    """Behaviour of the fake chat-completions backend"""
+    latency: float = 0.5                # Mean seconds before the reply (or first token)
+    jitter: float = 0.1                 # Spread: stddev (normal), half-width (uniform), sigma (lognormal)
+    distribution: str = "normal"        # constant, uniform, normal or lognormal
+    agent_latency: Dict[str, float] = field(default_factory=dict)  # Mean latency per agent
+    model_latency: Dict[str, float] = field(default_factory=dict)  # Latency multiplier per model
+    tokens_per_second: float = 50.0     # Streaming rate after the first token (0 = no delay)
+    error_rate: float = 0.0             # Probability of an error reply
+    error_status: int = 500             # HTTP status of error replies
+    intervene_rate: float = 0.5         # Probability the planner decides to intervene
+    response_words: int = 40            # Length of the generated response text
+    prompt_tokens: Optional[int] = None      # Fixed usage.prompt_tokens (default: estimated)
+    completion_tokens: Optional[int] = None  # Fixed usage.completion_tokens (default: estimated)
+    seed: int = 0                       # Seed for latency, errors and content
+
+
+# Words for generated response text
+_VOCABULARY = (
+    "this section introduces the main idea of the paper and the notation used later "
+    "the key point is how the model combines attention with the training objective "
+    "try to connect the equation to the example in the previous paragraph "
+    "it may help to reread the definition before moving on to the results "
+    "you are making good progress so take a short break if the material feels dense"
+).split()
+
+_MOODS = ("engaged", "neutral", "confused", "curious", "frustrated", "focused")
+_INTERVENTIONS = ("concept_explanation", "section_summary", "encouragement", "break_suggestion",
+                  "related_resources", "section_transition")
+_SECTION_PATTERN = re.compile(r'(?:--(\w+(?:\s+\w+)*?)--|(\w+) section)', re.IGNORECASE)
+_QUOTED_PATTERN = re.compile(r"'([^']{2,40})'")
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return max(1, len(text) // 4)
+
+
+class FakeLLMServer:
+    """
+    OpenAI-compatible chat-completions server running in a background thread.
+
+    Attributes:
+        url: Base URL to pass to configure_api / configure_async_api
+        config: FakeLLMConfig in effect (may be changed while running)
+    """
+
+    def __init__(self, config: FakeLLMConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeLLMConfig()
+        self.host = host
+        self.port = port
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.server_thread: Optional[threading.Thread] = None
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "errors": 0, "streams": 0,
+                       "prompt_tokens": 0, "completion_tokens": 0, "by_agent": {}}
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        """Start serving in a daemon thread"""
+        server = self
+
+        class Handler(FakeLLMHandler):
+            fake = server
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def get_stats(self) -> Dict:
+        """Requests, errors, streams and token totals served so far"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["by_agent"] = dict(self._stats["by_agent"])
+            return stats
+
+    # ------------------------------------------------------------------
+    # Reply generation
+    # ------------------------------------------------------------------
+
+    def _draw(self, agent: str, model: str) -> Dict:
+        """Draw this request's latency and error outcome from the shared seeded RNG"""
+        config = self.config
+        mean = config.agent_latency.get(agent, config.latency) * config.model_latency.get(model, 1.0)
+        with self._lock:
+            if config.distribution == "constant":
+                latency = mean
+            elif config.distribution == "uniform":
+                latency = self._rng.uniform(mean - config.jitter, mean + config.jitter)
+            elif config.distribution == "lognormal":
+                # Median equal to the mean setting, heavy right tail controlled by jitter
+                latency = mean * math.exp(self._rng.gauss(0.0, config.jitter)) if mean > 0 else 0.0
+            else:
+                latency = self._rng.gauss(mean, config.jitter)
+            error = self._rng.random() < config.error_rate
+        return {"latency": max(0.0, latency), "error": error}
+
+    def _record(self, agent: str, usage: Optional[Dict], error: bool = False, stream: bool = False):
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["by_agent"][agent] = self._stats["by_agent"].get(agent, 0) + 1
+            if error:
+                self._stats["errors"] += 1
+            if stream:
+                self._stats["streams"] += 1
+            if usage:
+                self._stats["prompt_tokens"] += usage["prompt_tokens"]
+                self._stats["completion_tokens"] += usage["completion_tokens"]
+
+    @staticmethod
+    def detect_agent(messages: List[Dict]) -> str:
+        """Which ReaderAI agent sent the request, judged by its system prompt"""
+        system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+        if "In a single step" in system:
+            return "fused"
+        if "observation analyzer" in system:
+            return "analyzer"
+        if "user state inference" in system:
+            return "inferencer"
+        if "intervention planning" in system:
+            return "planner"
+        return "generator"
+
+    def build_content(self, agent: str, messages: List[Dict]) -> Dict:
+        """Schema-valid reply for an agent, deterministic for a given prompt and seed"""
+        prompt = "\n".join(m.get("content") or "" for m in messages)
+        digest = hashlib.sha256(f"{self.config.seed}:{prompt}".encode("utf-8")).digest()
+        rng = random.Random(digest)
+        user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+
+        if agent == "analyzer":
+            return self._analysis(rng, user)
+        if agent == "inferencer":
+            return self._user_state(rng)
+        if agent == "planner":
+            return self._plan(rng)
+        if agent == "generator":
+            return self._response(rng)
+
+        plan = self._plan(rng)
+        return {
+            "analysis": self._analysis(rng, user),
+            "user_state": self._user_state(rng),
+            "intervention_plan": plan,
+            "response": self._response(rng) if plan["should_intervene"] else
+                        {"response": None, "display_type": "sidebar"}
+        }
+
+    def _analysis(self, rng: random.Random, user: str) -> Dict:
+        lines = [line for line in user.splitlines() if line.strip()]
+        latest = lines[-1] if lines else ""
+        section = _SECTION_PATTERN.search(latest)
+        concepts = _QUOTED_PATTERN.findall(latest)
+        return {
+            "current_content": latest[:200],
+            "section_name": (section.group(1) or section.group(2)) if section else "",
+            "paper_title": "",
+            "reading_patterns": {
+                "is_pausing": "pause" in latest.lower(),
+                "is_rereading": "re-read" in latest.lower(),
+                "reading_speed": rng.choice(("fast", "normal", "slow")),
+                "confusion_indicators": ["long pause"] if "pause" in latest.lower() else [],
+                "section_transition": section is not None
+            },
+            "user_actions": [],
+            "time_on_section": f"{rng.randint(10, 300)} seconds",
+            "struggle_concepts": concepts[:3]
+        }
+
+    def _user_state(self, rng: random.Random) -> Dict:
+        return {
+            "mood": rng.choice(_MOODS),
+            "confusion_level": round(rng.random(), 2),
+            "engagement_level": round(rng.random(), 2),
+            "cognitive_load": rng.choice(("low", "medium", "high")),
+            "potential_knowledge_gaps": [],
+            "needs_help_probability": round(rng.random(), 2),
+            "at_natural_break": rng.random() < 0.3
+        }
+
+    def _plan(self, rng: random.Random) -> Dict:
+        intervene = rng.random() < self.config.intervene_rate
+        return {
+            "should_intervene": intervene,
+            "intervention_type": rng.choice(_INTERVENTIONS) if intervene else "none",
+            "urgency": rng.choice(("low", "medium", "high")),
+            "specific_target": "",
+            "reasoning": "synthetic decision from the fake backend",
+            "respect_reading_flow": True
+        }
+
+    def _response(self, rng: random.Random) -> Dict:
+        words = [rng.choice(_VOCABULARY) for _ in range(max(1, self.config.response_words))]
+        text = " ".join(words).capitalize() + "."
+        return {"response": text, "display_type": rng.choice(("popup", "sidebar", "inline"))}
+
+    def usage_for(self, messages: List[Dict], content: str) -> Dict:
+        """usage block, estimated from the text unless fixed in the config"""
+        prompt_tokens = self.config.prompt_tokens
+        if prompt_tokens is None:
+            prompt_tokens = sum(_estimate_tokens(m.get("content") or "") for m in messages)
+        completion_tokens = self.config.completion_tokens
+        if completion_tokens is None:
+            completion_tokens = _estimate_tokens(content)
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """HTTP handler for the fake backend (bound to a FakeLLMServer via `fake`)"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without TCP_NODELAY a reply on a
+    # kept-alive connection waits for the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+    fake: FakeLLMServer = None
+
+    def log_message(self, format, *args):
+        """Suppress request logging"""
+        pass
+
+    def do_GET(self):
+        path = _request_path(self.path)
+        if path in ("/v1/models", "/models"):
+            self._send_json(200, {"object": "list", "data": [
+                {"id": "fake-model", "object": "model", "created": 0, "owned_by": "fake"}]})
+        elif path == "/stats":
+            self._send_json(200, self.fake.get_stats())
+        else:
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        path = _request_path(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+
+        if path not in ("/v1/chat/completions", "/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+        try:
+            request = json.loads(body or b"{}")
+            messages = request["messages"]
+        except (ValueError, KeyError):
+            self._send_json(400, {"error": {"message": "Invalid request body", "type": "invalid_request_error"}})
+            return
+
+        fake = self.fake
+        model = request.get("model", "fake-model")
+        agent = fake.detect_agent(messages)
+        draw = fake._draw(agent, model)
+        stream = bool(request.get("stream"))
+
+        if draw["error"]:
+            time.sleep(draw["latency"])
+            fake._record(agent, None, error=True)
+            self._send_json(fake.config.error_status, {"error": {
+                "message": "Injected failure from the fake backend", "type": "server_error", "code": None}})
+            return
+
+        content = json.dumps(fake.build_content(agent, messages))
+        usage = fake.usage_for(messages, content)
+        fake._record(agent, usage, stream=stream)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        time.sleep(draw["latency"])
+        if not stream:
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                "usage": usage
+            })
+            return
+
+        include_usage = bool((request.get("stream_options") or {}).get("include_usage"))
+        self._stream(completion_id, created, model, content, usage if include_usage else None)
+
+    def _stream(self, completion_id: str, created: int, model: str, content: str, usage: Optional[Dict]):
+        """Send the reply as chat.completion.chunk Server-Sent Events at the configured token rate"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(delta: Dict, finish_reason: Optional[str] = None, extra: Dict = None) -> Dict:
+            payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                       "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            if extra:
+                payload.update(extra)
+            return payload
+
+        rate = self.fake.config.tokens_per_second
+        try:
+            self._write_event(chunk({"role": "assistant", "content": ""}))
+            for start in range(0, len(content), 4):
+                if rate > 0 and start:
+                    time.sleep(1.0 / rate)
+                self._write_event(chunk({"content": content[start:start + 4]}))
+            self._write_event(chunk({}, "stop"))
+            if usage is not None:
+                self._write_event({"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                                   "model": model, "choices": [], "usage": usage})
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _write_event(self, payload: Dict):
+        self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+    def _write_chunk(self, data: bytes):
+        """Write one HTTP/1.1 chunk (an empty chunk ends the body)"""
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _request_path(raw_path: str) -> str:
+    """Request path without query string or trailing slash"""
+    return raw_path.split("?", 1)[0].rstrip("/") or "/"
+
+
+def start_fake_llm_server(config: FakeLLMConfig = None, host: str = "127.0.0.1", port: int = 0) -> FakeLLMServer:
+    """
+    Start a fake chat-completions server in the background.
+
+    Args:
+        config: FakeLLMConfig (defaults to FakeLLMConfig())
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+
+    Returns:
+        Running FakeLLMServer; pass server.url as api_url
+    """
+    return FakeLLMServer(config, host, port).start()
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description='Local OpenAI-compatible fake backend for ReaderAI benchmarks')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=8765, help='Port to bind')
+    parser.add_argument('--latency', type=float, default=0.5, help='Mean seconds before the reply')
+    parser.add_argument('--jitter', type=float, default=0.1, help='Latency spread')
+    parser.add_argument('--distribution', choices=['constant', 'uniform', 'normal', 'lognormal'],
+                        default='normal', help='Latency distribution')
+    parser.add_argument('--tokens-per-second', type=float, default=50.0, help='Streaming token rate')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Probability of an error reply')
+    parser.add_argument('--error-status', type=int, default=500, help='HTTP status of error replies')
+    parser.add_argument('--intervene-rate', type=float, default=0.5,
+                        help='Probability the planner intervenes')
+    parser.add_argument('--response-words', type=int, default=40, help='Length of generated responses')
+    parser.add_argument('--prompt-tokens', type=int, help='Fixed usage.prompt_tokens')
+    parser.add_argument('--completion-tokens', type=int, help='Fixed usage.completion_tokens')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for latency, errors and content')
+    args = parser.parse_args()
+
+    config = FakeLLMConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        distribution=args.distribution,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        intervene_rate=args.intervene_rate,
+        response_words=args.response_words,
+        prompt_tokens=args.prompt_tokens,
+        completion_tokens=args.completion_tokens,
+        seed=args.seed
+    )
+    server = start_fake_llm_server(config, args.host, args.port)
+    print(f"[FakeLLM] Serving chat completions on {server.url}")
+    print(f"[FakeLLM] Config: {json.dumps(asdict(config))}")
+    print("Press Ctrl+C to stop.")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\n[FakeLLM] Stats: {json.dumps(server.get_stats())}")
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
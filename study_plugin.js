@@ -26,7 +26,8 @@
         processingObservation: false,
         lastObservationHash: null,
         rereadCooldown: {},
-        observationQueue: []  // ADD THIS: Queue for observations during AI processing
+        observationQueue: [],  // ADD THIS: Queue for observations during AI processing
+        inflight: null         // { controller, priority, superseded } of the request in progress
     };
     /* ------------------------------------------------------------------
        Config & templates
@@ -34,6 +35,12 @@
     const config = window.STUDY_CONFIG || {};
     const tracking = config.tracking || {};
     const templates = config.observation_templates || {};
+    const streamResponses =
+        config.ai_behavior?.stream_responses === true &&
+        typeof TextDecoder !== 'undefined' &&
+        typeof ReadableStream !== 'undefined';
+    // A newer observation with a higher priority aborts the request in flight
+    const observationPriorities = config.ai_behavior?.observation_priorities || {};
 
     /* ------------------------------------------------------------------
        Utility functions
@@ -259,6 +266,137 @@
         return result;
     }
 
+    /* -------- request supersession ----------------------------- */
+    function observationPriority(type) {
+        return observationPriorities[type] ?? 1;
+    }
+
+    function startRequest(priority) {
+        const inflight = { controller: new AbortController(), priority, superseded: false };
+        state.inflight = inflight;
+        return inflight;
+    }
+
+    function finishRequest(inflight) {
+        if (state.inflight === inflight) state.inflight = null;
+    }
+
+    // Abort the request in flight when an observation at least as important
+    // arrives (the server cancels its run by the same rule), its answer would
+    // describe content the reader has moved past
+    function supersedeInflight(type) {
+        const inflight = state.inflight;
+        if (!inflight || inflight.superseded) return;
+        if (observationPriority(type) < inflight.priority) return;
+
+        console.log(`[Study] ${type} supersedes the request in flight, aborting it`);
+        inflight.superseded = true;
+        inflight.controller.abort();
+    }
+
+    /* -------- postObservation ----------------------------------- */
+    function parseServerSentEvent(block) {
+        let name = 'message';
+        let id = null;
+        const dataLines = [];
+        block.split('\n').forEach(line => {
+            if (line.startsWith('event:')) name = line.slice(6).trim();
+            else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+            else if (line.startsWith('id:')) id = line.slice(3).trim();
+        });
+        return { name, id, data: dataLines.length ? JSON.parse(dataLines.join('\n')) : null };
+    }
+
+    // Read a Server-Sent Events response to the end, calling onEvent for each event
+    async function readEventStream(response, onEvent) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                onEvent(parseServerSentEvent(buffer.slice(0, boundary)));
+                buffer = buffer.slice(boundary + 2);
+            }
+        }
+    }
+
+    // Wait for an observation job (202 from the observe endpoints) to finish.
+    // Without onEvent each poll is a bounded long-poll: the server answers as
+    // soon as the job finishes or after a couple of seconds. With onEvent the
+    // job's event stream is read instead; the server ends it after a few
+    // seconds while the job runs, and it is resumed after the last event seen.
+    // Either way no connection is held for the whole AI run. When the request
+    // is abandoned the job is cancelled too.
+    async function waitForJob(job, signal, onEvent) {
+        const outcomeOf = (name, data) => {
+            if (name === 'done') return { result: data || { response: null } };
+            if (name === 'error' || name === 'cancelled') {
+                throw new Error(`Observation job ${job.job_id} ${name}: ${(data || {}).error || ''}`);
+            }
+            return null;
+        };
+        try {
+            let after = 0;
+            while (true) {
+                const response = await fetch(onEvent ? `${job.events}?after=${after}` : `${job.poll}?wait=2`,
+                                             { signal });
+                if (!response.ok) throw new Error(`Observation job ${job.job_id} not found`);
+                let outcome = null;
+                if (onEvent) {
+                    await readEventStream(response, event => {
+                        if (event.id !== null) after = Number(event.id);
+                        outcome = outcome || outcomeOf(event.name, event.data);
+                        if (!outcome) onEvent(event);
+                    });
+                } else {
+                    const data = await response.json();
+                    outcome = outcomeOf(data.status, data.status === 'done' ? data.result : data);
+                }
+                if (outcome) return outcome.result;
+            }
+        } catch (err) {
+            if (err.name === 'AbortError') {
+                fetch(job.poll, { method: 'DELETE', keepalive: true }).catch(() => {});
+            }
+            throw err;
+        }
+    }
+
+    // Send one observation and resolve with the final response data.
+    // The AI pipeline runs as a job: the request returns at once with its id.
+    // When streaming is enabled the response text is shown while it is generated.
+    async function postObservation(obsData, signal) {
+        const endpoint = streamResponses ? 'observe_stream' : 'observe';
+        const response = await fetch(`/api/plugin/reading-study/${endpoint}`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(obsData),
+            signal
+        });
+        const data = await response.json();
+        if (response.status !== 202) return data;
+        if (!streamResponses) return waitForJob(data, signal);
+
+        let partial = '';
+        const result = await waitForJob(data, signal, event => {
+            if (event.name === 'delta' && state.sessionActive) {
+                partial += event.data.text;
+                displayAssistantResponse(partial, 'suggestion', true);
+            }
+        });
+
+        // The text streamed but the pipeline decided not to intervene
+        if (partial && !result.response) discardStreamingResponse();
+
+        return result;
+    }
+
     /* -------- processQueuedObservations ------------------------- */
     async function processQueuedObservations() {
         if (state.observationQueue.length === 0) {
@@ -276,41 +414,45 @@
         // Clear the queue immediately
         state.observationQueue = [];
         
-        // Process each observation
-        for (const obs of filteredObservations) {
-            // Don't update UI again, it was already updated when first observed
-            console.log(`[Study] Sending queued observation: ${obs.type} from ${new Date(obs.timestamp).toLocaleTimeString()}`);
-            
-            // Reset processing state for each observation
-            state.processingObservation = true;
+        // Send the whole burst as one batch: the server runs the AI pipeline once for it
+        state.processingObservation = true;
+        const inflight = startRequest(
+            Math.max(...filteredObservations.map(obs => observationPriority(obs.type)))
+        );
+        
+        try {
+            const data = await postObservation({
+                observations: filteredObservations.map(obs => ({
+                    observation: obs.observation,
+                    type: obs.type,
+                    timestamp: obs.timestamp,
+                    context: obs.context
+                }))
+            }, inflight.controller.signal);
             
-            try {
-                const response = await fetch('/api/plugin/reading-study/observe', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        observation: obs.observation,
-                        type: obs.type,
-                        timestamp: obs.timestamp,
-                        context: obs.context
-                    })
-                });
-                
-                const data = await response.json();
-                
-                if (data.response) {
-                    displayAssistantResponse(data.response, data.type || 'suggestion');
-                    state.interventionCount++;
-                    if (state.currentSection) {
-                        const id = state.currentSection.id;
-                        state.sectionInterventions[id] = (state.sectionInterventions[id] || 0) + 1;
-                    }
+            if (data.response) {
+                displayAssistantResponse(data.response, data.type || 'suggestion');
+                state.interventionCount++;
+                if (state.currentSection) {
+                    const id = state.currentSection.id;
+                    state.sectionInterventions[id] = (state.sectionInterventions[id] || 0) + 1;
                 }
-            } catch (err) {
-                console.error('[Study] Error processing queued observation:', err);
             }
-            
-            state.processingObservation = false;
+        } catch (err) {
+            if (inflight.superseded) {
+                console.log('[Study] Queued observations superseded by a newer observation');
+                discardStreamingResponse();
+            } else {
+                console.error('[Study] Error processing queued observations:', err);
+            }
+        }
+        
+        finishRequest(inflight);
+        state.processingObservation = false;
+        
+        // Observations that arrived while the batch was processed
+        if (state.observationQueue.length > 0) {
+            await processQueuedObservations();
         }
     }
 
@@ -371,6 +513,7 @@
         if (state.processingObservation) {
             console.log('[Study] Already processing, queuing observation');
             state.observationQueue.push(obsData);
+            supersedeInflight(type);
             return;
         }
 
@@ -412,29 +555,21 @@
             }, stage.delay);
         });
 
+        const inflight = startRequest(observationPriority(type));
+
         try {
-            const controller = new AbortController();
-            const timeoutId = setTimeout(() => controller.abort(), 60000);
+            const timeoutId = setTimeout(() => inflight.controller.abort(), 60000);
 
-            const response = await fetch(
-                '/api/plugin/reading-study/observe',
-                {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(obsData),
-                    signal: controller.signal
-                }
-            );
+            const data = await postObservation(obsData, inflight.controller.signal);
 
             clearTimeout(timeoutId);
+            finishRequest(inflight);
 
             // Clear any pending stage updates
             stages.forEach((stage, index) => {
                 clearTimeout(window[`stageTimeout${index}`]);
             });
 
-            const data = await response.json();
-
             if (container) {
                 const loadingEl = container.querySelector('.assistant-loading');
                 if (loadingEl) loadingEl.style.display = 'none';
@@ -460,7 +595,10 @@
             await processQueuedObservations();
             
         } catch (err) {
-            console.error('[Study] Error sending observation:', err);
+            finishRequest(inflight);
+            if (!inflight.superseded) {
+                console.error('[Study] Error sending observation:', err);
+            }
             
             // Reset processing state on error
             state.processingObservation = false;
@@ -477,7 +615,10 @@
                 if (loadingEl) loadingEl.style.display = 'none';
             }
 
-            if (err.name === 'AbortError') {
+            if (inflight.superseded) {
+                console.log('[Study] Observation superseded by a newer one');
+                discardStreamingResponse();
+            } else if (err.name === 'AbortError') {
                 console.log('[Study] Request timed out after 60 seconds');
                 displayAssistantResponse(
                     'The AI assistant is taking longer than expected. Your reading activity is still being tracked.',
@@ -495,20 +636,42 @@
     /* ------------------------------------------------------------------
        Assistant message panel (unchanged except guard checks)
     ------------------------------------------------------------------ */
-    function displayAssistantResponse(response, type) {
+    function displayAssistantResponse(response, type, streaming = false) {
         const container = document.getElementById('ai-response-container');
         if (!container) return;
 
-        const msg = {
-            id: Date.now(),
-            response,
-            type,
-            timestamp: new Date().toLocaleTimeString(),
-            feedbackProvided: false
-        };
-        messageHistory.push(msg);
-        if (messageHistory.length > 5) messageHistory.shift();
+        const last = messageHistory[messageHistory.length - 1];
+        if (last && last.streaming) {
+            // Update the message that is still being streamed in place
+            last.response = response;
+            last.type = type;
+            last.streaming = streaming;
+        } else {
+            const msg = {
+                id: Date.now(),
+                response,
+                type,
+                timestamp: new Date().toLocaleTimeString(),
+                feedbackProvided: false,
+                streaming
+            };
+            messageHistory.push(msg);
+            if (messageHistory.length > 5) messageHistory.shift();
+        }
+
+        renderMessageHistory(container);
+    }
+
+    function discardStreamingResponse() {
+        const last = messageHistory[messageHistory.length - 1];
+        if (!last || !last.streaming) return;
+        messageHistory.pop();
+
+        const container = document.getElementById('ai-response-container');
+        if (container) renderMessageHistory(container);
+    }
 
+    function renderMessageHistory(container) {
         container.innerHTML = '';
         container.classList.add('active');
 
@@ -535,7 +698,7 @@
                 </div>
                 <div class="response-content">${m.response}</div>
                 ${
-                    latest && !m.feedbackProvided
+                    latest && !m.feedbackProvided && !m.streaming
                         ? `
                     <div class="response-actions">
                         <button class="feedback-btn helpful" onclick="provideFeedback(true, ${m.id})">
@@ -0,0 +1,676 @@
+"""
+telemetry.py - In-process metrics for the reading assistant
+
+A small metrics registry with labelled counters and histograms, shared by
+ReaderAI (agent latency, token usage, cache hits), empirical_study (accepted
+and skipped observations) and MarkdownBrowser (HTTP handler time). The
+browser serves it at GET /api/metrics in Prometheus text format, or as JSON
+with ?format=json.
+
+It also holds a span tracer that writes Chrome trace-event JSON, which opens
+in chrome://tracing or https://ui.perfetto.dev. Tracing is off by default; a
+disabled span costs one attribute check.
+
+The opt-in Profiler wraps chosen functions in cProfile and samples the stacks
+of busy threads while they run, for pstats and flamegraph output.
+
+Usage:
+    from telemetry import get_registry
+
+    registry = get_registry()
+    requests = registry.counter("app_requests_total", "Requests handled", ("route",))
+    requests.inc(route="/")
+    latency = registry.histogram("app_request_seconds", "Request time", ("route",))
+    latency.observe(0.012, route="/")
+    print(registry.to_prometheus())
+
+Tracing:
+    from telemetry import get_tracer, traced
+
+    @traced(cat="bridge")
+    def handle(data): ...
+
+    tracer = get_tracer()
+    tracer.start("data/traces/session.trace.json")
+    with tracer.span("json_decode", cat="http", size=1024):
+        ...
+    tracer.stop()  # writes the trace file
+
+Profiling:
+    from telemetry import Profiler
+
+    profiler = Profiler("data/profiles/run1")
+    profiler.wrap(DirectMarkdownBrowser, "get_page")
+    profiler.start()
+    ...
+    profiler.stop()  # writes <name>.pstats, profile.collapsed and summary.txt
+"""
+
+import asyncio
+import bisect
+import cProfile
+import functools
+import inspect
+import io
+import json
+import math
+import os
+import pstats
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+__all__ = ['Counter', 'Histogram', 'MetricsRegistry', 'get_registry', 'DEFAULT_BUCKETS',
+           'Tracer', 'get_tracer', 'traced', 'Profiler']
+
+# Latency buckets in seconds, from local handler times up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Metric:
+    """Base class: a named metric with a fixed set of label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _label_text(self, key: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        """Add amount (default 1) to the counter for these labels"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Current count for these labels"""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            return [(self.name, self._label_text(key), value) for key, value in sorted(self._values.items())]
+
+    def to_dict(self) -> List[Dict]:
+        with self._lock:
+            return [{"labels": dict(zip(self.labelnames, key)), "value": value}
+                    for key, value in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels):
+        """Record one observation for these labels"""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def count(self, **labels) -> int:
+        """Number of observations for these labels"""
+        with self._lock:
+            return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        out = []
+        with self._lock:
+            for key in sorted(self._counts):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (math.inf,), self._counts[key]):
+                    cumulative += count
+                    out.append((f"{self.name}_bucket", self._label_text(key, ("le", _format_value(bound))),
+                                cumulative))
+                out.append((f"{self.name}_sum", self._label_text(key), self._sums[key]))
+                out.append((f"{self.name}_count", self._label_text(key), cumulative))
+        return out
+
+    def to_dict(self) -> List[Dict]:
+        with self._lock:
+            out = []
+            for key in sorted(self._counts):
+                counts = self._counts[key]
+                total = sum(counts)
+                out.append({
+                    "labels": dict(zip(self.labelnames, key)),
+                    "count": total,
+                    "sum": self._sums[key],
+                    "mean": self._sums[key] / total if total else None,
+                    "buckets": {_format_value(bound): count
+                                for bound, count in zip(self.buckets + (math.inf,), counts)}
+                })
+            return out
+
+
+class MetricsRegistry:
+    """
+    Collection of named metrics.
+
+    counter() and histogram() return the existing metric when the name is
+    already registered, so modules can declare the metrics they use at import.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        """Get or create a counter"""
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram"""
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Registered metric by name"""
+        return self._metrics.get(name)
+
+    def to_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> Dict:
+        """All metrics as JSON-serialisable data"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return {metric.name: {"type": metric.kind, "help": metric.help, "samples": metric.to_dict()}
+                for metric in metrics}
+
+
+_REGISTRY = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """The process-wide metrics registry"""
+    return _REGISTRY
+
+
+class _NullSpan:
+    """Span returned while tracing is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Times a block and records it as a complete ("X") event on exit"""
+
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, cat: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add_span(self.name, self.cat, self.start, end, self.args)
+        return False
+
+
+class Tracer:
+    """
+    Records spans as Chrome trace events and writes them to a JSON file.
+
+    Spans on the same thread nest by time. Spans inside asyncio tasks are put
+    on a lane of their own while the task runs, so concurrent agent calls on
+    the shared event loop show up side by side rather than overlapping. A
+    finished task's lane is reused by later tasks on the same thread, so the
+    number of lanes follows the peak concurrency, not the number of tasks.
+    """
+
+    def __init__(self, max_events: int = 500000):
+        self.enabled = False
+        self.path: Optional[str] = None
+        self.max_events = max_events
+        self.dropped = 0
+        self._events: List[Dict] = []
+        self._lane_count = 0
+        self._generation = 0  # Bumped by start(), so lanes from an earlier recording are not reused
+        self._thread_lanes = threading.local()
+        self._task_lanes: Dict[int, int] = {}  # id(task) -> lane, while the task runs
+        self._free_lanes: Dict[int, List[Tuple[int, float]]] = {}  # thread ident -> [(lane, released at)]
+        self._task_lane_names: Dict[int, int] = {}  # thread ident -> task lanes created
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    def start(self, path: str):
+        """Start recording, to be written to path"""
+        with self._lock:
+            self.path = path
+            self._events = []
+            self._lane_count = 0
+            self._generation += 1
+            self._task_lanes = {}
+            self._free_lanes = {}
+            self._task_lane_names = {}
+            self.dropped = 0
+            self.enabled = True
+
+    def stop(self) -> Optional[str]:
+        """Stop recording and write the trace file; returns its path"""
+        if not self.enabled:
+            return None
+        self.enabled = False
+        return self.save()
+
+    def save(self) -> Optional[str]:
+        """Write the events recorded so far (recording continues)"""
+        if not self.path:
+            return None
+        with self._lock:
+            events = list(self._events)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "otherData": {"dropped_events": self.dropped}}, f)
+        return self.path
+
+    def span(self, name: str, cat: str = "app", **args):
+        """Context manager timing a block (a no-op while tracing is off)"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def add_span(self, name: str, cat: str, start: float, end: float, args: Optional[Dict] = None):
+        """Record a span from perf_counter() start and end times"""
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": self._pid,
+            "tid": self._lane(start),
+        }
+        if args:
+            event["args"] = {key: value if isinstance(value, (int, float, bool, type(None))) else str(value)
+                             for key, value in args.items()}
+        self._append(event)
+
+    def _lane(self, start: float) -> int:
+        """Trace thread id for a span starting at start: a lane for the current asyncio task, else the thread's"""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is None:
+            local = self._thread_lanes
+            if getattr(local, 'generation', None) != self._generation:
+                local.lane = self._new_lane(threading.current_thread().name)
+                local.generation = self._generation
+            return local.lane
+
+        ident = threading.get_ident()
+        with self._lock:
+            lane = self._task_lanes.get(id(task))
+            if lane is not None:
+                return lane
+            # A freed lane, as long as its last task ended before this span began
+            free = self._free_lanes.setdefault(ident, [])
+            for index, (free_lane, released) in enumerate(free):
+                if released <= start:
+                    lane = free.pop(index)[0]
+                    break
+            else:
+                number = self._task_lane_names[ident] = self._task_lane_names.get(ident, 0) + 1
+            generation = self._generation
+            if lane is not None:
+                self._task_lanes[id(task)] = lane
+        if lane is None:
+            lane = self._new_lane(f"{threading.current_thread().name}: task lane {number}")
+            with self._lock:
+                self._task_lanes[id(task)] = lane
+        # Released when the task is done, before it can be collected and its id reused
+        task.add_done_callback(functools.partial(self._release_lane, ident, lane, generation))
+        return lane
+
+    def _new_lane(self, label: str) -> int:
+        with self._lock:
+            self._lane_count += 1
+            lane = self._lane_count
+        self._append({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": lane,
+                      "args": {"name": label}})
+        return lane
+
+    def _release_lane(self, ident: int, lane: int, generation: int, task: asyncio.Task):
+        with self._lock:
+            if generation == self._generation:
+                self._task_lanes.pop(id(task), None)
+                self._free_lanes.setdefault(ident, []).append((lane, time.perf_counter()))
+
+    def _append(self, event: Dict):
+        with self._lock:
+            if len(self._events) < self.max_events:
+                self._events.append(event)
+            else:
+                self.dropped += 1
+
+
+_TRACER = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """The process-wide tracer"""
+    return _TRACER
+
+
+def traced(name: Optional[str] = None, cat: str = "app") -> Callable:
+    """
+    Decorator recording each call of a function or coroutine function as a span.
+
+    The span is named after the function's qualified name unless name is given.
+    While tracing is off the wrapper only checks get_tracer().enabled.
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _TRACER.enabled:
+                    return await func(*args, **kwargs)
+                with _Span(_TRACER, span_name, cat, {}):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _TRACER.enabled:
+                return func(*args, **kwargs)
+            with _Span(_TRACER, span_name, cat, {}):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class Profiler:
+    """
+    Opt-in CPU profiler for selected functions.
+
+    wrap() replaces a function on a class or module with one that runs each
+    call under cProfile in the calling thread; the per-thread profiles are
+    merged into one pstats file per function. A coroutine function is
+    profiled on the thread of its event loop from its start to its end, so
+    the profile also covers other tasks that loop runs meanwhile. Wrap the
+    coroutine doing the work (AsyncResearchAssistant._run_pipeline), not a
+    sync wrapper that only waits for it. Only one call is under cProfile
+    at a time (Python 3.12+ allows a single active profiler per process), so
+    calls overlapping it on other threads are timed but not profiled; the
+    stack sampler still covers them. While any wrapped call is
+    running, a sampling thread also records the stacks of every thread that
+    used CPU since the previous sample. That covers work the call hands to
+    other threads, such as the agents on the ReaderAI event loop, and is
+    written as collapsed stacks for flamegraph.pl or speedscope.
+    """
+
+    # Threads that used less CPU than this share of the sampling interval count
+    # as idle, which skips threads waking briefly from select() or a lock wait
+    MIN_CPU_SHARE = 0.1
+
+    def __init__(self, output_dir: str, interval: float = 0.005):
+        self.output_dir = output_dir
+        self.interval = interval
+        self._profiles: Dict[Tuple[str, int], cProfile.Profile] = {}
+        self._calls: Dict[str, List[float]] = {}  # name -> [calls, total seconds, max seconds, profiled calls]
+        self._stacks: Dict[str, int] = {}
+        self._active = 0
+        self._profiling = False  # A call is running under cProfile
+        self._current = threading.local()
+        self._patched: List[Tuple[object, str, Optional[Callable]]] = []  # None: restore the inherited one
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def wrap(self, owner, attr: str, name: Optional[str] = None):
+        """Profile every call of owner.attr (restored by stop())"""
+        original = getattr(owner, attr)
+        inherited = isinstance(owner, type) and attr not in owner.__dict__
+        name = name or f"{getattr(owner, '__name__', owner)}.{attr}"
+        profiler = self
+
+        if inspect.iscoroutinefunction(original):
+            @functools.wraps(original)
+            async def wrapper(*args, **kwargs):
+                profile = profiler._begin(name)
+                start = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    profiler._end(name, profile, time.perf_counter() - start)
+        else:
+            @functools.wraps(original)
+            def wrapper(*args, **kwargs):
+                return profiler._call(name, original, args, kwargs)
+
+        setattr(owner, attr, wrapper)
+        self._patched.append((owner, attr, None if inherited else original))
+
+    def start(self):
+        """Start the stack sampler"""
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample, name="Profiler-sampler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> List[str]:
+        """Stop profiling, restore wrapped functions and write the results; returns the file paths"""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        for owner, attr, original in reversed(self._patched):
+            if original is None:
+                delattr(owner, attr)
+            else:
+                setattr(owner, attr, original)
+        self._patched = []
+        return self.save()
+
+    def save(self) -> List[str]:
+        """Write pstats per wrapped function, collapsed stacks and a text summary"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        paths = []
+        summary = io.StringIO()
+        with self._lock:
+            profiles = dict(self._profiles)
+            calls = {name: list(values) for name, values in self._calls.items()}
+            stacks = dict(self._stacks)
+
+        for name, (count, total, longest, profiled) in sorted(calls.items()):
+            merged = None
+            for (profile_name, _), profile in profiles.items():
+                if profile_name != name:
+                    continue
+                if merged is None:
+                    merged = pstats.Stats(profile, stream=summary)
+                else:
+                    merged.add(profile)
+            summary.write(f"{name}: {int(count)} calls ({int(profiled)} profiled), {total:.3f}s total, "
+                          f"{total / count * 1000:.2f}ms mean, {longest * 1000:.2f}ms max\n")
+            if merged is None:
+                continue
+            path = os.path.join(self.output_dir, f"{name}.pstats")
+            merged.dump_stats(path)
+            paths.append(path)
+            merged.sort_stats("cumulative").print_stats(25)
+
+        path = os.path.join(self.output_dir, "profile.collapsed")
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+        paths.append(path)
+
+        path = os.path.join(self.output_dir, "summary.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(summary.getvalue())
+        paths.append(path)
+        return paths
+
+    def _call(self, name: str, func: Callable, args, kwargs):
+        # A profiled call made from inside another one is covered by the outer profile
+        if getattr(self._current, 'name', None) is not None:
+            return func(*args, **kwargs)
+        self._current.name = name
+        profile = self._begin(name)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._end(name, profile, time.perf_counter() - start)
+            self._current.name = None
+
+    def _begin(self, name: str) -> Optional[cProfile.Profile]:
+        """Count a wrapped call as running and enable its profile, unless another call holds cProfile"""
+        key = (name, threading.get_ident())
+        profile = None
+        with self._lock:
+            if not self._profiling:
+                self._profiling = True
+                profile = self._profiles.get(key)
+                if profile is None:
+                    profile = self._profiles[key] = cProfile.Profile()
+            self._active += 1
+        if profile is not None:
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler (not ours) is active in the process
+                profile = None
+                with self._lock:
+                    self._profiling = False
+        return profile
+
+    def _end(self, name: str, profile: Optional[cProfile.Profile], elapsed: float):
+        """Disable the call's profile, if it had one, and record its time"""
+        if profile is not None:
+            profile.disable()
+        with self._lock:
+            if profile is not None:
+                self._profiling = False
+            self._active -= 1
+            stats = self._calls.setdefault(name, [0, 0.0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+            stats[3] += profile is not None
+
+    def _sample(self):
+        own = threading.get_ident()
+        cpu_times: Dict[int, float] = {}
+        while not self._stop.wait(self.interval):
+            if not self._active:
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or not self._used_cpu(ident, cpu_times, self.interval * self.MIN_CPU_SHARE):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                key = ";".join(reversed(stack))
+                with self._lock:
+                    self._stacks[key] = self._stacks.get(key, 0) + 1
+
+    @staticmethod
+    def _used_cpu(ident: int, cpu_times: Dict[int, float], threshold: float) -> bool:
+        """Whether a thread ran since the last sample (always True where per-thread CPU clocks are unavailable)"""
+        try:
+            now = time.clock_gettime(time.pthread_getcpuclockid(ident))
+        except (AttributeError, OSError):
+            return True
+        previous = cpu_times.get(ident)
+        cpu_times[ident] = now
+        return previous is not None and now - previous >= threshold